@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import atexit
+import email.utils
 import json
 import sys
 import threading
@@ -9,16 +12,34 @@ import webbrowser
 import subprocess
 import os
 import shutil
+import socket
+import sqlite3
+import operator
+import select
+import re
+import queue
+import random
 import urllib.parse
+from collections import deque, namedtuple
+from functools import lru_cache, reduce
+from concurrent.futures import ThreadPoolExecutor
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Optional
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     REQUESTS_AVAILABLE = True
 except ImportError:
     REQUESTS_AVAILABLE = False
 
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
 try:
     import tkinter as tk
     from tkinter import ttk, messagebox
@@ -31,30 +52,81 @@ try:
 except ImportError:
     serial = None
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Shared compact encoder for HTTP responses (json.dumps builds a new encoder per call)
+_dumps = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+# (unix second, '%Y-%m-%d %H:%M:%S', '%d/%b/%Y %H:%M:%S') for the last second formatted
+_ts_cache = (None, '', '')
+
+
+def _timestamps():
+    """Local time as ('YYYY-mm-dd HH:MM:SS', 'dd/Mon/YYYY HH:MM:SS'), formatted once per second"""
+    global _ts_cache
+    now = int(time.time())
+    cache = _ts_cache
+    if cache[0] != now:
+        lt = time.localtime(now)
+        cache = (now, time.strftime('%Y-%m-%d %H:%M:%S', lt), time.strftime('%d/%b/%Y %H:%M:%S', lt))
+        _ts_cache = cache
+    return cache[1], cache[2]
+
+
+@lru_cache(maxsize=8)
+def _hms(second: int) -> str:
+    """Local 'HH:MM:SS' for a whole epoch second; repeated polls of the same fix reuse it"""
+    return time.strftime('%H:%M:%S', time.localtime(second))
+
+
+if ORJSON_AVAILABLE:
+    _dumps_bytes = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumps_bytes(obj) -> bytes:
+        return _dumps(obj).encode('utf-8')
+    _loads = json.loads  # Accepts bytes as well as str
+
+_RMC_PREFIXES = frozenset(('$GPRMC', '$GNRMC', '$GCRMC'))
+_GGA_PREFIXES = frozenset(('$GPGGA', '$GNGGA'))
+_GSA_PREFIXES = frozenset(('$GPGSA', '$GNGSA'))
+
+_SIGN = {'N': 1.0, 'E': 1.0, 'S': -1.0, 'W': -1.0}
+_INV60 = 1.0 / 60.0
+
 def nmea_to_decimal(coord: str, direction: str) -> Optional[float]:
-    if not coord or not direction or '.' not in coord:
+    # DDMM.MMMM / DDDMM.MMMM: everything before the last two integer digits is degrees
+    dot = coord.find('.')
+    if dot < 3:
+        return None
+    sign = _SIGN.get(direction)
+    if sign is None:
         return None
     try:
-        before_dot = coord.split('.', 1)[0]
-        if len(before_dot) < 3:
-            return None
-        deg_len = len(before_dot) - 2
-        deg = int(coord[:deg_len])
-        minutes = float(coord[deg_len:])
-        decimal = deg + minutes / 60.0
-        if direction in ('S', 'W'):
-            decimal = -decimal
-        return decimal
-    except Exception:
+        return sign * (int(coord[:dot - 2]) + float(coord[dot - 2:]) * _INV60)
+    except ValueError:
         return None
 
 def parse_rmc(line: str):
-    if not (line.startswith('$GPRMC') or line.startswith('$GNRMC') or line.startswith('$GCRMC')):
+    if line[:6] not in _RMC_PREFIXES:
         return None
+    return _parse_rmc_body(line)
+
+def _parse_rmc_body(line: str):
+    """Parse an RMC sentence whose prefix has already been matched"""
     try:
-        if '*' in line:
-            line = line.split('*', 1)[0]
-        parts = line.split(',')
+        # Split only as far as the fields we use; the checksum is dropped first
+        parts = line.partition('*')[0].split(',', 11)
         if len(parts) < 12:
             return None
         status = parts[2].upper() if parts[2] else 'V'
@@ -69,12 +141,15 @@ def parse_rmc(line: str):
 
 def parse_gga(line: str):
     """Parse GGA sentence for altitude, satellite count, and HDOP"""
-    if not (line.startswith('$GPGGA') or line.startswith('$GNGGA')):
+    if line[:6] not in _GGA_PREFIXES:
         return None
+    return _parse_gga_body(line)
+
+def _parse_gga_body(line: str):
+    """Parse a GGA sentence whose prefix has already been matched"""
     try:
-        if '*' in line:
-            line = line.split('*', 1)[0]
-        parts = line.split(',')
+        # Split only as far as the fields we use; the checksum is dropped first
+        parts = line.partition('*')[0].split(',', 14)
         if len(parts) < 15:
             return None
         
@@ -100,12 +175,15 @@ def parse_gga(line: str):
 
 def parse_gsa(line: str):
     """Parse GSA sentence for PDOP, HDOP, VDOP and fix type"""
-    if not (line.startswith('$GPGSA') or line.startswith('$GNGSA')):
+    if line[:6] not in _GSA_PREFIXES:
         return None
+    return _parse_gsa_body(line)
+
+def _parse_gsa_body(line: str):
+    """Parse a GSA sentence whose prefix has already been matched"""
     try:
-        if '*' in line:
-            line = line.split('*', 1)[0]
-        parts = line.split(',')
+        # Split only as far as the fields we use; the checksum is dropped first
+        parts = line.partition('*')[0].split(',', 18)
         if len(parts) < 18:
             return None
         
@@ -115,10 +193,7 @@ def parse_gsa(line: str):
         vdop = float(parts[17]) if parts[17] else None
         
         # Satellite IDs (positions 3-14)
-        satellite_ids = []
-        for i in range(3, 15):
-            if parts[i]:
-                satellite_ids.append(int(parts[i]))
+        satellite_ids = [int(p) for p in parts[3:15] if p]
         
         return {
             'fix_type': fix_type,
@@ -130,6 +205,34 @@ def parse_gsa(line: str):
     except Exception:
         return None
 
+# Raw sentence prefix -> (kind, body parser); one dict lookup per line replaces the startswith chains
+NMEA_DISPATCH = {
+    b'$GPRMC': ('rmc', _parse_rmc_body),
+    b'$GNRMC': ('rmc', _parse_rmc_body),
+    b'$GCRMC': ('rmc', _parse_rmc_body),
+    b'$GPGGA': ('gga', _parse_gga_body),
+    b'$GNGGA': ('gga', _parse_gga_body),
+    b'$GPGSA': ('gsa', _parse_gsa_body),
+    b'$GNGSA': ('gsa', _parse_gsa_body),
+}
+
+def nmea_checksum(data: bytes) -> int:
+    """XOR of the sentence bytes between '$' and '*'"""
+    return reduce(operator.xor, data, 0)
+
+
+def nmea_command(cmd: str) -> bytes:
+    """Frame a '$...' command with its checksum and CRLF, ready to write to the receiver"""
+    data = cmd.encode('ascii')
+    return b'%s*%02X\r\n' % (data, nmea_checksum(data[1:]))
+
+
+# Immutable fix snapshot; the reader thread publishes a new one by rebinding a single attribute
+Fix = namedtuple('Fix', [
+    'lat', 'lon', 'speed_knots', 'timestamp', 'valid', 'updated_at',
+    'altitude', 'satellites', 'hdop', 'fix_type', 'pdop', 'vdop',
+], defaults=[None, None, 0.0, None, False, 0.0, None, 0, None, 1, None, None])
+
 class GPSReader(threading.Thread):
     def __init__(self, device: str, baud: int, simulate: bool = False):
         super().__init__(daemon=True)
@@ -137,16 +240,19 @@ class GPSReader(threading.Thread):
         self.baud = baud
         self.simulate = simulate
         self._stop_event = threading.Event()
-        self._lock = threading.Lock()
-        self._last_fix = {
-            'lat': None,
-            'lon': None,
-            'speed_knots': 0.0,
-            'timestamp': None,
-            'valid': False,
-            'updated_at': 0.0,
-        }
+        # Only the reader thread assigns this; readers take it without a lock
+        self._fix_snapshot = Fix()
+        # (fix, stale, body) of the last serialized /location response
+        self._location_cache = (None, False, b'')
         self._ser = None
+        self._buf = bytearray()  # Received bytes not yet split into lines
+        # Queues that receive every raw sentence (for the raw NMEA window); replaced, never mutated,
+        # under _raw_lock so the reader thread can iterate without taking it
+        self._raw_subscribers = []
+        self._raw_lock = threading.Lock()
+        # Bytes to write to the receiver; the reader thread owns the port, send_nmea() wakes it via a pipe
+        self._outbox = queue.SimpleQueue()
+        self._wake_w = None
 
     def open_serial(self):
         if self.simulate:
@@ -169,49 +275,166 @@ class GPSReader(threading.Thread):
             sys.stderr.write(str(e) + '\n')
             return
 
+        wake_r, self._wake_w = os.pipe()
+        os.set_blocking(wake_r, False)
         with self._ser as ser:
+            fd = ser.fileno()
+            buf = self._buf
             while not self._stop_event.is_set():
+                # One read drains every sentence the UART has buffered
                 try:
-                    line = ser.readline().decode(errors='ignore').strip()
+                    r, _, _ = select.select([fd, wake_r], [], [], 1.0)
+                    if wake_r in r:
+                        self._drain_outbox(ser, wake_r)
+                    if fd not in r:
+                        continue
+                    chunk = os.read(fd, 4096)
+                except BlockingIOError:
+                    continue
                 except Exception:
-                    line = ''
-                if not line:
+                    time.sleep(0.1)
                     continue
-                parsed = parse_rmc(line)
-                if parsed:
-                    lat, lon, speed_knots, ts, valid = parsed
-                    with self._lock:
-                        if lat is not None and lon is not None:
-                            self._last_fix['lat'] = lat
-                            self._last_fix['lon'] = lon
-                        self._last_fix['speed_knots'] = speed_knots
-                        self._last_fix['timestamp'] = ts
-                        self._last_fix['valid'] = bool(valid and lat is not None and lon is not None)
-                        self._last_fix['updated_at'] = time.time()
+                if not chunk:
+                    continue
+                buf += chunk
+                raw_subs = self._raw_subscribers
+                start = 0
+                while True:
+                    nl = buf.find(b'\n', start)
+                    if nl < 0:
+                        break
+                    line = bytes(buf[start:nl]).strip()
+                    self._handle_line(line)
+                    for q in raw_subs:
+                        try:
+                            q.put_nowait(line)
+                        except queue.Full:
+                            pass  # Slow viewer: drop rather than stall the reader
+                    start = nl + 1
+                # Keep the trailing partial sentence for the next read
+                del buf[:start]
+        wake_w, self._wake_w = self._wake_w, None
+        os.close(wake_w)
+        os.close(wake_r)
+
+    def _drain_outbox(self, ser, wake_r):
+        try:
+            os.read(wake_r, 512)
+        except BlockingIOError:
+            pass
+        while True:
+            try:
+                data = self._outbox.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                ser.write(data)
+            except Exception as e:
+                sys.stderr.write(f'Failed to write to {self.device}: {e}\n')
+
+    def send_nmea(self, data: bytes):
+        """Queue bytes (e.g. from nmea_command) for the receiver on the port this reader already has open"""
+        self._outbox.put(data)
+        wake_w = self._wake_w
+        if wake_w is not None:
+            try:
+                os.write(wake_w, b'\0')
+            except OSError:
+                pass
+
+    def _handle_line(self, raw: bytes):
+        entry = NMEA_DISPATCH.get(raw[:6])
+        if entry is None:
+            return
+        kind, parse_body = entry
+        parsed = parse_body(raw.decode(errors='ignore'))
+        if not parsed:
+            return
+        fix = self._fix_snapshot
+        if kind == 'rmc':
+            lat, lon, speed_knots, ts, valid = parsed
+            if lat is None or lon is None:
+                lat, lon = fix.lat, fix.lon
+                valid = False
+            self._fix_snapshot = fix._replace(
+                lat=lat,
+                lon=lon,
+                speed_knots=speed_knots,
+                timestamp=ts,
+                valid=bool(valid),
+                updated_at=time.time(),
+            )
+        elif kind == 'gga':
+            self._fix_snapshot = fix._replace(
+                altitude=parsed['altitude'],
+                satellites=parsed['satellites'],
+                hdop=parsed['hdop'],
+            )
+        else:
+            self._fix_snapshot = fix._replace(
+                fix_type=parsed['fix_type'],
+                pdop=parsed['pdop'],
+                vdop=parsed['vdop'],
+            )
 
     def _run_simulation(self):
         # Montreal, Canada coordinates
         lat0, lon0 = 45.5017, -73.5673
-        t0 = time.time()
+        # Circle around the start point: advance a unit phasor by a fixed rotation each tick
+        dt = 1.0
+        omega = 1.0 / 10.0
+        rot = complex(math.cos(omega * dt), math.sin(omega * dt))
+        z = complex(1.0, 0.0)
         while not self._stop_event.is_set():
-            t = time.time() - t0
-            lat = lat0 + 0.0005 * math.sin(t / 10.0)
-            lon = lon0 + 0.0005 * math.cos(t / 10.0)
-            with self._lock:
-                self._last_fix['lat'] = lat
-                self._last_fix['lon'] = lon
-                self._last_fix['speed_knots'] = 0.5
-                self._last_fix['timestamp'] = time.strftime('%H%M%S', time.gmtime())
-                self._last_fix['valid'] = True
-                self._last_fix['updated_at'] = time.time()
-            time.sleep(1.0)
+            lat = lat0 + 0.0005 * z.imag
+            lon = lon0 + 0.0005 * z.real
+            self._fix_snapshot = self._fix_snapshot._replace(
+                lat=lat,
+                lon=lon,
+                speed_knots=0.5,
+                timestamp=time.strftime('%H%M%S', time.gmtime()),
+                valid=True,
+                updated_at=time.time(),
+            )
+            z *= rot
+            time.sleep(dt)
 
     def stop(self):
         self._stop_event.set()
 
+    def subscribe_raw(self, maxsize: int = 1000) -> 'queue.Queue':
+        """Return a queue receiving every raw sentence read from the port (bytes, stripped)"""
+        q = queue.Queue(maxsize=maxsize)
+        with self._raw_lock:
+            self._raw_subscribers = self._raw_subscribers + [q]
+        return q
+
+    def unsubscribe_raw(self, q: 'queue.Queue'):
+        with self._raw_lock:
+            self._raw_subscribers = [s for s in self._raw_subscribers if s is not q]
+
     def get_fix(self):
-        with self._lock:
-            return dict(self._last_fix)
+        return self._fix_snapshot._asdict()
+
+    def location_json(self) -> bytes:
+        """Return the /location response body, serialized once per fix (and staleness change)"""
+        fix = self._fix_snapshot
+        stale = (time.time() - (fix.updated_at or 0)) > 10
+        cached_fix, cached_stale, body = self._location_cache
+        if cached_fix is fix and cached_stale == stale:
+            return body
+        speed_knots = fix.speed_knots or 0.0
+        body = _dumps_bytes({
+            'lat': fix.lat,
+            'lon': fix.lon,
+            'speed_knots': speed_knots,
+            'speed_kmh': speed_knots * 1.852,
+            'timestamp': fix.timestamp,
+            'valid': bool(fix.valid and not stale and fix.lat is not None and fix.lon is not None),
+            'updated_at': fix.updated_at or 0.0,
+        })
+        self._location_cache = (fix, stale, body)
+        return body
 
 HTML_PAGE = """<!doctype html>
 <html lang="en">
@@ -529,17 +752,20 @@ SELECTION_HTML_PAGE = """<!doctype html>
       } catch(e) {}
     }
 
-    async function downloadArea() {
+    async function downloadArea(force) {
       if (!bbox) { setStatus('Draw a rectangle first', true); return; }
       const zs = Array.from(document.querySelectorAll('.z:checked')).map(x => parseInt(x.value,10));
       if (zs.length === 0) { setStatus('Select at least one zoom', true); return; }
       setStatus('Downloading tiles...');
       try {
-        const r = await fetch('/api/download_tiles', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ bbox: bbox, zooms: zs, name: document.getElementById('areaName').value.trim() }) });
+        const r = await fetch('/api/download_tiles', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ bbox: bbox, zooms: zs, name: document.getElementById('areaName').value.trim(), force: !!force }) });
         const j = await r.json();
         if (r.ok) {
           setStatus(`Done. Total tiles: ${j.total}, downloaded: ${j.downloaded}`, false);
           listAreas();
+        } else if (j.over_budget && !force) {
+          if (confirm(j.error + '. Download anyway?')) return downloadArea(true);
+          setStatus('Download cancelled: ' + j.error, true);
         } else {
           setStatus('Download failed: ' + (j.error||r.status), true);
         }
@@ -579,7 +805,13 @@ SELECTION_HTML_PAGE = """<!doctype html>
 
 # Module helpers for selection page and APIs
 
+# Set once every Leaflet asset is on disk, so later /select requests skip the checks
+_static_assets_ready = False
+
 def ensure_static_assets():
+    global _static_assets_ready
+    if _static_assets_ready:
+        return
     try:
         static_leaflet = os.path.join(os.getcwd(), 'static', 'leaflet')
         static_draw = os.path.join(os.getcwd(), 'static', 'leaflet-draw')
@@ -591,1510 +823,2496 @@ def ensure_static_assets():
             (os.path.join(static_draw, 'leaflet.draw.js'), 'https://unpkg.com/leaflet-draw@1.0.4/dist/leaflet.draw.js'),
             (os.path.join(static_draw, 'leaflet.draw.css'), 'https://unpkg.com/leaflet-draw@1.0.4/dist/leaflet.draw.css'),
         ]
-        for path, url in files:
-            if not os.path.exists(path):
-                if not REQUESTS_AVAILABLE:
-                    continue
-                r = requests.get(url, timeout=20)
-                if r.status_code == 200:
-                    with open(path, 'wb') as f:
-                        f.write(r.content)
+        missing = [(path, url) for path, url in files if not os.path.exists(path)]
+        if missing and REQUESTS_AVAILABLE:
+            # Fetch concurrently over one pooled connection to unpkg
+            with requests.Session() as session:
+                def fetch(path_url):
+                    path, url = path_url
+                    try:
+                        r = session.get(url, timeout=20)
+                        if r.status_code == 200:
+                            with open(path, 'wb') as f:
+                                f.write(r.content)
+                    except Exception:
+                        pass
+                with ThreadPoolExecutor(max_workers=4) as ex:
+                    list(ex.map(fetch, missing))
+        _static_assets_ready = all(os.path.exists(path) for path, _ in files)
     except Exception:
         pass
 
 
+# Successful Nominatim lookups, kept in memory and in tiles/ so repeat (and offline) queries skip the network
+GEOCODE_CACHE_FILE = os.path.join(os.getcwd(), 'tiles', 'geocode_cache.json')
+GEOCODE_CACHE_SIZE = 1024
+GEOCODE_CACHE_TTL = 30 * 86400  # Older entries are refreshed, but still used if the lookup fails
+_geocode_cache = None
+_geocode_lock = threading.Lock()
+
+
+_http = None
+_http_lock = threading.Lock()
+
+
+def _http_session():
+    """Shared keep-alive session for geocoding/IP lookups, so repeat calls skip the TLS handshake"""
+    global _http
+    with _http_lock:
+        if _http is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': 'GPS-Assistant/1.0'})  # Required by Nominatim
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8,
+                                  max_retries=Retry(total=2, backoff_factor=0.3))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http = session
+        return _http
+
+
+def _geocode_cache_load():
+    global _geocode_cache
+    if _geocode_cache is None:
+        try:
+            with open(GEOCODE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            _geocode_cache = data if isinstance(data, dict) else {}
+        except Exception:
+            _geocode_cache = {}
+    return _geocode_cache
+
+
+def _geocode_cache_store(key: str, result: dict):
+    with _geocode_lock:
+        cache = _geocode_cache_load()
+        cache.pop(key, None)
+        cache[key] = result
+        while len(cache) > GEOCODE_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        try:
+            os.makedirs(os.path.dirname(GEOCODE_CACHE_FILE), exist_ok=True)
+            tmp = GEOCODE_CACHE_FILE + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, GEOCODE_CACHE_FILE)
+        except Exception:
+            pass
+
+
 def geocode_city(city: str):
-    if not REQUESTS_AVAILABLE:
+    key = ' '.join(city.split()).casefold()
+    if not key:
         return None
+    with _geocode_lock:
+        hit = _geocode_cache_load().get(key)
+    stale = None
+    if hit is not None:
+        res = {k: hit[k] for k in ('lat', 'lon', 'display') if k in hit}
+        if time.time() - hit.get('ts', 0) < GEOCODE_CACHE_TTL:
+            return res
+        stale = res
+    if not REQUESTS_AVAILABLE:
+        return stale
     try:
         url = "https://nominatim.openstreetmap.org/search"
         params = { 'q': city, 'format': 'json', 'limit': 1, 'addressdetails': 1 }
-        headers = { 'User-Agent': 'GPS-Assistant/1.0' }
-        r = requests.get(url, params=params, headers=headers, timeout=10)
+        r = _http_session().get(url, params=params, timeout=10)
         j = r.json()
         if j:
-            return { 'lat': float(j[0]['lat']), 'lon': float(j[0]['lon']), 'display': j[0].get('display_name', city) }
-        return None
+            res = { 'lat': float(j[0]['lat']), 'lon': float(j[0]['lon']), 'display': j[0].get('display_name', city) }
+            _geocode_cache_store(key, dict(res, ts=int(time.time())))
+            return res
+        return stale
     except Exception:
-        return None
+        return stale
+
+
+# OSM tile servers: at most two concurrent connections, requests spaced at least this far apart
+TILE_MAX_CONNECTIONS = 2
+TILE_MIN_INTERVAL = 0.05
+try:
+    TILE_WORKERS = max(1, int(os.environ.get('EXPLORER_TILE_WORKERS', '4')))
+except ValueError:
+    TILE_WORKERS = 4
+# Throttled (429) or server-error responses are retried with doubling backoff, capped
+TILE_RETRIES = 3
+TILE_BACKOFF = 0.5
+TILE_BACKOFF_MAX = 8.0
+TILE_BACKOFF_JITTER = 0.1  # Random extra delay so retrying workers don't fire in lockstep
+_TILE_RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+# Downloads estimated above this many bytes need confirmation; size guess when the index has none
+try:
+    TILE_BUDGET_BYTES = int(float(os.environ.get('EXPLORER_TILE_BUDGET_MB', '500')) * 1024 * 1024)
+except ValueError:
+    TILE_BUDGET_BYTES = 500 * 1024 * 1024
+TILE_EST_SIZE = 20000
+TILE_FAILED_RETRY_AFTER = 7 * 86400  # Tiles the server had no data for are asked again after this
+
+
+class TileBudgetExceeded(RuntimeError):
+    """An unconfirmed download is estimated above TILE_BUDGET_BYTES"""
+
+
+class _RateLimiter:
+    """Space calls to wait() at least `interval` seconds apart across threads"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, delay: float):
+        """Hold every later wait() until `delay` seconds from now (e.g. after a 429)"""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + delay)
+
+
+def _tile_backoff(attempt: int) -> float:
+    """Capped exponential backoff with jitter for retry `attempt` (0-based)"""
+    return min(TILE_BACKOFF * (1 << attempt), TILE_BACKOFF_MAX) + random.random() * TILE_BACKOFF_JITTER
+
 
+_INV_PI = 1.0 / math.pi
+_INV_360 = 1.0 / 360.0
 
-def download_tiles_bbox(bbox, zoom_levels):
-    """Download tiles for a bbox [minLon, minLat, maxLon, maxLat]. Returns (total, downloaded)."""
+
+def deg2num(lat_deg, lon_deg, zoom):
+    lat_rad = math.radians(lat_deg)
+    n = 1 << int(zoom)  # Exact power of two; zooms may arrive as JSON floats
+    xtile = int((lon_deg + 180.0) * _INV_360 * n)
+    ytile = int((1.0 - math.asinh(math.tan(lat_rad)) * _INV_PI) * 0.5 * n)
+    return (xtile, ytile)
+
+
+def deg2num_np(lat, lon, z):
+    """Vectorized deg2num over arrays of coordinates and/or zoom levels"""
+    lat_rad = np.radians(lat)
+    n = 2.0 ** np.asarray(z, dtype=np.float64)
+    x = ((lon + 180.0) * _INV_360 * n).astype(np.int64)
+    y = ((1.0 - np.arcsinh(np.tan(lat_rad)) * _INV_PI) * 0.5 * n).astype(np.int64)
+    return x, y
+
+
+def _tile_ranges(bbox, zoom_levels):
+    """Return [(z, x_min, x_max, y_min, y_max)] covering bbox [minLon, minLat, maxLon, maxLat]"""
+    minLon, minLat, maxLon, maxLat = bbox
+    zooms = list(zoom_levels)
+    if NUMPY_AVAILABLE:
+        # Both corners for every zoom level in one pass
+        xa, ya = deg2num_np(maxLat, minLon, zooms)
+        xb, yb = deg2num_np(minLat, maxLon, zooms)
+        return list(zip(zooms,
+                        np.minimum(xa, xb).tolist(), np.maximum(xa, xb).tolist(),
+                        np.minimum(ya, yb).tolist(), np.maximum(ya, yb).tolist()))
+    ranges = []
+    for z in zooms:
+        xa, ya = deg2num(maxLat, minLon, z)
+        xb, yb = deg2num(minLat, maxLon, z)
+        ranges.append((z, min(xa, xb), max(xa, xb), min(ya, yb), max(ya, yb)))
+    return ranges
+
+
+def _missing_ys(y_min, y_max, have):
+    """Rows y_min..y_max (inclusive) that are not in the ints `have`"""
+    if NUMPY_AVAILABLE:
+        return np.setdiff1d(np.arange(y_min, y_max + 1), np.asarray(have, dtype=np.int64)).tolist()
+    have = set(have)
+    return [y for y in range(y_min, y_max + 1) if y not in have]
+
+
+_TILE_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+
+def _write_tile(path, data):
+    """Write a tile with bare os.open/os.write: no buffered file object for a single write"""
+    fd = os.open(path, _TILE_OPEN_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+class _TileResults:
+    """Outcome of one download pass, stored in the tile index when it ends"""
+
+    def __init__(self):
+        self.written = []  # (z, x, y, size, etag)
+        self.checked = []  # (z, x, y) answered 304 Not Modified
+        self.failed = []   # (z, x, y) the server has no tile for
+
+
+def _estimate_tile_bytes(jobs):
+    """Expected download size of the jobs, from the mean size of indexed tiles at each zoom"""
+    try:
+        means = tile_index_mean_sizes()
+    except (sqlite3.Error, OSError):
+        means = {}
+    fallback = sum(means.values()) / len(means) if means else TILE_EST_SIZE
+    per_zoom = {}
+    for _url, _path, (z, _x, _y), _etag in jobs:
+        per_zoom[z] = per_zoom.get(z, 0) + 1
+    return int(sum(n * means.get(z, fallback) for z, n in per_zoom.items()))
+
+
+def download_tiles_bbox(bbox, zoom_levels, progress=None, progress_every=25, revalidate=False,
+                        cancel=None, confirm=None):
+    """Download tiles for a bbox [minLon, minLat, maxLon, maxLat]. Returns (total, downloaded).
+
+    progress(downloaded) is called from the calling thread every `progress_every` new tiles.
+    Tiles already on disk are skipped unless `revalidate`, which re-requests them with
+    If-None-Match. Tiles the server had no data for are retried after TILE_FAILED_RETRY_AFTER.
+    Setting the `cancel` threading.Event skips every tile not yet requested.
+    Above TILE_BUDGET_BYTES (estimated), confirm(count, est_bytes) must return True to go ahead;
+    without `confirm` such a download raises TileBudgetExceeded.
+    """
     if not REQUESTS_AVAILABLE:
         raise RuntimeError('requests not available')
-    import math, time as _time
-    def deg2num(lat_deg, lon_deg, zoom):
-        lat_rad = math.radians(lat_deg)
-        n = 2.0 ** zoom
-        xtile = int((lon_deg + 180.0) / 360.0 * n)
-        ytile = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
-        return (xtile, ytile)
-    minLon, minLat, maxLon, maxLat = bbox
     tiles_root = os.path.join(os.getcwd(), 'tiles')
     os.makedirs(tiles_root, exist_ok=True)
     headers = {'User-Agent': 'L76X-Offgrid-Importer/1.0'}
     total = 0
-    downloaded = 0
-    for z in zoom_levels:
-        x_min, y_max = deg2num(maxLat, minLon, z)
-        x_max, y_min = deg2num(minLat, maxLon, z)
-        for x in range(min(x_min, x_max), max(x_min, x_max) + 1):
-            for y in range(min(y_min, y_max), max(y_min, y_max) + 1):
-                total += 1
-                out_dir = os.path.join(tiles_root, str(z), str(x))
+
+    # Collect the missing tiles first, then fetch them concurrently
+    jobs = []
+    failed_since = time.time() - TILE_FAILED_RETRY_AFTER
+    for z, x_min, x_max, y_min, y_max in _tile_ranges(bbox, zoom_levels):
+        total += (x_max - x_min + 1) * (y_max - y_min + 1)
+        try:
+            etags, empty, failed = tile_index_area(z, x_min, x_max, y_min, y_max, failed_since)
+        except (sqlite3.Error, OSError):
+            etags, empty, failed = {}, set(), set()
+        for x in range(x_min, x_max + 1):
+            out_dir = os.path.join(tiles_root, str(z), str(x))
+            # One directory listing per column instead of a stat() per tile; the column
+            # directory is only created when it doesn't exist yet, never by the fetch workers
+            try:
+                with os.scandir(out_dir) as it:
+                    have = [int(e.name[:-4]) for e in it if e.name.endswith('.png') and e.name[:-4].isdigit()]
+            except FileNotFoundError:
                 os.makedirs(out_dir, exist_ok=True)
-                out_path = os.path.join(out_dir, f"{y}.png")
-                if os.path.exists(out_path):
-                    continue
-                url = f"https://tile.openstreetmap.org/{z}/{x}/{y}.png"
-                try:
-                    r = requests.get(url, headers=headers, timeout=15)
-                    if r.status_code == 200:
-                        with open(out_path, 'wb') as f:
-                            f.write(r.content)
-                        downloaded += 1
-                    else:
-                        with open(out_path, 'wb') as f:
-                            f.write(b'')
-                except Exception:
-                    _time.sleep(0.2)
-                    continue
-                _time.sleep(0.05)
+                have = []
+            if empty:
+                # 0-byte placeholders from earlier versions are not tiles
+                have = [y for y in have if (x, y) not in empty]
+            skip = have + [y for fx, y in failed if fx == x] if failed else have
+            url_base = f"https://tile.openstreetmap.org/{z}/{x}/"
+            jobs.extend((f"{url_base}{y}.png", os.path.join(out_dir, f"{y}.png"), (z, x, y), None)
+                        for y in _missing_ys(y_min, y_max, skip))
+            if revalidate:
+                jobs.extend((f"{url_base}{y}.png", os.path.join(out_dir, f"{y}.png"), (z, x, y), etags.get((x, y)))
+                            for y in have if y_min <= y <= y_max)
+
+    est_bytes = _estimate_tile_bytes(jobs)
+    if est_bytes > TILE_BUDGET_BYTES:
+        if confirm is None:
+            raise TileBudgetExceeded(f'{len(jobs)} tiles (~{est_bytes / 1048576:.0f} MB) exceed the '
+                                     f'{TILE_BUDGET_BYTES / 1048576:.0f} MB download budget')
+        if not confirm(len(jobs), est_bytes):
+            return total, 0
+
+    results = _TileResults()
+    if AIOHTTP_AVAILABLE:
+        try:
+            downloaded = asyncio.run(_fetch_tiles_async(jobs, headers, progress, progress_every, results,
+                                                        cancel))
+        finally:
+            tile_index_record(results)
+        return total, downloaded
+
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(TILE_WORKERS, TILE_MAX_CONNECTIONS))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    slots = threading.Semaphore(TILE_MAX_CONNECTIONS)
+    limiter = _RateLimiter(TILE_MIN_INTERVAL)
+
+    def fetch(job) -> bool:
+        url, out_path, key, etag = job
+        req_headers = {'If-None-Match': etag} if etag else None
+        for attempt in range(TILE_RETRIES + 1):
+            if cancel is not None and cancel.is_set():
+                return False
+            delay = _tile_backoff(attempt)
+            try:
+                with slots:
+                    limiter.wait()
+                    r = session.get(url, headers=req_headers, timeout=15)
+            except Exception:
+                time.sleep(delay)
+                continue
+            if r.status_code == 200:
+                _write_tile(out_path, r.content)
+                results.written.append((*key, len(r.content), r.headers.get('ETag')))
+                return True
+            if r.status_code == 304:
+                results.checked.append(key)
+                return False
+            if r.status_code in _TILE_RETRY_STATUS:
+                retry_after = r.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = min(float(retry_after), TILE_BACKOFF_MAX)
+                if r.status_code == 429:
+                    limiter.pause(delay)  # Throttled: every worker waits, not just this one
+                else:
+                    time.sleep(delay)
+                continue
+            # Permanent miss (e.g. 404): noted in the index rather than left as an empty file
+            results.failed.append(key)
+            return False
+        return False
+
+    try:
+        with ThreadPoolExecutor(max_workers=TILE_WORKERS) as ex:
+            downloaded = 0
+            for ok in ex.map(fetch, jobs):
+                if ok:
+                    downloaded += 1
+                    if progress is not None and downloaded % progress_every == 0:
+                        progress(downloaded)
+    finally:
+        session.close()
+        tile_index_record(results)
     return total, downloaded
 
+
+async def _fetch_tiles_async(jobs, headers, progress=None, progress_every=25, results=None, cancel=None):
+    """Fetch (url, out_path, (z, x, y), etag) jobs on one event loop with the same limits as the threaded path.
+
+    A 429 pauses every request until the backoff has elapsed. Returns the number of tiles written;
+    what happened to each job is appended to `results` (a _TileResults).
+    """
+    if results is None:
+        results = _TileResults()
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(TILE_MAX_CONNECTIONS)
+    resume = asyncio.Event()
+    resume.set()
+    next_at = [0.0]
+
+    async def space():
+        # Single-threaded loop: no lock needed to reserve the next send slot
+        now = loop.time()
+        delay = next_at[0] - now
+        next_at[0] = max(now, next_at[0]) + TILE_MIN_INTERVAL
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def pause(delay):
+        if resume.is_set():
+            resume.clear()
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                resume.set()
+        else:
+            await resume.wait()
+
+    async def fetch(session, url, out_path, key, etag) -> bool:
+        req_headers = {'If-None-Match': etag} if etag else None
+        for attempt in range(TILE_RETRIES + 1):
+            if cancel is not None and cancel.is_set():
+                return False
+            delay = _tile_backoff(attempt)
+            try:
+                await resume.wait()
+                async with slots:
+                    await space()
+                    async with session.get(url, headers=req_headers) as r:
+                        status = r.status
+                        retry_after = r.headers.get('Retry-After', '')
+                        new_etag = r.headers.get('ETag')
+                        data = await r.read() if status == 200 else b''
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                await asyncio.sleep(delay)
+                continue
+            if status == 200:
+                _write_tile(out_path, data)
+                results.written.append((*key, len(data), new_etag))
+                return True
+            if status == 304:
+                results.checked.append(key)
+                return False
+            if status in _TILE_RETRY_STATUS:
+                if retry_after.isdigit():
+                    delay = min(float(retry_after), TILE_BACKOFF_MAX)
+                if status == 429:
+                    await pause(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+            # Permanent miss (e.g. 404): noted in the index rather than left as an empty file
+            results.failed.append(key)
+            return False
+        return False
+
+    connector = aiohttp.TCPConnector(limit=TILE_MAX_CONNECTIONS)
+    timeout = aiohttp.ClientTimeout(total=15)
+    downloaded = 0
+    async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+        for done in asyncio.as_completed([fetch(session, *job) for job in jobs]):
+            if await done:
+                downloaded += 1
+                if progress is not None and downloaded % progress_every == 0:
+                    progress(downloaded)
+    return downloaded
+
+
+# Every tile on disk (z, x, y, size, etag, checked_at) plus tiles the server had no data for,
+# so the offline panel's stats don't walk the tree and re-imports know what to fetch
+TILE_INDEX_FILE = os.path.join(os.getcwd(), 'tiles', 'index.sqlite')
+# setup_offline_tiles.py adds the tiles it downloads; bump its TILE_INDEX_VERSION along with this
+_TILE_INDEX_VERSION = 2
+_tile_index_lock = threading.Lock()
+
+
+def _scan_tiles(tiles_root):
+    """Yield (z, x, y, size) for every tiles/z/x/y.png; scandir's d_type avoids a stat per entry"""
+    with os.scandir(tiles_root) as zs:
+        for ze in zs:
+            if not (ze.name.isdigit() and ze.is_dir()):
+                continue
+            with os.scandir(ze.path) as xs:
+                for xe in xs:
+                    if not (xe.name.isdigit() and xe.is_dir()):
+                        continue
+                    with os.scandir(xe.path) as ys:
+                        for ye in ys:
+                            y = ye.name[:-4]
+                            if ye.name.endswith('.png') and y.isdigit() and ye.is_file():
+                                yield int(ze.name), int(xe.name), int(y), ye.stat().st_size
+
+
+def _tile_index_connect():
+    """Open the tile index, rebuilding it from a scan of tiles/ when it is new or has an older schema"""
+    os.makedirs(os.path.dirname(TILE_INDEX_FILE), exist_ok=True)
+    con = sqlite3.connect(TILE_INDEX_FILE, timeout=10)
+    try:
+        if con.execute('PRAGMA user_version').fetchone()[0] != _TILE_INDEX_VERSION:
+            with con:
+                con.execute('DROP TABLE IF EXISTS tiles')
+                con.execute('DROP TABLE IF EXISTS failed')
+                con.execute('CREATE TABLE tiles (z INTEGER, x INTEGER, y INTEGER, size INTEGER, '
+                            'etag TEXT, checked_at REAL, PRIMARY KEY (z, x, y))')
+                con.execute('CREATE TABLE failed (z INTEGER, x INTEGER, y INTEGER, '
+                            'failed_at REAL, PRIMARY KEY (z, x, y))')
+                con.executemany('INSERT OR REPLACE INTO tiles (z, x, y, size) VALUES (?, ?, ?, ?)',
+                                _scan_tiles(os.path.dirname(TILE_INDEX_FILE)))
+                con.execute(f'PRAGMA user_version = {_TILE_INDEX_VERSION}')
+    except Exception:
+        con.close()
+        raise
+    return con
+
+
+def tile_index_record(results):
+    """Store a download pass: written tiles, 304 revalidations and tiles the server doesn't have"""
+    if not (results.written or results.checked or results.failed):
+        return
+    now = time.time()
+    try:
+        with _tile_index_lock:
+            con = _tile_index_connect()
+            try:
+                with con:
+                    con.executemany('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?)',
+                                    [(*row, now) for row in results.written])
+                    con.executemany('DELETE FROM failed WHERE z = ? AND x = ? AND y = ?',
+                                    [row[:3] for row in results.written])
+                    con.executemany('UPDATE tiles SET checked_at = ? WHERE z = ? AND x = ? AND y = ?',
+                                    [(now, *key) for key in results.checked])
+                    con.executemany('INSERT OR REPLACE INTO failed VALUES (?, ?, ?, ?)',
+                                    [(*key, now) for key in results.failed])
+            finally:
+                con.close()
+    except (sqlite3.Error, OSError):
+        pass  # The index is rebuilt from disk when missing; stats fall back to a scan
+
+
+def tile_index_area(z, x_min, x_max, y_min, y_max, failed_since):
+    """Index state of a tile range at zoom z.
+
+    Returns ({(x, y): etag}, {(x, y) of 0-byte files}, {(x, y) the server had no data for since failed_since}).
+    """
+    if not os.path.isdir(os.path.dirname(TILE_INDEX_FILE)):
+        return {}, set(), set()
+    area = (z, x_min, x_max, y_min, y_max)
+    where = 'z = ? AND x BETWEEN ? AND ? AND y BETWEEN ? AND ?'
+    etags = {}
+    empty = set()
+    with _tile_index_lock:
+        con = _tile_index_connect()
+        try:
+            for x, y, size, etag in con.execute(f'SELECT x, y, size, etag FROM tiles WHERE {where}', area):
+                if size == 0:
+                    empty.add((x, y))
+                elif etag:
+                    etags[x, y] = etag
+            failed = set(con.execute(f'SELECT x, y FROM failed WHERE {where} AND failed_at >= ?',
+                                     (*area, failed_since)))
+        finally:
+            con.close()
+    return etags, empty, failed
+
+
+def tile_index_mean_sizes():
+    """Return {zoom: mean size in bytes} of the non-empty tiles in the index"""
+    if not os.path.isdir(os.path.dirname(TILE_INDEX_FILE)):
+        return {}
+    with _tile_index_lock:
+        con = _tile_index_connect()
+        try:
+            return dict(con.execute('SELECT z, AVG(size) FROM tiles WHERE size > 0 GROUP BY z'))
+        finally:
+            con.close()
+
+
+def tile_index_stats():
+    """Return {'size', 'count', 'zooms'} from the tile index"""
+    if not os.path.isdir(os.path.dirname(TILE_INDEX_FILE)):
+        return {'size': 0, 'count': 0, 'zooms': set()}
+    with _tile_index_lock:
+        con = _tile_index_connect()
+        try:
+            count, size = con.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tiles').fetchone()
+            zooms = {z for (z,) in con.execute('SELECT DISTINCT z FROM tiles')}
+        finally:
+            con.close()
+    return {'size': size, 'count': count, 'zooms': zooms}
+
 # Saved areas management
 AREAS_FILE = os.path.join(os.getcwd(), 'tiles', 'saved_areas.json')
 
+# ((st_mtime_ns, st_size), areas) of the last parse of AREAS_FILE
+_areas_cache = (None, [])
+
 def _load_areas():
     """Load saved areas from JSON, accepting both list and {areas:[...]} formats."""
+    global _areas_cache
     try:
-        if os.path.exists(AREAS_FILE):
+        st = os.stat(AREAS_FILE)
+        key = (st.st_mtime_ns, st.st_size)
+        cached_key, areas = _areas_cache
+        if cached_key != key:
+            # Only re-parse when the file has changed since the last load
+            areas = []
             with open(AREAS_FILE, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 if isinstance(data, list):
-                    return data
-                if isinstance(data, dict) and isinstance(data.get('areas'), list):
-                    return data.get('areas')
+                    areas = data
+                elif isinstance(data, dict) and isinstance(data.get('areas'), list):
+                    areas = data.get('areas')
+            _areas_cache = (key, areas)
+        # Callers edit the entries in place before saving; keep the cache untouched
+        return [dict(a) if isinstance(a, dict) else a for a in areas]
     except Exception:
         pass
     return []
 
+# Import records, one JSON object per line; appended by a background writer off the request path
+MANIFEST_FILE = os.path.join(os.getcwd(), 'tiles', 'manifest.log')
+_manifest_q = queue.Queue()
+_manifest_thread = None
+_manifest_lock = threading.Lock()
+# Long-lived append handle, shared by the writer thread and manifest_close()
+_manifest_fh = None
+_manifest_fh_lock = threading.Lock()
+
+
+def _manifest_file():
+    """Append handle on MANIFEST_FILE, reopened if the file has been deleted (e.g. with ./tiles)"""
+    global _manifest_fh
+    fh = _manifest_fh
+    if fh is not None:
+        try:
+            if os.fstat(fh.fileno()).st_nlink > 0:
+                return fh
+        except OSError:
+            pass
+        fh.close()
+        _manifest_fh = None
+    os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+    _manifest_fh = fh = open(MANIFEST_FILE, 'ab')
+    return fh
+
+
+def _manifest_writer():
+    while True:
+        lines = [_manifest_q.get()]
+        # Everything queued meanwhile goes out in the same write
+        while True:
+            try:
+                lines.append(_manifest_q.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with _manifest_fh_lock:
+                fh = _manifest_file()
+                fh.write(b''.join(lines))
+                fh.flush()
+        except Exception:
+            pass
+        finally:
+            for _ in lines:
+                _manifest_q.task_done()
+
+
+def manifest_append(rec: dict):
+    """Queue one record for tiles/manifest.log and return immediately"""
+    global _manifest_thread
+    with _manifest_lock:
+        if _manifest_thread is None:
+            _manifest_thread = threading.Thread(target=_manifest_writer, name='manifest', daemon=True)
+            _manifest_thread.start()
+            atexit.register(manifest_close)
+    _manifest_q.put(_dumps_bytes(rec) + b'\n')
+
+
+def manifest_flush():
+    """Block until every queued manifest record is on disk"""
+    _manifest_q.join()
+
+
+def manifest_close():
+    """Write out queued records, fsync and close the manifest handle (at exit, or before deleting tiles/)"""
+    global _manifest_fh
+    manifest_flush()
+    with _manifest_fh_lock:
+        fh, _manifest_fh = _manifest_fh, None
+        if fh is not None:
+            try:
+                os.fsync(fh.fileno())
+            except OSError:
+                pass
+            fh.close()
+
+
+def manifest_tail(n: int = 5):
+    """Return the last n manifest records, reading blocks backwards from the end of the file"""
+    manifest_flush()
+    try:
+        with open(MANIFEST_FILE, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            data = b''
+            # One newline more than needed guarantees the last n lines are whole
+            while pos > 0 and data.count(b'\n') <= n:
+                step = min(4096, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+    except OSError:
+        return []
+    records = []
+    for line in data.splitlines()[-n:]:
+        try:
+            records.append(_loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def _load_areas_by_name():
+    """Saved areas keyed by name, in file order; unnamed entries are kept under placeholder keys."""
+    index = {}
+    for i, a in enumerate(_load_areas()):
+        name = a.get('name') if isinstance(a, dict) else None
+        index[name if name else ('', i)] = a
+    return index
+
 def _save_areas(data):
+    global _areas_cache
+    if isinstance(data, dict):
+        data = list(data.values())
     try:
         os.makedirs(os.path.dirname(AREAS_FILE), exist_ok=True)
-        with open(AREAS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Write to a temp file and rename so a crash never leaves a truncated file
+        tmp = AREAS_FILE + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'), default=str)
+            f.flush()
+            st = os.fstat(f.fileno())
+        os.replace(tmp, AREAS_FILE)
+        # The rename keeps mtime and size, so the next load can reuse what was just written
+        _areas_cache = ((st.st_mtime_ns, st.st_size), [dict(a) if isinstance(a, dict) else a for a in data])
         return True
     except Exception:
         return False
 
+# Directory /tiles/ and /static/ are served from, resolved once like AREAS_FILE
+SERVE_ROOT = os.getcwd()
+_TILES_ROOT = os.path.realpath(os.path.join(SERVE_ROOT, 'tiles'))
+_STATIC_ROOT = os.path.realpath(os.path.join(SERVE_ROOT, 'static'))
+# Written by setup_offline_tiles.py --mbtiles; /tiles/ falls back to it for tiles missing on disk
+MBTILES_FILE = os.path.join(SERVE_ROOT, 'tiles.mbtiles')
+_MBTILES_PATH_RE = re.compile(r'/tiles/(\d+)/(\d+)/(\d+)\.png(?:\?|$)')
+_mbtiles_local = threading.local()
+_MBTILES_MAX_ZOOM = 30
+
+
+def _mbtiles_tile(url_path: str) -> Optional[bytes]:
+    """Tile bytes for a /tiles/z/x/y.png path from MBTILES_FILE, None if absent"""
+    m = _MBTILES_PATH_RE.match(url_path)
+    if m is None or not os.path.isfile(MBTILES_FILE):
+        return None
+    z, x, y = (int(g) for g in m.groups())
+    # Out-of-range paths would overflow SQLite's INTEGER (and 1 << z) rather than just miss
+    if z > _MBTILES_MAX_ZOOM or x >= 1 << z or y >= 1 << z:
+        return None
+    try:
+        # One read-only connection per handler thread; sqlite connections aren't shared across threads
+        con = getattr(_mbtiles_local, 'con', None)
+        if con is None:
+            con = _mbtiles_local.con = sqlite3.connect(f'file:{MBTILES_FILE}?mode=ro', uri=True)
+        row = con.execute('SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?',
+                          (z, x, (1 << z) - 1 - y)).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _get_qs_value(path: str, key: str) -> str:
+    """First non-blank value of `key` in the query string of path (as parse_qs would give it)"""
+    prefix = key + '='
+    for pair in path.partition('?')[2].split('&'):
+        if pair.startswith(prefix) and len(pair) > len(prefix):
+            return urllib.parse.unquote_plus(pair[len(prefix):])
+    return ''
+
+
+@lru_cache(maxsize=4096)
+def _resolve_under(root: str, prefix: str, url_path: str) -> Optional[str]:
+    """Map a request path below `prefix` to a file under `root`; None if it would escape root"""
+    rel = urllib.parse.unquote(url_path.partition('?')[0][len(prefix):])
+    candidate = os.path.realpath(os.path.join(root, rel.lstrip('/')))
+    if candidate != root and not candidate.startswith(root + os.sep):
+        return None
+    return candidate
+
+
+_MIME_MAP = {'.js': 'application/javascript', '.css': 'text/css', '.png': 'image/png'}
+
+# socket.sendfile() falls back to 8 KiB send() calls where os.sendfile is missing (e.g. Windows)
+_HAS_SENDFILE = hasattr(os, 'sendfile')
+_COPY_BUF = 1 << 18
+
+
 class RequestHandler(BaseHTTPRequestHandler):
     server_version = "GPSMap/1.0"
+    # Keep connections open between polls and tile fetches; idle ones are dropped after `timeout`.
+    # Clearly above the pages' 2 s /location poll so a polling connection is reused, yet short,
+    # since each open connection holds a thread and tabs come and go (~6 connections each)
+    protocol_version = "HTTP/1.1"
+    timeout = 5
+
+    def setup(self):
+        super().setup()
+        # Small /location replies should not wait on Nagle's algorithm
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
     def _send_json(self, data: dict, status: int = 200):
-        body = json.dumps(data).encode('utf-8')
-        self.send_response(status)
-        self.send_header('Content-Type', 'application/json; charset=utf-8')
-        self.send_header('Content-Length', str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        self._send_json_bytes(_dumps_bytes(data), status)
+
+    def _send_json_bytes(self, body: bytes, status: int = 200):
+        self._send_raw(status, 'application/json; charset=utf-8', body)
 
     def _send_html(self, html: str, status: int = 200):
-        body = html.encode('utf-8')
-        self.send_response(status)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
-
-    def _send_file(self, file_path: str, mime: str = 'application/octet-stream', status: int = 200):
+        self._send_raw(status, 'text/html; charset=utf-8', html.encode('utf-8'))
+
+    def _send_raw(self, status: int, mime: str, body: bytes):
+        """Send status line, headers and body with a single write"""
+        self._send_canned(_canned_reply(status, mime, body))
+
+    def _send_canned(self, reply):
+        """Send a reply built by _canned_reply; only Date and Connection are set per request"""
+        status, head, tail, body = reply
+        self.log_request(status)
+        connection = _CONNECTION_CLOSE if self.close_connection else _CONNECTION_KEEP_ALIVE
+        self.wfile.write(head + self.date_time_string().encode('latin-1') + tail + connection + body)
+
+    def _send_file(self, file_path: str, mime: str = 'application/octet-stream', status: int = 200,
+                   cache_control: Optional[str] = None):
         try:
             with open(file_path, 'rb') as f:
-                data = f.read()
-            self.send_response(status)
-            self.send_header('Content-Type', mime)
-            self.send_header('Content-Length', str(len(data)))
-            self.end_headers()
-            self.wfile.write(data)
+                st = os.fstat(f.fileno())
+                size = st.st_size
+                etag = f'"{int(st.st_mtime)}-{size}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header('Content-Type', mime)
+                self.send_header('Content-Length', str(size))
+                self.send_header('ETag', etag)
+                # Empty files are failed tile downloads; let those be refetched
+                if cache_control and size:
+                    self.send_header('Cache-Control', cache_control)
+                self.end_headers()
+                # Stream from the page cache (sendfile where available) instead of reading into memory
+                try:
+                    if _HAS_SENDFILE:
+                        sent = self.connection.sendfile(f, 0, size)
+                    else:
+                        sent = self._copy_file(f)
+                except OSError:
+                    sent = -1
+                if sent != size:
+                    # Headers already promised `size` bytes; the only clean way out is to drop the connection
+                    self.close_connection = True
         except FileNotFoundError:
             self._send_json({'error': 'File not found'}, status=404)
         except Exception as e:
             self._send_json({'error': f'Failed to serve file: {e}'}, status=500)
 
+    def _copy_file(self, f) -> int:
+        """Portable fallback for sendfile: large reads so big tiles go out in few syscalls"""
+        sent = 0
+        while chunk := f.read(_COPY_BUF):
+            self.wfile.write(chunk)
+            sent += len(chunk)
+        return sent
+
     def do_GET(self):
-        # Main online map
-        if self.path == '/' or self.path.startswith('/index'):
-            return self._send_html(HTML_PAGE)
-        # Offline map page
-        elif self.path.startswith('/offline'):
-            return self._send_html(OFFLINE_HTML_PAGE)
-        elif self.path.startswith('/select'):
-            try:
-                ensure_static_assets()
-            except Exception:
-                pass
-            return self._send_html(SELECTION_HTML_PAGE)
-        # GPS location API
-        elif self.path.startswith('/location'):
-            gps_reader: GPSReader = getattr(self.server, 'gps_reader', None)
-            if gps_reader is None:
-                return self._send_json({'error': 'GPS reader not available'}, status=503)
-            fix = gps_reader.get_fix()
-            stale = (time.time() - (fix.get('updated_at') or 0)) > 10
-            lat = fix.get('lat')
-            lon = fix.get('lon')
-            speed_knots = fix.get('speed_knots') or 0.0
-            speed_kmh = speed_knots * 1.852
-            data = {
-                'lat': lat,
-                'lon': lon,
-                'speed_knots': speed_knots,
-                'speed_kmh': speed_kmh,
-                'timestamp': fix.get('timestamp'),
-                'valid': bool(fix.get('valid') and not stale and lat is not None and lon is not None),
-                'updated_at': fix.get('updated_at') or 0.0,
-            }
-            return self._send_json(data)
-        # Serve local tiles
-        elif self.path.startswith('/tiles/'):
-            safe_path = self.path.replace('..', '')
-            local_path = os.path.join(os.getcwd(), safe_path.lstrip('/'))
-            return self._send_file(local_path, mime='image/png')
-        # Serve static assets (Leaflet)
-        elif self.path.startswith('/static/'):
-            safe_path = self.path.replace('..', '')
-            local_path = os.path.join(os.getcwd(), safe_path.lstrip('/'))
-            mime = 'application/octet-stream'
-            if local_path.endswith('.js'):
-                mime = 'application/javascript'
-            elif local_path.endswith('.css'):
-                mime = 'text/css'
-            elif local_path.endswith('.png'):
-                mime = 'image/png'
-            return self._send_file(local_path, mime=mime)
-        # API: geocode
-        elif self.path.startswith('/api/geocode'):
-            qs = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
-            q = (qs.get('q') or qs.get('city') or [''])[0]
-            if not q:
-                return self._send_json({'error': 'missing q'}, status=400)
-            res = geocode_city(q)
-            if res:
-                return self._send_json(res)
-            else:
-                return self._send_json({'error': 'not found'}, status=404)
-        # API: list saved areas
-        elif self.path.startswith('/api/list_areas'):
-            areas = _load_areas()
-            return self._send_json({'areas': areas})
-        else:
-            return self._send_json({'error': 'Not found'}, status=404)
+        m = self._GET_ROUTE_RE.match(self.path)
+        if m is None:
+            return self._send_canned(_NOT_FOUND_REPLY)
+        return self._GET_ROUTES[m.lastgroup](self)
 
     def do_POST(self):
         cl = int(self.headers.get('Content-Length', '0') or '0')
-        raw = self.rfile.read(cl).decode('utf-8') if cl > 0 else '{}'
+        raw = self.rfile.read(cl) if cl > 0 else b'{}'
         try:
-            body = json.loads(raw)
+            body = _loads(raw)
         except Exception:
             body = {}
-        # Save area
-        if self.path == '/api/save_area':
-            name = (body.get('name') or '').strip()
-            bbox = body.get('bbox')
-            zooms = body.get('zooms') or []
-            if not name or not bbox or not isinstance(zooms, list):
-                return self._send_json({'error': 'invalid payload'}, status=400)
-            areas = _load_areas()
-            # Update if exists
-            existing = [a for a in areas if a.get('name') == name]
-            if existing:
-                for a in areas:
-                    if a.get('name') == name:
-                        a['bbox'] = bbox
-                        a['zooms'] = zooms
-                        a['updated_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                areas.append({ 'name': name, 'bbox': bbox, 'zooms': zooms, 'created_at': time.strftime('%Y-%m-%d %H:%M:%S') })
-            if _save_areas(areas):
-                return self._send_json({'ok': True})
-            else:
-                return self._send_json({'error': 'failed to save'}, status=500)
-        # Delete area
-        elif self.path == '/api/delete_area':
-            name = (body.get('name') or '').strip()
-            if not name:
-                return self._send_json({'error': 'missing name'}, status=400)
-            areas = _load_areas()
-            areas = [a for a in areas if a.get('name') != name]
-            if _save_areas(areas):
-                return self._send_json({'ok': True})
-            else:
-                return self._send_json({'error': 'failed to save'}, status=500)
-        # Download tiles for bbox
-        elif self.path == '/api/download_tiles':
-            bbox = body.get('bbox')
-            zooms = body.get('zooms') or []
-            name = (body.get('name') or '').strip()
-            if not bbox or not isinstance(zooms, list) or len(zooms) == 0:
-                return self._send_json({'error': 'invalid payload'}, status=400)
-            try:
-                total, downloaded = download_tiles_bbox(bbox, zooms)
-                # Record import to manifest
-                try:
-                    tiles_dir = os.path.join(os.getcwd(), 'tiles')
-                    os.makedirs(tiles_dir, exist_ok=True)
-                    log_path = os.path.join(tiles_dir, 'manifest.log')
-                    rec = {
-                        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'name': name or 'bbox',
-                        'bbox': bbox,
-                        'zooms': zooms,
-                    }
-                    with open(log_path, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps(rec) + "\n")
-                except Exception:
-                    pass
-                return self._send_json({'ok': True, 'total': total, 'downloaded': downloaded})
-            except Exception as e:
-                return self._send_json({'error': str(e)}, status=500)
+        handler = self._POST_ROUTES.get(self.path)
+        if handler is None:
+            return self._send_canned(_NOT_FOUND_REPLY)
+        return handler(self, body)
+
+    # Main online map
+    def _get_index(self):
+        return self._send_html(HTML_PAGE)
+
+    # Offline map page
+    def _get_offline(self):
+        return self._send_html(OFFLINE_HTML_PAGE)
+
+    def _get_select(self):
+        try:
+            ensure_static_assets()
+        except Exception:
+            pass
+        return self._send_html(SELECTION_HTML_PAGE)
+
+    # GPS location API
+    def _get_location(self):
+        gps_reader: GPSReader = getattr(self.server, 'gps_reader', None)
+        if gps_reader is None:
+            return self._send_json({'error': 'GPS reader not available'}, status=503)
+        # Serialized by the reader once per fix, not once per poll
+        return self._send_json_bytes(gps_reader.location_json())
+
+    # Serve local tiles
+    def _get_tiles(self):
+        local_path = _resolve_under(_TILES_ROOT, '/tiles/', self.path)
+        if local_path is None:
+            return self._send_canned(_NOT_FOUND_REPLY)
+        if not os.path.isfile(local_path):
+            data = _mbtiles_tile(self.path)
+            if data is not None:
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/png')
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+                self.end_headers()
+                self.wfile.write(data)
+                return
+        # z/x/y tiles never change once downloaded
+        return self._send_file(local_path, mime='image/png',
+                               cache_control='public, max-age=31536000, immutable')
+
+    # Serve static assets (Leaflet)
+    def _get_static(self):
+        local_path = _resolve_under(_STATIC_ROOT, '/static/', self.path)
+        if local_path is None:
+            return self._send_canned(_NOT_FOUND_REPLY)
+        mime = _MIME_MAP.get(os.path.splitext(local_path)[1], 'application/octet-stream')
+        return self._send_file(local_path, mime=mime, cache_control='public, max-age=86400')
+
+    # API: geocode
+    def _get_geocode(self):
+        q = _get_qs_value(self.path, 'q') or _get_qs_value(self.path, 'city')
+        if not q:
+            return self._send_canned(_MISSING_Q_REPLY)
+        res = geocode_city(q)
+        if res:
+            return self._send_json(res)
+        else:
+            return self._send_canned(_NO_MATCH_REPLY)
+
+    # API: list saved areas
+    def _get_list_areas(self):
+        areas = _load_areas()
+        return self._send_json({'areas': areas})
+
+    # Save area
+    def _post_save_area(self, body):
+        name = (body.get('name') or '').strip()
+        bbox = body.get('bbox')
+        zooms = body.get('zooms') or []
+        if not name or not bbox or not isinstance(zooms, list):
+            return self._send_canned(_INVALID_PAYLOAD_REPLY)
+        areas = _load_areas_by_name()
+        # Update if exists
+        area = areas.get(name)
+        if area is not None:
+            area['bbox'] = bbox
+            area['zooms'] = zooms
+            area['updated_at'] = _timestamps()[0]
         else:
-            return self._send_json({'error': 'Not found'}, status=404)
+            areas[name] = { 'name': name, 'bbox': bbox, 'zooms': zooms, 'created_at': _timestamps()[0] }
+        if _save_areas(areas):
+            return self._send_json({'ok': True})
+        else:
+            return self._send_json({'error': 'failed to save'}, status=500)
+
+    # Delete area
+    def _post_delete_area(self, body):
+        name = (body.get('name') or '').strip()
+        if not name:
+            return self._send_json({'error': 'missing name'}, status=400)
+        areas = _load_areas_by_name()
+        areas.pop(name, None)
+        if _save_areas(areas):
+            return self._send_json({'ok': True})
+        else:
+            return self._send_json({'error': 'failed to save'}, status=500)
+
+    # Download tiles for bbox
+    def _post_download_tiles(self, body):
+        bbox = body.get('bbox')
+        zooms = body.get('zooms') or []
+        name = (body.get('name') or '').strip()
+        if not bbox or not isinstance(zooms, list) or len(zooms) == 0:
+            return self._send_canned(_INVALID_PAYLOAD_REPLY)
+        try:
+            # 'force' is the page's confirmation for downloads over the byte budget
+            confirm = (lambda count, est_bytes: True) if body.get('force') else None
+            total, downloaded = download_tiles_bbox(bbox, zooms, confirm=confirm)
+            # Record import to manifest
+            try:
+                manifest_append({
+                    'time': _timestamps()[0],
+                    'name': name or 'bbox',
+                    'bbox': bbox,
+                    'zooms': zooms,
+                })
+            except Exception:
+                pass
+            return self._send_json({'ok': True, 'total': total, 'downloaded': downloaded})
+        except TileBudgetExceeded as e:
+            return self._send_json({'error': str(e), 'over_budget': True}, status=413)
+        except Exception as e:
+            return self._send_json({'error': str(e)}, status=500)
+
+    # GET paths are matched by prefix, in one pass; the named group picks the handler
+    _GET_ROUTE_RE = re.compile(
+        r'/(?:(?P<index>index|$)|(?P<offline>offline)|(?P<select>select)|(?P<location>location)'
+        r'|(?P<tiles>tiles/)|(?P<static>static/)|(?P<geocode>api/geocode)|(?P<list_areas>api/list_areas))')
+    _GET_ROUTES = {
+        'index': _get_index,
+        'offline': _get_offline,
+        'select': _get_select,
+        'location': _get_location,
+        'tiles': _get_tiles,
+        'static': _get_static,
+        'geocode': _get_geocode,
+        'list_areas': _get_list_areas,
+    }
+    # POST paths are matched exactly
+    _POST_ROUTES = {
+        '/api/save_area': _post_save_area,
+        '/api/delete_area': _post_delete_area,
+        '/api/download_tiles': _post_download_tiles,
+    }
 
     def log_message(self, format, *args):
-        sys.stdout.write("%s - - [%s] %s\n" % (self.address_string(), time.strftime("%d/%b/%Y %H:%M:%S"), format % args))
+        sys.stdout.write("%s - - [%s] %s\n" % (self.address_string(), _timestamps()[1], format % args))
 
 
-class GPSGUI:
-    """GUI for GPS control and monitoring"""
-    
-    def __init__(self):
-        self.root = tk.Tk()
-        self.root.title("GPS Waveshare L76X HAT - Live Map Controller")
-        self.root.geometry("600x500")
-        self.root.resizable(True, True)
-        
-        # GPS and server components
-        self.gps_reader = None
-        self.server = None
-        self.server_thread = None
-        self.is_running = False
-        
-        # Configuration
-        self.device = '/dev/ttyAMA0'  # Fixed: L76X HAT uses ttyAMA0, not serial0
-        self.baud = 9600
-        self.host = 'localhost'
-        self.port = 5000
-        self.simulate = False
-        
-        self.setup_ui()
-        self.start_status_updates()
-    
-    def setup_ui(self):
-        """Setup the user interface"""
-        # Main frame
-        main_frame = ttk.Frame(self.root, padding="10")
-        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Title
-        title_label = ttk.Label(main_frame, text="GPS Waveshare L76X HAT Controller", 
-                               font=('Arial', 16, 'bold'))
-        title_label.grid(row=0, column=0, columnspan=2, pady=(0, 20))
-        
-        # Configuration frame
-        config_frame = ttk.LabelFrame(main_frame, text="Configuration", padding="10")
-        config_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        # Device settings
-        ttk.Label(config_frame, text="GPS Device:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
-        self.device_var = tk.StringVar(value=self.device)
-        device_entry = ttk.Entry(config_frame, textvariable=self.device_var, width=20)
-        device_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 20))
-        
-        ttk.Label(config_frame, text="Baud Rate:").grid(row=0, column=2, sticky=tk.W, padx=(0, 10))
-        self.baud_var = tk.StringVar(value=str(self.baud))
-        baud_entry = ttk.Entry(config_frame, textvariable=self.baud_var, width=10)
-        baud_entry.grid(row=0, column=3, sticky=tk.W)
-        
-        # Port settings
-        ttk.Label(config_frame, text="Web Port:").grid(row=1, column=0, sticky=tk.W, padx=(0, 10))
-        self.port_var = tk.StringVar(value=str(self.port))
-        port_entry = ttk.Entry(config_frame, textvariable=self.port_var, width=10)
-        port_entry.grid(row=1, column=1, sticky=tk.W, padx=(0, 20))
-        
-        # Simulation mode
-        self.simulate_var = tk.BooleanVar()
-        simulate_check = ttk.Checkbutton(config_frame, text="Simulation Mode", 
-                                        variable=self.simulate_var)
-        simulate_check.grid(row=1, column=2, columnspan=2, sticky=tk.W, padx=(0, 10))
-        
-        # City assistance field
-        ttk.Label(config_frame, text="City for GPS Assist:").grid(row=2, column=0, sticky=tk.W, padx=(0, 10))
-        self.city_var = tk.StringVar(value="")  # Empty by default - users enter manually
-        city_entry = ttk.Entry(config_frame, textvariable=self.city_var, width=30)
-        city_entry.grid(row=2, column=1, columnspan=2, sticky=(tk.W, tk.E), padx=(0, 20))
-        
-        # Help text
-        help_label = ttk.Label(config_frame, text="(e.g., Tokyo, Japan or New York, USA)", 
-                              font=('Arial', 8), foreground="gray")
-        help_label.grid(row=2, column=3, sticky=tk.W)
-        
-        # Control buttons frame
-        control_frame = ttk.LabelFrame(main_frame, text="GPS Control", padding="10")
-        control_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        # Control buttons
-        self.start_btn = ttk.Button(control_frame, text="Start GPS & Server", 
-                                   command=self.start_gps_server)
-        self.start_btn.grid(row=0, column=0, padx=(0, 10), pady=5)
-        
-        self.stop_btn = ttk.Button(control_frame, text="Stop GPS & Server", 
-                                  command=self.stop_gps_server, state="disabled")
-        self.stop_btn.grid(row=0, column=1, padx=(0, 10), pady=5)
-        
-        self.open_map_btn = ttk.Button(control_frame, text="Open Live Map", 
-                                      command=self.open_map, state="disabled")
-        self.open_map_btn.grid(row=0, column=2, padx=(0, 10), pady=5)
-        
-        # Emergency stop button (always enabled)
-        self.force_stop_btn = ttk.Button(control_frame, text="Force Stop All", 
-                                        command=self.force_stop_all)
-        self.force_stop_btn.grid(row=0, column=3, padx=(0, 10), pady=5)
-        
-        # Offline import (area selector)
-        self.offline_import_btn = ttk.Button(control_frame, text="Offline Import", 
-                                            command=self.open_area_selector)
-        self.offline_import_btn.grid(row=0, column=4, padx=(0, 10), pady=5)
-        
-        # Load saved map dialog
-        self.load_saved_btn = ttk.Button(control_frame, text="Load Saved Map", 
-                                         command=self.open_saved_map_dialog_listbox)
-        self.load_saved_btn.grid(row=0, column=5, padx=(0, 10), pady=5)
-        
-        # Diagnostic buttons
-        diag_btn = ttk.Button(control_frame, text="Run Diagnostics", 
-                             command=self.run_diagnostics)
-        diag_btn.grid(row=1, column=0, padx=(0, 10), pady=5)
-        
-        restart_btn = ttk.Button(control_frame, text="Restart GPS Service", 
-                               command=self.restart_gps_service)
-        restart_btn.grid(row=1, column=1, padx=(0, 10), pady=5)
-        
-        # GPS Assistance buttons
-        assist_btn = ttk.Button(control_frame, text="GPS Assist (A-GPS)", 
-                               command=self.gps_assist)
-        assist_btn.grid(row=1, column=2, padx=(0, 10), pady=5)
-        
-        status_btn = ttk.Button(control_frame, text="Check GPS Status", 
-                               command=self.check_gps_status)
-        status_btn.grid(row=2, column=0, padx=(0, 10), pady=5)
-        
-        raw_data_btn = ttk.Button(control_frame, text="Show Raw GPS Data", 
-                                 command=self.show_raw_gps_data)
-        raw_data_btn.grid(row=2, column=1, padx=(0, 10), pady=5)
-        
-        # Instructions button
-        instructions_btn = ttk.Button(control_frame, text="📖 Instructions (Updated)", 
-                                     command=self.show_instructions)
-        instructions_btn.grid(row=2, column=2, padx=(0, 10), pady=5)
-        
-        # Offline maps panel removed per new workflow
-        
-        # Status frame
-        status_frame = ttk.LabelFrame(main_frame, text="GPS Status", padding="10")
-        status_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        # Status labels
-        self.status_labels = {}
-        status_items = [
-            ('Server Status:', 'server_status'),
-            ('GPS Status:', 'gps_status'),
-            ('GPS Fix:', 'gps_fix'),
-            ('Latitude:', 'latitude'),
-            ('Longitude:', 'longitude'),
-            ('Speed (km/h):', 'speed'),
-            ('Last Update:', 'last_update')
-        ]
-        
-        for i, (label, key) in enumerate(status_items):
-            ttk.Label(status_frame, text=label).grid(row=i, column=0, sticky=tk.W, padx=(0, 10))
-            self.status_labels[key] = ttk.Label(status_frame, text="N/A", foreground="gray")
-            self.status_labels[key].grid(row=i, column=1, sticky=tk.W)
-        
-        # Log frame
-        log_frame = ttk.LabelFrame(main_frame, text="System Log", padding="10")
-        log_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
-        
-        # Log text area
-        self.log_text = tk.Text(log_frame, height=8, width=70, wrap=tk.WORD)
-        log_scrollbar = ttk.Scrollbar(log_frame, orient="vertical", command=self.log_text.yview)
-        self.log_text.configure(yscrollcommand=log_scrollbar.set)
-        
-        self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        log_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        
-        # Configure grid weights
-        self.root.columnconfigure(0, weight=1)
-        self.root.rowconfigure(0, weight=1)
-        main_frame.columnconfigure(1, weight=1)
-        main_frame.rowconfigure(4, weight=1)
-        config_frame.columnconfigure(1, weight=1)
-        log_frame.columnconfigure(0, weight=1)
-        log_frame.rowconfigure(0, weight=1)
-        
-        self.log("GPS Controller initialized. Ready to start.")
-        # Offline cache init removed per new workflow
-    
-    def log(self, message):
-        """Add message to log"""
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
-    
-    def start_gps_server(self):
-        """Start GPS reader and web server"""
-        if self.is_running:
-            return
-        
-        try:
-            # Get configuration values
-            self.device = self.device_var.get()
-            self.baud = int(self.baud_var.get())
-            self.port = int(self.port_var.get())
-            self.simulate = self.simulate_var.get()
-            
-            self.log(f"Starting GPS reader (Device: {self.device}, Baud: {self.baud}, Simulate: {self.simulate})")
-            
-            # Start GPS reader
-            self.gps_reader = GPSReader(device=self.device, baud=self.baud, simulate=self.simulate)
-            self.gps_reader.start()
-            
-            # Start web server
-            self.log(f"Starting web server on port {self.port}")
-            self.server = ThreadingHTTPServer((self.host, self.port), RequestHandler)
-            setattr(self.server, 'gps_reader', self.gps_reader)
-            
-            # Run server in separate thread
-            self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
-            self.server_thread.start()
-            
-            self.is_running = True
-            
-            # Update button states
-            self.start_btn.config(state="disabled")
-            self.stop_btn.config(state="normal")
-            self.open_map_btn.config(state="normal")
-            
-            self.log(f"GPS and web server started successfully!")
-            self.log(f"Access the live map at: http://{self.host}:{self.port}")
-            
-            # Check for pyserial if not simulating
-            if not self.simulate and serial is None:
-                self.log("WARNING: pyserial is not installed. Install with: pip3 install pyserial")
-                if GUI_AVAILABLE:
-                    messagebox.showwarning("Warning", "PySerial is not installed.\nInstall with: pip3 install pyserial")
-            
-        except Exception as e:
-            self.log(f"Error starting GPS/Server: {e}")
-            if GUI_AVAILABLE:
-                messagebox.showerror("Error", f"Failed to start GPS/Server:\n{e}")
-            self.stop_gps_server()
-    
-    def stop_gps_server(self):
-        """Stop GPS reader and web server"""
-        if not self.is_running:
-            return
+def _canned_reply(status: int, mime: str, body: bytes):
+    """Pre-encode everything in a response except the Date and Connection header values"""
+    reason = RequestHandler.responses.get(status, ('',))[0]
+    head = (f"{RequestHandler.protocol_version} {status} {reason}\r\n"
+            f"Server: {RequestHandler.server_version} {RequestHandler.sys_version}\r\n"
+            f"Date: ")
+    tail = (f"\r\nContent-Type: {mime}\r\n"
+            f"Content-Length: {len(body)}\r\n")
+    return status, head.encode('latin-1'), tail.encode('latin-1'), body
+
+
+# Last header of a canned reply, picked per request from close_connection
+_CONNECTION_KEEP_ALIVE = b'Connection: keep-alive\r\n\r\n'
+_CONNECTION_CLOSE = b'Connection: close\r\n\r\n'
+
+
+def _canned_json(status: int, data: dict):
+    return _canned_reply(status, 'application/json; charset=utf-8', _dumps_bytes(data))
+
+
+# Fixed error replies, encoded once
+_NOT_FOUND_REPLY = _canned_json(404, {'error': 'Not found'})
+_NO_MATCH_REPLY = _canned_json(404, {'error': 'not found'})
+_MISSING_Q_REPLY = _canned_json(400, {'error': 'missing q'})
+_INVALID_PAYLOAD_REPLY = _canned_json(400, {'error': 'invalid payload'})
+
+
+class MapHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer with one thread per connection.
+
+    A fixed worker pool would let idle keep-alive connections hold every worker while new
+    connections queue behind them for a whole idle timeout.
+    """
+    # Leaflet opens a burst of tile connections at once; the default listen backlog of 5 drops some
+    request_queue_size = 128
+
+
+# path -> ((st_mtime_ns, st_size), (uart_enabled, bt_disabled)) for Raspberry Pi boot configs
+_boot_config_cache = {}
+
+
+def _boot_config_flags(path: str):
+    """(uart_enabled, bt_disabled) from a Pi config.txt, re-read only when the file changes"""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _boot_config_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, 'rb') as f:
+        config = f.read()
+    flags = (b'enable_uart=1' in config or b'dtparam=uart0=on' in config,
+             b'disable-bt' in config)
+    _boot_config_cache[path] = (key, flags)
+    return flags
+
+
+def _offline_map_url(host, port, bbox) -> str:
+    """URL of the offline map page framed on bbox [minLon, minLat, maxLon, maxLat]"""
+    query = urllib.parse.urlencode({'bbox': ','.join([f'{float(x):.6f}' for x in bbox])}, safe=',')
+    return f"http://{host}:{port}/offline?{query}"
+
+
+# Off-grid import radius (km) for the 50 / 100 km² coverage choices, from A = pi r^2
+_OFFGRID_RADIUS_50 = math.sqrt(50.0 / math.pi)
+_OFFGRID_RADIUS_100 = math.sqrt(100.0 / math.pi)
+
+
+# Saved-map dialog row templates keyed by (has valid bbox, has zooms)
+_AREA_ROW_FORMATS = {
+    (True, True): "{name}  —  bbox: {0:.4f},{1:.4f},{2:.4f},{3:.4f}  z:[{zs}]",
+    (True, False): "{name}  —  bbox: {0:.4f},{1:.4f},{2:.4f},{3:.4f}",
+    (False, True): "{name}  z:[{zs}]",
+    (False, False): "{name}",
+}
+
+
+def _area_rows(areas):
+    """Saved-map dialog rows, one per area"""
+    rows = []
+    for a in areas:
+        bbox = a.get('bbox')
+        zs = a.get('zooms') or []
+        has_bbox = isinstance(bbox, list) and len(bbox) == 4
+        has_zooms = bool(isinstance(zs, list) and zs)
+        rows.append(_AREA_ROW_FORMATS[has_bbox, has_zooms].format(
+            *(bbox if has_bbox else ()),
+            name=a.get('name') or "(unnamed)",
+            zs=",".join(map(str, zs)) if has_zooms else ""))
+    return rows
+
+
+# Sentence prefix -> (kind, field splits needed) for the GPS status check
+_STATUS_DISPATCH = {
+    b'$GPRMC': ('rmc', 7), b'$GNRMC': ('rmc', 7),
+    b'$GPGGA': ('gga', 8), b'$GNGGA': ('gga', 8),
+    b'$GPGSV': ('gsv', 4), b'$GNGSV': ('gsv', 4),
+}
+
+# check_gps_status fix states and summary tips
+_FIX_NONE = "No Fix"
+_FIX_OK = "✅ GPS HAS FIX!"
+_FIX_SEARCHING = "⏳ Searching for satellites..."
+_TIPS_NO_SATS = "\nTips:\n• Go outdoors\n• Wait 2-5 minutes\n• Check antenna connection"
+_TIPS_FEW_SATS = "\nNeed 4+ satellites for fix.\nWait a bit longer..."
+_TIPS_GOOD = "\nGood satellite coverage!"
+
+
+# Help window texts (Instructions); _HELP_OVERVIEW is formatted with the server port
+_HELP_QUICK_START = """🚀 QUICK START GUIDE - GPS Waveshare L76X HAT
+
+📋 BEFORE YOU BEGIN:
+• Ensure GPS HAT is properly connected to Raspberry Pi GPIO pins
+• Connect GPS antenna to the HAT (essential for GPS reception)
+• Make sure you're OUTDOORS with clear sky view (GPS won't work indoors!)
+
+⚡ GETTING STARTED (5 Easy Steps):
+
+1️⃣ ENTER YOUR CITY
+   • In "City for GPS Assist" field, enter your location
+   • Examples: "Tokyo, Japan", "London, UK", "New York, USA"
+   • This dramatically speeds up GPS acquisition (30-60 seconds vs 15+ minutes!)
+
+2️⃣ START THE GPS SYSTEM
+   • Click "Start GPS & Server" button
+   • Wait for "GPS and web server started successfully!" message
+   • Status should show "Server Status: Running"
+
+3️⃣ USE GPS ASSISTANCE (RECOMMENDED)
+   • Click "GPS Assist (A-GPS)" button
+   • This sends your city coordinates to GPS for faster satellite lock
+   • Essential for quick GPS acquisition!
+
+4️⃣ GO OUTDOORS & WAIT
+   • GPS MUST be used outdoors with clear sky view
+   • Wait 30-60 seconds (with GPS Assist) or 2-15 minutes (without)
+   • Watch "GPS Status" for "GPS Fix: Valid" (green text)
+
+5️⃣ VIEW YOUR LOCATION
+   • Click "Open Live Map" to see real-time location
+   • Watch yourself move on the interactive map!
+   • Speed and coordinates update automatically
+
+🎯 SUCCESS INDICATORS:
+✅ "GPS Fix: Valid" (green) - GPS is working!
+✅ Latitude/Longitude showing numbers - coordinates acquired
+✅ Live map shows your actual location - ready to use!
+
+⚠️ TROUBLESHOOTING:
+❌ "GPS Fix: No Fix" (red) - Go outdoors, wait longer, use GPS Assist
+❌ No coordinates - Check antenna connection, ensure outdoors
+❌ Can't start - Click "Force Stop All", then try again
+"""
+
+_HELP_FUNCTIONS = """🔧 FUNCTION BENEFITS & DETAILED EXPLANATIONS
+
+🎛️ CONFIGURATION SECTION:
+
+📍 City for GPS Assist:
+   BENEFIT: Reduces GPS acquisition time from 15+ minutes to 30-60 seconds
+   HOW IT WORKS: Sends approximate coordinates to GPS module for faster satellite lock
+   RESILIENCE: 3-tier fallback system (City → IP location → Montreal fallback)
+   GLOBAL: Works worldwide - enter any city (Tokyo, London, Cairo, etc.)
+
+🔧 Simulation Mode:
+   BENEFIT: Test application without GPS hardware
+   EDUCATIONAL: Learn GPS concepts with simulated Montreal coordinates
+   DEVELOPMENT: Perfect for indoor testing and demonstrations
+
+⚙️ CONTROL FUNCTIONS:
+
+🚀 Start GPS & Server:
+   BENEFIT: Activates GPS reader and web server simultaneously
+   CREATES: Real-time GPS data stream and web interface
+   ENABLES: Live map viewing and coordinate tracking
+
+🛑 Stop GPS & Server:
+   BENEFIT: Clean shutdown of all GPS processes
+   SAFETY: Properly closes serial connections and web server
+   RESOURCE: Frees system resources when done
+
+🌐 Open Live Map:
+   BENEFIT: Interactive real-time GPS visualization
+   FEATURES: Pulsing location marker, speed display, coordinate tracking
+   EDUCATIONAL: Visual understanding of GPS positioning and movement
+
+🆘 Force Stop All:
+   BENEFIT: Emergency recovery from stuck processes
+   RESILIENCE: Always available even when normal stop fails
+   TROUBLESHOOTING: Kills all GPS processes and resets application state
+
+🔍 DIAGNOSTIC FUNCTIONS:
+
+🏥 Run Diagnostics:
+   BENEFIT: Comprehensive system health check
+   CHECKS: Hardware detection, permissions, UART config, conflicting services
+   EDUCATIONAL: Learn about GPS system requirements and configuration
+
+🔄 Restart GPS Service:
+   BENEFIT: Fixes GPS communication issues
+   RESOLVES: Serial port conflicts, stuck GPS states
+   REQUIRES: Sudo privileges for system service management
+
+🛰️ GPS Assist (A-GPS):
+   BENEFIT: Assisted GPS for 95% faster satellite acquisition
+   TECHNOLOGY: Sends location hints and satellite constellation data
+   RESILIENCE: Works in challenging conditions (urban, cloudy weather)
+   GLOBAL: Uses your city input for worldwide compatibility
+
+📊 Check GPS Status:
+   BENEFIT: Real-time satellite and fix information
+   DISPLAYS: Satellite count, fix status, signal quality
+   EDUCATIONAL: Understand GPS signal acquisition process
+   TROUBLESHOOTING: Diagnose GPS reception issues
+
+📡 Show Raw GPS Data:
+   BENEFIT: View live NMEA sentences from GPS module
+   EDUCATIONAL: Learn GPS communication protocol (NMEA 0183)
+   DEBUGGING: See actual GPS data stream for troubleshooting
+   TECHNICAL: Understand $GPRMC, $GPGGA, $GPGSV sentence formats
+
+📖 Instructions:
+   BENEFIT: Comprehensive help system (this window!)
+   EDUCATIONAL: Complete learning resource for GPS technology
+   REFERENCE: Always available guidance for all functions
+
+🎯 STATUS MONITORING:
+
+📈 GPS Status Panel:
+   BENEFIT: Real-time system monitoring
+   DISPLAYS: Server status, GPS fix, coordinates, speed, last update
+   COLOR-CODED: Green (good), Red (problem), Orange (warning)
+   EDUCATIONAL: Understand GPS system states and data quality
+
+📝 System Log:
+   BENEFIT: Detailed activity tracking and troubleshooting
+   RECORDS: All GPS operations, errors, and status changes
+   DEBUGGING: Trace problems and understand system behavior
+   LEARNING: See exactly what happens during GPS operations
+
+🌍 GLOBAL COMPATIBILITY:
+• Works in any country worldwide
+• Supports any city name for GPS assistance
+• Automatic timezone and coordinate system handling
+• Multi-constellation support (GPS, GLONASS, Galileo)
+"""
+
+_HELP_TECHNICAL = """🔬 TECHNICAL DETAILS & GPS SCIENCE
+
+🛰️ GPS TECHNOLOGY OVERVIEW:
+
+📡 How GPS Works:
+   • 24+ satellites orbiting Earth at 20,200 km altitude
+   • Each satellite broadcasts time and position signals
+   • GPS receiver calculates position using 4+ satellite signals
+   • Triangulation determines exact latitude, longitude, altitude
+
+⏱️ GPS Acquisition Process:
+   COLD START: 15+ minutes (no assistance data)
+   WARM START: 2-5 minutes (some satellite data cached)
+   HOT START: 30-60 seconds (recent satellite data available)
+   A-GPS: 30-60 seconds (assisted with location hints)
+
+🔧 WAVESHARE L76X HAT SPECIFICATIONS:
+
+📊 Technical Specs:
+   • Chip: Quectel L76X GPS module
+   • Constellations: GPS, GLONASS, Galileo
+   • Channels: 33 tracking, 99 acquisition
+   • Sensitivity: -165 dBm (tracking), -148 dBm (acquisition)
+   • Accuracy: 2.5m CEP (Circular Error Probable)
+   • Update Rate: 1Hz (configurable up to 10Hz)
+   • Communication: UART at 9600 baud (default)
+
+🔌 Hardware Interface:
+   • Device: /dev/ttyAMA0 (Raspberry Pi UART)
+   • Protocol: NMEA 0183 standard
+   ��� Power: 3.3V from GPIO pins
+   • Antenna: External active antenna required
+
+📋 NMEA SENTENCE FORMATS:
+
+$GPRMC (Recommended Minimum):
+   • Position, speed, course, date/time
+   • Status: A=Active (valid), V=Void (invalid)
+   • Most important sentence for basic positioning
+
+$GPGGA (Global Positioning System Fix Data):
+   • Position, altitude, satellite count, HDOP
+   • Fix quality indicator (0=invalid, 1=GPS, 2=DGPS)
+   • Essential for 3D positioning
+
+$GPGSV (Satellites in View):
+   • Satellite count, signal strength (SNR)
+   • Satellite identification numbers
+   • Useful for signal quality assessment
+
+🌐 COORDINATE SYSTEMS:
+
+📍 WGS84 Datum:
+   • World Geodetic System 1984
+   • Global standard for GPS coordinates
+   • Latitude: -90° to +90° (South to North)
+   • Longitude: -180° to +180° (West to East)
+
+🎯 Accuracy Factors:
+   HDOP (Horizontal Dilution of Precision): <2 = Excellent, 2-5 = Good, >5 = Poor
+   Satellite Count: 4+ required for 2D fix, 5+ for 3D fix with altitude
+   Signal Strength: >35 dBHz = Strong, 25-35 = Moderate, <25 = Weak
+
+⚡ A-GPS TECHNOLOGY:
+
+🚀 Assisted GPS Benefits:
+   • Downloads satellite orbital data (ephemeris) from internet
+   • Provides approximate location for faster satellite search
+   • Reduces Time To First Fix (TTFF) by 95%
+   • Works better in challenging environments (urban canyons)
+
+🔄 Implementation:
+   • City geocoding via OpenStreetMap Nominatim API
+   • IP geolocation fallback via ipapi.co
+   • PMTK commands sent to L76X module:
+     - $PMTK351: Set approximate position
+     - $PMTK353: Enable multi-constellation
+     - $PMTK220: Set update rate
+     - $PMTK101: Hot restart with assistance
+
+🌍 GLOBAL COMPATIBILITY:
+
+🗺️ Worldwide Operation:
+   • Works in all countries and territories
+   • Automatic coordinate system handling
+   • Multi-language city name support
+   • Timezone-independent operation
+
+🛰️ Satellite Constellations:
+   GPS (USA): 31 satellites, global coverage
+   GLONASS (Russia): 24 satellites, enhanced polar coverage
+   Galileo (EU): 22+ satellites, improved accuracy
+   Combined: Better coverage, faster acquisition, higher accuracy
+
+🔧 TROUBLESHOOTING TECHNICAL ISSUES:
+
+⚠️ Common Problems:
+   • Indoor use: GPS signals cannot penetrate buildings
+   • Antenna issues: Poor connection or damaged antenna
+   • Serial conflicts: Bluetooth using same UART port
+   • Permissions: User not in dialout group
+   • UART disabled: enable_uart=1 not set in config.txt
+
+🔍 Diagnostic Commands:
+   • lsof /dev/ttyAMA0: Check port usage
+   • dmesg | grep uart: Check UART initialization
+   • stty -F /dev/ttyAMA0: Configure serial port
+   • systemctl status bluetooth: Check conflicting services
+
+📚 EDUCATIONAL VALUE:
+
+🎓 Learning Outcomes:
+   • Understand GPS satellite technology
+   • Learn NMEA protocol and data parsing
+   • Experience real-time data processing
+   • Explore coordinate systems and mapping
+   • Practice hardware interfacing and troubleshooting
+   • Gain experience with serial communication
+   • Understand the importance of location services in modern technology
+"""
+
+_HELP_TROUBLESHOOTING = """🔧 TROUBLESHOOTING GUIDE
+
+❌ PROBLEM: "No GPS Fix" or coordinates not appearing
+
+🔍 DIAGNOSIS STEPS:
+1. Check "GPS Status" panel - is it showing "No Fix" (red)?
+2. Look at System Log for error messages
+3. Verify you're OUTDOORS with clear sky view
+4. Check if GPS antenna is properly connected
+
+✅ SOLUTIONS:
+• Go outdoors - GPS CANNOT work indoors reliably
+• Wait 2-15 minutes for satellite acquisition
+• Use "GPS Assist (A-GPS)" with your city name
+• Click "Check GPS Status" to see satellite count
+• Try "Show Raw GPS Data" to verify GPS communication
+• Use "Run Diagnostics" to check hardware
+
+❌ PROBLEM: Cannot start GPS server
+
+🔍 DIAGNOSIS STEPS:
+1. Check System Log for specific error messages
+2. Look for "Permission denied" or "Device busy" errors
+3. Check if another process is using the GPS
+
+✅ SOLUTIONS:
+• Click "Force Stop All" to clear any stuck processes
+• Use "Run Diagnostics" to check for conflicts
+• Try "Restart GPS Service" to reset system services
+• Ensure user is in dialout group: sudo usermod -a -G dialout $USER
+• Reboot Raspberry Pi if problems persist
+
+❌ PROBLEM: GPS very slow to get first fix
+
+🔍 DIAGNOSIS STEPS:
+1. Check if you entered city in "City for GPS Assist"
+2. Verify you're outdoors with clear sky view
+3. Look at satellite count in "Check GPS Status"
+
+✅ SOLUTIONS:
+• Enter your city name (e.g., "Tokyo, Japan") for A-GPS
+• Click "GPS Assist (A-GPS)" to send location hints
+• Wait in open area away from buildings and trees
+• Check antenna connection is secure
+• Try different outdoor location with better sky view
+
+❌ PROBLEM: "Show Raw GPS Data" shows no data
+
+🔍 DIAGNOSIS STEPS:
+1. Check if GPS HAT is properly seated on GPIO pins
+2. Verify antenna is connected to GPS HAT
+3. Look for hardware detection in diagnostics
+
+✅ SOLUTIONS:
+• Power off Pi, reseat GPS HAT firmly on all GPIO pins
+• Check antenna connection to GPS HAT
+• Use "Run Diagnostics" to verify hardware detection
+• Try different antenna if available
+• Check for loose connections
+
+❌ PROBLEM: Live map not opening or showing location
+
+🔍 DIAGNOSIS STEPS:
+1. Check if GPS server is running (green status)
+2. Verify GPS has valid fix (coordinates showing)
+3. Check web browser and internet connection
+
+✅ SOLUTIONS:
+• Ensure "Start GPS & Server" was clicked first
+• Wait for GPS fix before opening map
+• Try different web browser
+• Check firewall settings (port 5000)
+• Manually navigate to http://localhost:5000
+
+❌ PROBLEM: Bluetooth conflicts with GPS
+
+🔍 DIAGNOSIS STEPS:
+1. Check "Run Diagnostics" for Bluetooth service status
+2. Look for "Device busy" errors in System Log
+3. Check if /dev/serial0 is being used by Bluetooth
+
+✅ SOLUTIONS:
+• Disable Bluetooth: sudo systemctl disable bluetooth
+• Stop Bluetooth service: sudo systemctl stop bluetooth
+• Add to /boot/firmware/config.txt: dtoverlay=disable-bt
+• Reboot after making changes
+• Use "Restart GPS Service" to reset serial port
+
+❌ PROBLEM: Permission denied errors
+
+🔍 DIAGNOSIS STEPS:
+1. Check user permissions in diagnostics
+2. Look for "Permission denied" in System Log
+3. Verify user is in dialout group
+
+✅ SOLUTIONS:
+• Add user to dialout group: sudo usermod -a -G dialout $USER
+• Log out and log back in (or reboot)
+• Check device permissions: ls -la /dev/ttyAMA0
+• Try running with sudo (temporary test only)
+
+❌ PROBLEM: GPS works but coordinates are wrong
+
+🔍 DIAGNOSIS STEPS:
+1. Check if using simulation mode
+2. Verify GPS has valid satellite fix
+3. Compare with known location or other GPS device
+
+✅ SOLUTIONS:
+• Disable "Simulation Mode" checkbox
+• Wait for more satellites (4+ needed for accuracy)
+• Check HDOP value in raw GPS data (<5 is good)
+• Verify antenna has clear sky view
+• Wait longer for GPS to stabilize
+
+🆘 EMERGENCY RECOVERY PROCEDURES:
+
+🔄 Complete Reset:
+1. Click "Force Stop All"
+2. Close application
+3. Reboot Raspberry Pi
+4. Restart application
+5. Try again with fresh start
+
+🔧 Hardware Reset:
+1. Power off Raspberry Pi
+2. Remove GPS HAT
+3. Check all GPIO pin connections
+4. Reseat HAT firmly
+5. Reconnect antenna
+6. Power on and test
+
+📞 GETTING HELP:
+
+🔍 Information to Collect:
+• System Log contents (copy/paste)
+• Output from "Run Diagnostics"
+• Raspberry Pi model and OS version
+• GPS HAT model and antenna type
+• Specific error messages
+• Steps that led to the problem
+
+📧 Support Resources:
+• Waveshare GPS HAT documentation
+• Raspberry Pi GPS troubleshooting guides
+• NMEA protocol specifications
+• GPS technology educational resources
+
+Remember: GPS requires patience! First fix can take 15+ minutes outdoors without assistance. Use A-GPS for much faster results!
+"""
+
+_HELP_OVERVIEW = """
+UPDATED USER GUIDE — Waveshare L76X HAT GPS GUI
+
+Quick start (online or offline-ready)
+1) Hardware: Seat the L76X HAT firmly and attach the GPS antenna. Go outdoors for best signal.
+2) Start: Click “Start GPS & Server”. When running, the Server Status shows active and the Open Live Map button enables.
+3) Faster fix (optional but recommended): Enter your city in “City for GPS Assist”, then click “GPS Assist (A‑GPS)”. This hints the receiver for quicker TTFF.
+4) Live view (online tiles): Click “Open Live Map” to see real‑time position and speed.
+
+Offline workflow (plan at home → use in the field)
+A) Plan & download tiles (requires internet):
+   • Click “Offline Import” → the Area Selector opens in your browser.
+   • Find your destination (City lookup), draw a rectangle (toolbar or right‑click‑drag), choose zooms (z12–z16), and click “Download this area”.
+   • Optional: Give the area a name and click Save. Your tiles are written under ./tiles and metadata in tiles/saved_areas.json.
+B) Use in the field (no internet needed):
+   • Start the app and click “Load Saved Map”. Choose the saved area → Open Offline Map.
+   • The offline map centers to your saved bbox and serves tiles locally from ./tiles while showing live GPS location.
+
+Main controls and benefits
+• Start GPS & Server
+  - Starts the serial reader (e.g., /dev/ttyAMA0 @ 9600) and launches the local web server for map pages
+  - Enables Live Map and offline map endpoints
+
+• Stop GPS & Server
+  - Cleanly shuts down serial reading and the embedded web server to free resources/ports
+
+• Open Live Map
+  - Opens an interactive online map using OSM tiles; shows live location with a pulsing marker and speed
+
+• Offline Import (Area Selector)
+  - Visual tool to define exact coverage rectangles, choose zoom levels, and download tiles for offline use
+  - Right‑click and drag to draw quickly, or use the rectangle tool; saved areas are persisted in tiles/saved_areas.json
+
+• Load Saved Map
+  - Lists your saved areas; selecting one opens the offline map centered to that bbox
+  - Uses only local tiles from ./tiles — works fully without internet
+
+• GPS Assist (A‑GPS)
+  - Uses your city (or IP fallback) to send assistance commands (PMTK) for faster satellite acquisition
+  - Benefit: Dramatically reduces Time To First Fix (often 30–60s outdoors)
 
-        self.log("Stopping GPS and web server...")
+• Check GPS Status
+  - Reads live NMEA and reports Fix status and satellites in use/view
+  - Benefit: Quick diagnosis of reception and fix progress
 
-        # Stop GPS reader and wait for the serial port to be fully released
-        if self.gps_reader:
-            self.gps_reader.stop()
-            self.gps_reader.join(timeout=3.0)  # wait for thread to exit and close the port
-            self.gps_reader = None
+• Show Raw GPS Data
+  - Displays raw NMEA sentences for inspection and debugging ($GPRMC, $GPGGA, $GPGSV)
 
-        # Stop web server and close the listening socket
-        if self.server:
-            self.server.shutdown()
-            self.server.server_close()
-            self.server = None
-        
-        self.is_running = False
-        
-        # Update button states
-        self.start_btn.config(state="normal")
-        self.stop_btn.config(state="disabled")
-        self.open_map_btn.config(state="disabled")
-        
-        self.log("GPS and web server stopped.")
-    
-    def force_stop_all(self):
-        """Force stop all GPS processes and reset state"""
-        self.log("🛑 Force stopping all GPS processes...")
-        
-        try:
-            # Kill any python processes running Main.py
-            subprocess.run(['pkill', '-f', 'python3.*Main.py'], capture_output=True)
-            self.log("✅ Killed any running Main.py processes")
-            
-            # Kill processes using port 5000
-            subprocess.run(['sudo', 'fuser', '-k', '5000/tcp'], capture_output=True)
-            self.log("✅ Freed port 5000")
-            
-            # Stop our internal processes
-            if self.gps_reader:
-                self.gps_reader.stop()
-                self.gps_reader.join(timeout=3.0)  # wait for serial port release
-                self.gps_reader = None
-                self.log("✅ Stopped GPS reader thread")
+• Run Diagnostics
+  - Verifies pyserial, device existence and permissions, UART config, and gpsd conflicts
+  - Benefit: One‑click health check for common setup issues
 
-            if self.server:
-                try:
-                    self.server.shutdown()
-                    self.server.server_close()
-                except Exception:
-                    pass
-                self.server = None
-                self.log("✅ Stopped web server")
-            
-            # Reset state
-            self.is_running = False
-            
-            # Update button states
-            self.start_btn.config(state="normal")
-            self.stop_btn.config(state="disabled")
-            self.open_map_btn.config(state="disabled")
-            
-            self.log("✅ Force stop completed - all processes terminated")
-            
-            if GUI_AVAILABLE:
-                messagebox.showinfo("Force Stop", "All GPS processes have been forcefully stopped.\nYou can now start fresh.")
-                
-        except Exception as e:
-            self.log(f"❌ Error during force stop: {e}")
-            # Even if there's an error, reset the GUI state
-            self.is_running = False
-            self.start_btn.config(state="normal")
-            self.stop_btn.config(state="disabled")
-            self.open_map_btn.config(state="disabled")
-    
-    def open_map(self):
-        """Open the live map in web browser"""
-        if self.is_running:
-            url = f"http://{self.host}:{self.port}"
-            self.log(f"Opening live map: {url}")
-            webbrowser.open(url)
-        else:
-            if GUI_AVAILABLE:
-                messagebox.showwarning("Warning", "GPS server is not running. Start it first.")
-    
-    def run_diagnostics(self):
-        """Run system diagnostics"""
-        self.log("Running system diagnostics...")
-        
-        # Check pyserial
-        if serial is None:
-            self.log("❌ PySerial: NOT INSTALLED (pip3 install pyserial)")
-        else:
-            self.log("✅ PySerial: Available")
-        
-        # Check device file
-        if os.path.exists(self.device_var.get()):
-            self.log(f"✅ Device file: {self.device_var.get()} exists")
-            
-            # Check permissions
-            if os.access(self.device_var.get(), os.R_OK | os.W_OK):
-                self.log("✅ Device permissions: Read/Write access OK")
-            else:
-                self.log("❌ Device permissions: No read/write access")
-        else:
-            self.log(f"❌ Device file: {self.device_var.get()} not found")
-        
-        # Check if on Raspberry Pi (Pi 5 uses /boot/firmware/config.txt; Pi 4 uses /boot/config.txt)
-        config_paths = ['/boot/firmware/config.txt', '/boot/config.txt']
-        config_path = next((p for p in config_paths if os.path.exists(p)), None)
-        if config_path:
-            self.log(f"✅ Raspberry Pi: Detected (config: {config_path})")
-            try:
-                with open(config_path, 'r') as f:
-                    config = f.read()
-                if 'enable_uart=1' in config or 'dtparam=uart0=on' in config:
-                    self.log("✅ UART: Enabled in config")
-                else:
-                    self.log(f"⚠️ UART: Not explicitly enabled — add 'dtparam=uart0=on' to {config_path}")
-                if 'disable-bt' in config:
-                    self.log("✅ Bluetooth: Disabled (good for GPS on ttyAMA0)")
-                else:
-                    self.log(f"⚠️ Bluetooth: Not disabled — add 'dtoverlay=disable-bt' to {config_path} to avoid UART conflict")
-            except Exception:
-                self.log(f"❌ UART: Cannot read {config_path}")
-        else:
-            self.log("ℹ️ Raspberry Pi: Not detected (may be running on other system)")
-        
-        # Check for conflicting services
-        try:
-            result = subprocess.run(['pgrep', 'gpsd'], capture_output=True)
-            if result.returncode == 0:
-                self.log("⚠️ GPSD: Running (may conflict with GPS access)")
-            else:
-                self.log("✅ GPSD: Not running")
-        except:
-            self.log("ℹ️ GPSD: Cannot check status")
-        
-        self.log("Diagnostics complete.")
-    
-    def restart_gps_service(self):
-        """Restart GPS-related services"""
-        if GUI_AVAILABLE and messagebox.askyesno("Confirm", "Restart GPS services? This requires sudo privileges."):
-            self.log("Restarting GPS services...")
-            try:
-                # Stop gpsd
-                subprocess.run(['sudo', 'systemctl', 'stop', 'gpsd'], capture_output=True)
-                subprocess.run(['sudo', 'killall', 'gpsd'], capture_output=True)
-                self.log("✅ Stopped GPSD service")
-                
-                # Reset serial device
-                if os.path.exists(self.device_var.get()):
-                    subprocess.run(['sudo', 'stty', '-F', self.device_var.get(), 'raw', '9600'], 
-                                 capture_output=True)
-                    self.log("✅ Reset serial device")
-                
-                if GUI_AVAILABLE:
-                    messagebox.showinfo("Success", "GPS services restarted successfully!")
-                
-            except Exception as e:
-                self.log(f"❌ Error restarting services: {e}")
-                if GUI_AVAILABLE:
-                    messagebox.showerror("Error", f"Failed to restart GPS services:\n{e}")
-    
-    def get_location_from_ip(self):
-        """Get approximate location from IP geolocation"""
-        if not REQUESTS_AVAILABLE:
-            return None, None, None
-        try:
-            response = requests.get('http://ipapi.co/json/', timeout=5)
-            data = response.json()
-            return data.get('latitude'), data.get('longitude'), data.get('city')
-        except:
-            return None, None, None
-    
-    def get_location_from_city(self, city_name):
-        """Get coordinates from city name using OpenStreetMap Nominatim API"""
-        if not REQUESTS_AVAILABLE or not city_name.strip():
-            return None, None, None
-        
-        try:
-            # Use OpenStreetMap Nominatim API (free, no API key required)
-            url = "https://nominatim.openstreetmap.org/search"
-            params = {
-                'q': city_name.strip(),
-                'format': 'json',
-                'limit': 1,
-                'addressdetails': 1
-            }
-            headers = {
-                'User-Agent': 'GPS-Assistant/1.0'  # Required by Nominatim
-            }
-            
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            data = response.json()
-            
-            if data and len(data) > 0:
-                result = data[0]
-                lat = float(result['lat'])
-                lon = float(result['lon'])
-                display_name = result.get('display_name', city_name)
-                return lat, lon, display_name
-            else:
-                return None, None, None
-                
-        except Exception as e:
-            print(f"Geocoding error: {e}")
-            return None, None, None
-    
-    def gps_assist(self):
-        """Send GPS assistance data to help with faster fix"""
-        if self.simulate_var.get():
-            self.log("GPS Assist not needed in simulation mode")
-            return
-        
-        if not serial:
-            self.log("❌ PySerial not available for GPS assistance")
-            return
-        
-        self.log("🛰️ Starting GPS Assistance (A-GPS)...")
-        
-        # Get location assistance - try city field first, then IP, then fallback
-        city_name = self.city_var.get().strip()
-        assist_lat, assist_lon, location_source = None, None, None
-        
-        if city_name:
-            self.log(f"🔍 Looking up coordinates for: {city_name}")
-            city_lat, city_lon, display_name = self.get_location_from_city(city_name)
-            if city_lat and city_lon:
-                assist_lat, assist_lon = city_lat, city_lon
-                location_source = f"City lookup: {display_name}"
-                self.log(f"📍 {location_source} ({assist_lat:.4f}, {assist_lon:.4f})")
-        
-        if not assist_lat:
-            self.log("🌐 Trying IP-based location...")
-            ip_lat, ip_lon, ip_city = self.get_location_from_ip()
-            if ip_lat and ip_lon:
-                assist_lat, assist_lon = ip_lat, ip_lon
-                location_source = f"IP-based: {ip_city}"
-                self.log(f"📍 {location_source} ({assist_lat:.4f}, {assist_lon:.4f})")
-        
-        if not assist_lat:
-            assist_lat, assist_lon = 45.5017, -73.5673
-            location_source = "Fallback: Montreal, Canada"
-            self.log(f"📍 {location_source} ({assist_lat:.4f}, {assist_lon:.4f})")
-        
-        try:
-            with serial.Serial(self.device_var.get(), int(self.baud_var.get()), timeout=1) as ser:
-                self.log(f"🔗 Connected to {self.device_var.get()}")
-                
-                # Send assistance commands
-                commands = [
-                    # Set approximate position
-                    f"$PMTK351,1,{assist_lat:.6f},{assist_lon:.6f},0",
-                    # Enable GPS+GLONASS+Galileo
-                    "$PMTK353,1,1,1,0,0",
-                    # Set 1Hz update rate
-                    "$PMTK220,1000",
-                    # Hot restart with assistance
-                    "$PMTK101"
-                ]
-                
-                for cmd in commands:
-                    # Calculate NMEA checksum
-                    checksum = 0
-                    for c in cmd[1:]:
-                        checksum ^= ord(c)
-                    full_cmd = f"{cmd}*{checksum:02X}\r\n"
-                    
-                    ser.write(full_cmd.encode())
-                    time.sleep(0.1)
-                    self.log(f"📡 Sent: {cmd}")
-                
-                self.log("✅ GPS assistance data sent!")
-                self.log("⏳ GPS should acquire fix faster now. Wait 30-60 seconds...")
-                
-                if GUI_AVAILABLE:
-                    messagebox.showinfo("GPS Assist", 
-                                      "GPS assistance data sent!\n\n"
-                                      "The GPS should now:\n"
-                                      "• Acquire satellites faster\n"
-                                      "• Get first fix in 30-60 seconds\n"
-                                      "• Work better in challenging conditions\n\n"
-                                      "Make sure you're outdoors with clear sky view!")
-                
-        except Exception as e:
-            self.log(f"❌ GPS Assist error: {e}")
-            if GUI_AVAILABLE:
-                messagebox.showerror("GPS Assist Error", f"Failed to send assistance data:\n{e}")
+• Restart GPS Service
+  - Stops gpsd and resets serial parameters (requires sudo); useful if the serial port gets stuck or busy
+
+• Force Stop All
+  - Kills lingering Main.py and frees port 5000, stops internal threads; last‑resort recovery
+
+Tips
+• Outdoor usage: GPS generally needs clear sky; first fix can take minutes without assistance.
+• Device: Default set to /dev/ttyAMA0 at 9600; adjust in Configuration if needed.
+• Permissions: Ensure your user is in the dialout group if you see permission errors.
+• Offline completeness: If blank areas appear, download additional tiles/zooms for that bbox.
+
+Endpoints (for reference)
+• Live map:     http://localhost:{port}
+• Offline map:  http://localhost:{port}/offline (supports ?bbox=minLon,minLat,maxLon,maxLat)
+• Area selector: http://localhost:{port}/select
+"""
+
+
+class GPSGUI:
+    """GUI for GPS control and monitoring"""
+    LOG_FLUSH_INTERVAL = 0.05  # Seconds between log widget redraws
+    LOG_MAX_LINES = 10000
+    RAW_MAX_LINES = 500  # Lines kept in the raw NMEA window
+    RAW_READER_DAEMON = True  # False: the raw window's reader is joined at exit (it stops when the window is destroyed)
+    _leaflet_ready = False  # Set once the Leaflet files are known to be in static/
     
-    def check_gps_status(self):
-        """Check current GPS status and satellite information"""
-        if self.simulate_var.get():
-            self.log("📊 GPS Status: Simulation mode - showing fake Montreal location")
-            return
+    def __init__(self):
+        self.root = tk.Tk()
+        self.root.title("GPS Waveshare L76X HAT - Live Map Controller")
+        self.root.geometry("600x500")
+        self.root.resizable(True, True)
         
-        if not serial:
-            self.log("❌ PySerial not available for GPS status check")
-            return
+        # Log lines not yet inserted into log_text
+        self._log_buf = []
+        self._log_last_flush = 0.0
+        self._log_flush_pending = False
+        # (callable, args) posted by worker threads, run on the Tk thread
+        self._ui_q = queue.SimpleQueue()
+        # Set to cancel the running offgrid import; None when idle
+        self._tile_cancel = None
         
-        self.log("📊 Checking GPS status...")
+        # GPS and server components
+        self.gps_reader = None
+        self.server = None
+        self.server_thread = None
+        self.is_running = False
         
-        try:
-            with serial.Serial(self.device_var.get(), int(self.baud_var.get()), timeout=1) as ser:
-                start_time = time.time()
-                has_data = False
-                satellites = 0
-                fix_status = "No Fix"
-                
-                while (time.time() - start_time) < 10:
-                    line = ser.readline().decode('ascii', errors='ignore').strip()
-                    if line:
-                        has_data = True
-                        
-                        if '$GPRMC' in line or '$GNRMC' in line:
-                            parts = line.split(',')
-                            if len(parts) > 2:
-                                status = parts[2]
-                                if status == 'A':
-                                    fix_status = "✅ GPS HAS FIX!"
-                                    if len(parts) > 5:
-                                        lat_raw, lat_dir = parts[3], parts[4]
-                                        lon_raw, lon_dir = parts[5], parts[6]
-                                        self.log(f"📍 Position: {lat_raw} {lat_dir}, {lon_raw} {lon_dir}")
-                                else:
-                                    fix_status = "⏳ Searching for satellites..."
-                        
-                        elif '$GPGGA' in line or '$GNGGA' in line:
-                            parts = line.split(',')
-                            if len(parts) > 7 and parts[7]:
-                                satellites = int(parts[7])
-                                self.log(f"🛰️ Satellites in use: {satellites}")
-                        
-                        elif '$GPGSV' in line or '$GNGSV' in line:
-                            parts = line.split(',')
-                            if len(parts) > 3 and parts[3]:
-                                total_sats = parts[3]
-                                self.log(f"👁️ Satellites in view: {total_sats}")
-                
-                if not has_data:
-                    self.log("❌ No GPS data received - check hardware connection")
-                    status_msg = "No GPS communication detected.\nCheck hardware connection."
-                else:
-                    status_msg = f"GPS Status: {fix_status}\nSatellites in use: {satellites}\n"
-                    if satellites == 0:
-                        status_msg += "\nTips:\n• Go outdoors\n• Wait 2-5 minutes\n• Check antenna connection"
-                    elif satellites < 4:
-                        status_msg += "\nNeed 4+ satellites for fix.\nWait a bit longer..."
-                    else:
-                        status_msg += "\nGood satellite coverage!"
-                
-                if GUI_AVAILABLE:
-                    messagebox.showinfo("GPS Status", status_msg)
-                
-        except Exception as e:
-            self.log(f"❌ GPS Status check error: {e}")
-            if GUI_AVAILABLE:
-                messagebox.showerror("GPS Status Error", f"Failed to check GPS status:\n{e}")
+        # Configuration
+        self.device = '/dev/ttyAMA0'  # Fixed: L76X HAT uses ttyAMA0, not serial0
+        self.baud = 9600
+        self.host = 'localhost'
+        self.port = 5000
+        self.simulate = False
+        
+        self.setup_ui()
+        self.start_status_updates()
     
-    def show_raw_gps_data(self):
-        """Show raw NMEA data in a popup window"""
-        if self.simulate_var.get():
-            self.log("📡 Raw GPS Data: Not available in simulation mode")
-            return
+    def setup_ui(self):
+        """Setup the user interface"""
+        # Main frame
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
-        if not serial:
-            self.log("❌ PySerial not available for raw data display")
-            return
+        # Title
+        title_label = ttk.Label(main_frame, text="GPS Waveshare L76X HAT Controller", 
+                               font=('Arial', 16, 'bold'))
+        title_label.grid(row=0, column=0, columnspan=2, pady=(0, 20))
         
-        # Create popup window for raw data
-        raw_window = tk.Toplevel(self.root)
-        raw_window.title("Raw GPS Data (NMEA)")
-        raw_window.geometry("800x400")
+        # Configuration frame
+        config_frame = ttk.LabelFrame(main_frame, text="Configuration", padding="10")
+        config_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
-        # Text area for raw data
-        raw_text = tk.Text(raw_window, wrap=tk.WORD, font=('Courier', 9))
-        scrollbar = ttk.Scrollbar(raw_window, orient="vertical", command=raw_text.yview)
-        raw_text.configure(yscrollcommand=scrollbar.set)
+        # Device settings
+        ttk.Label(config_frame, text="GPS Device:").grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        self.device_var = tk.StringVar(value=self.device)
+        device_entry = ttk.Entry(config_frame, textvariable=self.device_var, width=20)
+        device_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 20))
         
-        raw_text.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        ttk.Label(config_frame, text="Baud Rate:").grid(row=0, column=2, sticky=tk.W, padx=(0, 10))
+        self.baud_var = tk.StringVar(value=str(self.baud))
+        baud_entry = ttk.Entry(config_frame, textvariable=self.baud_var, width=10)
+        baud_entry.grid(row=0, column=3, sticky=tk.W)
         
-        # Control frame
-        control_frame = ttk.Frame(raw_window)
-        control_frame.pack(side="bottom", fill="x", padx=5, pady=5)
+        # Port settings
+        ttk.Label(config_frame, text="Web Port:").grid(row=1, column=0, sticky=tk.W, padx=(0, 10))
+        self.port_var = tk.StringVar(value=str(self.port))
+        port_entry = ttk.Entry(config_frame, textvariable=self.port_var, width=10)
+        port_entry.grid(row=1, column=1, sticky=tk.W, padx=(0, 20))
         
-        is_running = [True]  # Use list to allow modification in nested function
+        # Simulation mode
+        self.simulate_var = tk.BooleanVar()
+        simulate_check = ttk.Checkbutton(config_frame, text="Simulation Mode", 
+                                        variable=self.simulate_var)
+        simulate_check.grid(row=1, column=2, columnspan=2, sticky=tk.W, padx=(0, 10))
         
-        def stop_raw_data():
-            is_running[0] = False
-            raw_window.destroy()
+        # City assistance field
+        ttk.Label(config_frame, text="City for GPS Assist:").grid(row=2, column=0, sticky=tk.W, padx=(0, 10))
+        self.city_var = tk.StringVar(value="")  # Empty by default - users enter manually
+        city_entry = ttk.Entry(config_frame, textvariable=self.city_var, width=30)
+        city_entry.grid(row=2, column=1, columnspan=2, sticky=(tk.W, tk.E), padx=(0, 20))
         
-        ttk.Button(control_frame, text="Stop", command=stop_raw_data).pack(side="left")
-        ttk.Label(control_frame, text="Showing live NMEA data from GPS...").pack(side="left", padx=10)
+        # Help text
+        help_label = ttk.Label(config_frame, text="(e.g., Tokyo, Japan or New York, USA)", 
+                              font=('Arial', 8), foreground="gray")
+        help_label.grid(row=2, column=3, sticky=tk.W)
         
-        def read_raw_data():
-            try:
-                with serial.Serial(self.device_var.get(), int(self.baud_var.get()), timeout=1) as ser:
-                    line_count = 0
-                    while is_running[0] and line_count < 200:  # Limit to prevent memory issues
-                        try:
-                            line = ser.readline().decode('ascii', errors='ignore').strip()
-                            if line and is_running[0]:
-                                timestamp = time.strftime("%H:%M:%S")
-                                raw_text.insert(tk.END, f"[{timestamp}] {line}\n")
-                                raw_text.see(tk.END)
-                                raw_window.update_idletasks()
-                                line_count += 1
-                        except:
-                            break
-                    
-                    if line_count == 0:
-                        raw_text.insert(tk.END, "No GPS data received.\nCheck hardware connection.\n")
-                    elif line_count >= 200:
-                        raw_text.insert(tk.END, "\n--- Stopped after 200 lines ---\n")
-                        
-            except Exception as e:
-                raw_text.insert(tk.END, f"Error reading GPS data: {e}\n")
+        # Control buttons frame
+        control_frame = ttk.LabelFrame(main_frame, text="GPS Control", padding="10")
+        control_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
-        # Start reading in a separate thread
-        threading.Thread(target=read_raw_data, daemon=True).start()
+        # Control buttons
+        self.start_btn = ttk.Button(control_frame, text="Start GPS & Server", 
+                                   command=self.start_gps_server)
+        self.start_btn.grid(row=0, column=0, padx=(0, 10), pady=5)
         
-        self.log("📡 Opened raw GPS data window")
-    
-    def open_saved_map_dialog_listbox(self):
-        """Open a dialog to choose a saved area and open the offline map centered on it (Listbox version)."""
-        try:
-            areas = _load_areas()
-            win = tk.Toplevel(self.root)
-            win.title("Load Saved Map")
-            win.geometry("560x360")
-            win.transient(self.root)
-            win.grab_set()
-
-            frame = ttk.Frame(win, padding=6)
-            frame.pack(fill="both", expand=True)
-
-            listbox = tk.Listbox(frame, height=12, exportselection=False)
-            listbox.pack(side="left", fill="both", expand=True)
-            sb = ttk.Scrollbar(frame, orient="vertical", command=listbox.yview)
-            sb.pack(side="right", fill="y")
-            listbox.configure(yscrollcommand=sb.set)
-
-            names = []
-            if not areas:
-                listbox.insert(tk.END, "(no saved areas found – use Offline Import to Save one)")
-                listbox.config(state="disabled")
-            else:
-                for a in areas:
-                    name = a.get('name') or "(unnamed)"
-                    bbox = a.get('bbox')
-                    desc = name
-                    if isinstance(bbox, list) and len(bbox) == 4:
-                        desc += f"  —  bbox: {bbox[0]:.4f},{bbox[1]:.4f},{bbox[2]:.4f},{bbox[3]:.4f}"
-                    zs = a.get('zooms') or []
-                    if isinstance(zs, list) and zs:
-                        desc += "  z:[" + ",".join(str(z) for z in zs) + "]"
-                    listbox.insert(tk.END, desc)
-                    names.append(a)
-
-            def ensure_running():
-                if not self.is_running:
-                    try:
-                        self.start_gps_server()
-                    except Exception:
-                        pass
-
-            def open_selected():
-                if not names:
-                    return
-                idxs = listbox.curselection()
-                if not idxs:
-                    messagebox.showinfo("Load Saved Map", "Select an area first.")
-                    return
-                sel = names[idxs[0]]
-                bbox = sel.get('bbox')
-                if not bbox or not isinstance(bbox, list) or len(bbox) != 4:
-                    messagebox.showerror("Load Saved Map", "Selected entry has no valid bbox.")
-                    return
-                ensure_running()
-                url = f"http://{self.host}:{self.port}/offline?bbox=" + ",".join(str(x) for x in bbox)
-                self.log(f"Opening offline map for saved area '{sel.get('name','')}' -> {url}")
-                webbrowser.open(url)
-                win.destroy()
-
-            def delete_selected():
-                if not names:
-                    return
-                idxs = listbox.curselection()
-                if not idxs:
-                    messagebox.showinfo("Delete Saved", "Select an entry to delete.")
-                    return
-                sel = names[idxs[0]]
-                if messagebox.askyesno("Delete Saved", f"Delete saved area '{sel.get('name','')}'? This cannot be undone."):
-                    remain = [a for i, a in enumerate(names) if i != idxs[0]]
-                    if _save_areas(remain):
-                        self.log("Deleted selected saved area.")
-                        win.destroy()
-                        self.open_saved_map_dialog_listbox()
-                    else:
-                        messagebox.showerror("Delete Saved", "Failed to save changes.")
-
-            def _dbl_open(e=None):
-                open_selected()
-                return "break"
-            listbox.bind("<Double-Button-1>", _dbl_open)
-            listbox.bind("<Return>", _dbl_open)
-
-            btns = ttk.Frame(win)
-            btns.pack(fill="x", pady=(8,0))
-            ttk.Button(btns, text="Open Offline Map", command=open_selected).pack(side="left")
-            ttk.Button(btns, text="Delete Selected", command=delete_selected).pack(side="right")
-
-        except Exception as e:
-            self.log(f"Load Saved Map error: {e}")
-            if GUI_AVAILABLE:
-                messagebox.showerror("Load Saved Map", f"An error occurred:\n{e}")
-
-    def show_instructions_old(self):
-        """Show comprehensive instructions and function benefits"""
-        # Create instructions window
-        instructions_window = tk.Toplevel(self.root)
-        instructions_window.title("📖 GPS Application Instructions & Function Benefits")
-        instructions_window.geometry("900x700")
-        instructions_window.resizable(True, True)
+        self.stop_btn = ttk.Button(control_frame, text="Stop GPS & Server", 
+                                  command=self.stop_gps_server, state="disabled")
+        self.stop_btn.grid(row=0, column=1, padx=(0, 10), pady=5)
+        
+        self.open_map_btn = ttk.Button(control_frame, text="Open Live Map", 
+                                      command=self.open_map, state="disabled")
+        self.open_map_btn.grid(row=0, column=2, padx=(0, 10), pady=5)
+        
+        # Emergency stop button (always enabled)
+        self.force_stop_btn = ttk.Button(control_frame, text="Force Stop All", 
+                                        command=self.force_stop_all)
+        self.force_stop_btn.grid(row=0, column=3, padx=(0, 10), pady=5)
+        
+        # Offline import (area selector)
+        self.offline_import_btn = ttk.Button(control_frame, text="Offline Import", 
+                                            command=self.open_area_selector)
+        self.offline_import_btn.grid(row=0, column=4, padx=(0, 10), pady=5)
+        
+        # Load saved map dialog
+        self.load_saved_btn = ttk.Button(control_frame, text="Load Saved Map", 
+                                         command=self.open_saved_map_dialog_listbox)
+        self.load_saved_btn.grid(row=0, column=5, padx=(0, 10), pady=5)
         
-        # Create notebook for tabs
-        notebook = ttk.Notebook(instructions_window)
-        notebook.pack(fill="both", expand=True, padx=10, pady=10)
+        # Diagnostic buttons
+        diag_btn = ttk.Button(control_frame, text="Run Diagnostics", 
+                             command=self.run_diagnostics)
+        diag_btn.grid(row=1, column=0, padx=(0, 10), pady=5)
         
-        # Tab 1: Quick Start Guide
-        quick_start_frame = ttk.Frame(notebook)
-        notebook.add(quick_start_frame, text="🚀 Quick Start")
+        restart_btn = ttk.Button(control_frame, text="Restart GPS Service", 
+                               command=self.restart_gps_service)
+        restart_btn.grid(row=1, column=1, padx=(0, 10), pady=5)
         
-        quick_start_text = tk.Text(quick_start_frame, wrap=tk.WORD, font=('Arial', 10))
-        quick_start_scroll = ttk.Scrollbar(quick_start_frame, orient="vertical", command=quick_start_text.yview)
-        quick_start_text.configure(yscrollcommand=quick_start_scroll.set)
+        # GPS Assistance buttons
+        assist_btn = ttk.Button(control_frame, text="GPS Assist (A-GPS)", 
+                               command=self.gps_assist)
+        assist_btn.grid(row=1, column=2, padx=(0, 10), pady=5)
         
-        quick_start_content = """🚀 QUICK START GUIDE - GPS Waveshare L76X HAT
-
-📋 BEFORE YOU BEGIN:
-• Ensure GPS HAT is properly connected to Raspberry Pi GPIO pins
-• Connect GPS antenna to the HAT (essential for GPS reception)
-• Make sure you're OUTDOORS with clear sky view (GPS won't work indoors!)
-
-⚡ GETTING STARTED (5 Easy Steps):
-
-1️⃣ ENTER YOUR CITY
-   • In "City for GPS Assist" field, enter your location
-   • Examples: "Tokyo, Japan", "London, UK", "New York, USA"
-   • This dramatically speeds up GPS acquisition (30-60 seconds vs 15+ minutes!)
-
-2️⃣ START THE GPS SYSTEM
-   • Click "Start GPS & Server" button
-   • Wait for "GPS and web server started successfully!" message
-   • Status should show "Server Status: Running"
-
-3️⃣ USE GPS ASSISTANCE (RECOMMENDED)
-   • Click "GPS Assist (A-GPS)" button
-   • This sends your city coordinates to GPS for faster satellite lock
-   • Essential for quick GPS acquisition!
-
-4️⃣ GO OUTDOORS & WAIT
-   • GPS MUST be used outdoors with clear sky view
-   • Wait 30-60 seconds (with GPS Assist) or 2-15 minutes (without)
-   • Watch "GPS Status" for "GPS Fix: Valid" (green text)
-
-5️⃣ VIEW YOUR LOCATION
-   • Click "Open Live Map" to see real-time location
-   • Watch yourself move on the interactive map!
-   • Speed and coordinates update automatically
-
-🎯 SUCCESS INDICATORS:
-✅ "GPS Fix: Valid" (green) - GPS is working!
-✅ Latitude/Longitude showing numbers - coordinates acquired
-✅ Live map shows your actual location - ready to use!
-
-⚠️ TROUBLESHOOTING:
-❌ "GPS Fix: No Fix" (red) - Go outdoors, wait longer, use GPS Assist
-❌ No coordinates - Check antenna connection, ensure outdoors
-❌ Can't start - Click "Force Stop All", then try again
-"""
+        status_btn = ttk.Button(control_frame, text="Check GPS Status", 
+                               command=self.check_gps_status)
+        status_btn.grid(row=2, column=0, padx=(0, 10), pady=5)
         
-        quick_start_text.insert("1.0", quick_start_content)
-        quick_start_text.config(state="disabled")
-        quick_start_text.pack(side="left", fill="both", expand=True)
-        quick_start_scroll.pack(side="right", fill="y")
+        raw_data_btn = ttk.Button(control_frame, text="Show Raw GPS Data", 
+                                 command=self.show_raw_gps_data)
+        raw_data_btn.grid(row=2, column=1, padx=(0, 10), pady=5)
         
-        # Tab 2: Function Benefits
-        functions_frame = ttk.Frame(notebook)
-        notebook.add(functions_frame, text="🔧 Function Benefits")
+        # Instructions button
+        instructions_btn = ttk.Button(control_frame, text="📖 Instructions (Updated)", 
+                                     command=self.show_instructions)
+        instructions_btn.grid(row=2, column=2, padx=(0, 10), pady=5)
         
-        functions_text = tk.Text(functions_frame, wrap=tk.WORD, font=('Arial', 10))
-        functions_scroll = ttk.Scrollbar(functions_frame, orient="vertical", command=functions_text.yview)
-        functions_text.configure(yscrollcommand=functions_scroll.set)
+        # Offline maps panel removed per new workflow
         
-        functions_content = """🔧 FUNCTION BENEFITS & DETAILED EXPLANATIONS
-
-🎛️ CONFIGURATION SECTION:
-
-📍 City for GPS Assist:
-   BENEFIT: Reduces GPS acquisition time from 15+ minutes to 30-60 seconds
-   HOW IT WORKS: Sends approximate coordinates to GPS module for faster satellite lock
-   RESILIENCE: 3-tier fallback system (City → IP location → Montreal fallback)
-   GLOBAL: Works worldwide - enter any city (Tokyo, London, Cairo, etc.)
-
-🔧 Simulation Mode:
-   BENEFIT: Test application without GPS hardware
-   EDUCATIONAL: Learn GPS concepts with simulated Montreal coordinates
-   DEVELOPMENT: Perfect for indoor testing and demonstrations
-
-⚙️ CONTROL FUNCTIONS:
-
-🚀 Start GPS & Server:
-   BENEFIT: Activates GPS reader and web server simultaneously
-   CREATES: Real-time GPS data stream and web interface
-   ENABLES: Live map viewing and coordinate tracking
-
-🛑 Stop GPS & Server:
-   BENEFIT: Clean shutdown of all GPS processes
-   SAFETY: Properly closes serial connections and web server
-   RESOURCE: Frees system resources when done
-
-🌐 Open Live Map:
-   BENEFIT: Interactive real-time GPS visualization
-   FEATURES: Pulsing location marker, speed display, coordinate tracking
-   EDUCATIONAL: Visual understanding of GPS positioning and movement
-
-🆘 Force Stop All:
-   BENEFIT: Emergency recovery from stuck processes
-   RESILIENCE: Always available even when normal stop fails
-   TROUBLESHOOTING: Kills all GPS processes and resets application state
-
-🔍 DIAGNOSTIC FUNCTIONS:
-
-🏥 Run Diagnostics:
-   BENEFIT: Comprehensive system health check
-   CHECKS: Hardware detection, permissions, UART config, conflicting services
-   EDUCATIONAL: Learn about GPS system requirements and configuration
-
-🔄 Restart GPS Service:
-   BENEFIT: Fixes GPS communication issues
-   RESOLVES: Serial port conflicts, stuck GPS states
-   REQUIRES: Sudo privileges for system service management
-
-🛰️ GPS Assist (A-GPS):
-   BENEFIT: Assisted GPS for 95% faster satellite acquisition
-   TECHNOLOGY: Sends location hints and satellite constellation data
-   RESILIENCE: Works in challenging conditions (urban, cloudy weather)
-   GLOBAL: Uses your city input for worldwide compatibility
-
-📊 Check GPS Status:
-   BENEFIT: Real-time satellite and fix information
-   DISPLAYS: Satellite count, fix status, signal quality
-   EDUCATIONAL: Understand GPS signal acquisition process
-   TROUBLESHOOTING: Diagnose GPS reception issues
-
-📡 Show Raw GPS Data:
-   BENEFIT: View live NMEA sentences from GPS module
-   EDUCATIONAL: Learn GPS communication protocol (NMEA 0183)
-   DEBUGGING: See actual GPS data stream for troubleshooting
-   TECHNICAL: Understand $GPRMC, $GPGGA, $GPGSV sentence formats
-
-📖 Instructions:
-   BENEFIT: Comprehensive help system (this window!)
-   EDUCATIONAL: Complete learning resource for GPS technology
-   REFERENCE: Always available guidance for all functions
-
-🎯 STATUS MONITORING:
+        # Status frame
+        status_frame = ttk.LabelFrame(main_frame, text="GPS Status", padding="10")
+        status_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        # Status labels
+        self.status_labels = {}
+        self._status_shown = {}  # key -> (text, foreground) last applied by update_status
+        status_items = [
+            ('Server Status:', 'server_status'),
+            ('GPS Status:', 'gps_status'),
+            ('GPS Fix:', 'gps_fix'),
+            ('Latitude:', 'latitude'),
+            ('Longitude:', 'longitude'),
+            ('Speed (km/h):', 'speed'),
+            ('Last Update:', 'last_update')
+        ]
+        
+        for i, (label, key) in enumerate(status_items):
+            ttk.Label(status_frame, text=label).grid(row=i, column=0, sticky=tk.W, padx=(0, 10))
+            self.status_labels[key] = ttk.Label(status_frame, text="N/A", foreground="gray")
+            self.status_labels[key].grid(row=i, column=1, sticky=tk.W)
+        
+        # Log frame
+        log_frame = ttk.LabelFrame(main_frame, text="System Log", padding="10")
+        log_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        
+        # Log text area
+        self.log_text = tk.Text(log_frame, height=8, width=70, wrap=tk.WORD)
+        log_scrollbar = ttk.Scrollbar(log_frame, orient="vertical", command=self.log_text.yview)
+        self.log_text.configure(yscrollcommand=log_scrollbar.set)
+        
+        self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        log_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        # Configure grid weights
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        main_frame.rowconfigure(4, weight=1)
+        config_frame.columnconfigure(1, weight=1)
+        log_frame.columnconfigure(0, weight=1)
+        log_frame.rowconfigure(0, weight=1)
+        
+        self.log("GPS Controller initialized. Ready to start.")
+        # Offline cache init removed per new workflow
+    
+    def log(self, message):
+        """Add message to log (safe to call from worker threads)"""
+        if threading.current_thread() is not threading.main_thread():
+            self._ui_q.put((self.log, (message,)))
+            return
+        timestamp = _timestamps()[0][11:]
+        self._log_buf.append(f"[{timestamp}] {message}\n")
+        # Redraw at most every LOG_FLUSH_INTERVAL; bursts are batched into one insert.
+        # Flushing inline (not only via after) keeps logs live during blocking actions.
+        if time.monotonic() - self._log_last_flush >= self.LOG_FLUSH_INTERVAL:
+            self._flush_log()
+        elif not self._log_flush_pending:
+            self._log_flush_pending = True
+            self.root.after(int(self.LOG_FLUSH_INTERVAL * 1000), self._flush_log)
+
+    def _flush_log(self):
+        self._log_flush_pending = False
+        if not self._log_buf:
+            return
+        self.log_text.insert(tk.END, ''.join(self._log_buf))
+        self._log_buf.clear()
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - self.LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+        self.log_text.see(tk.END)
+        self.root.update_idletasks()
+        self._log_last_flush = time.monotonic()
+    
+    def start_gps_server(self):
+        """Start GPS reader and web server"""
+        if self.is_running:
+            return
+        
+        try:
+            # Get configuration values
+            self.device = self.device_var.get()
+            self.baud = int(self.baud_var.get())
+            self.port = int(self.port_var.get())
+            self.simulate = self.simulate_var.get()
+            
+            self.log(f"Starting GPS reader (Device: {self.device}, Baud: {self.baud}, Simulate: {self.simulate})")
+            
+            # Start GPS reader
+            self.gps_reader = GPSReader(device=self.device, baud=self.baud, simulate=self.simulate)
+            self.gps_reader.start()
+            
+            # Start web server
+            self.log(f"Starting web server on port {self.port}")
+            self.server = MapHTTPServer((self.host, self.port), RequestHandler)
+            setattr(self.server, 'gps_reader', self.gps_reader)
+            
+            # Run server in separate thread
+            self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+            self.server_thread.start()
+            
+            self.is_running = True
+            
+            # Update button states
+            self.start_btn.config(state="disabled")
+            self.stop_btn.config(state="normal")
+            self.open_map_btn.config(state="normal")
+            
+            self.log(f"GPS and web server started successfully!")
+            self.log(f"Access the live map at: http://{self.host}:{self.port}")
+            
+            # Check for pyserial if not simulating
+            if not self.simulate and serial is None:
+                self.log("WARNING: pyserial is not installed. Install with: pip3 install pyserial")
+                if GUI_AVAILABLE:
+                    messagebox.showwarning("Warning", "PySerial is not installed.\nInstall with: pip3 install pyserial")
+            
+        except Exception as e:
+            self.log(f"Error starting GPS/Server: {e}")
+            if GUI_AVAILABLE:
+                messagebox.showerror("Error", f"Failed to start GPS/Server:\n{e}")
+            self.stop_gps_server()
+    
+    def stop_gps_server(self):
+        """Stop GPS reader and web server"""
+        if not self.is_running:
+            return
 
-📈 GPS Status Panel:
-   BENEFIT: Real-time system monitoring
-   DISPLAYS: Server status, GPS fix, coordinates, speed, last update
-   COLOR-CODED: Green (good), Red (problem), Orange (warning)
-   EDUCATIONAL: Understand GPS system states and data quality
+        self.log("Stopping GPS and web server...")
 
-📝 System Log:
-   BENEFIT: Detailed activity tracking and troubleshooting
-   RECORDS: All GPS operations, errors, and status changes
-   DEBUGGING: Trace problems and understand system behavior
-   LEARNING: See exactly what happens during GPS operations
+        # Stop GPS reader and wait for the serial port to be fully released
+        if self.gps_reader:
+            self.gps_reader.stop()
+            self.gps_reader.join(timeout=3.0)  # wait for thread to exit and close the port
+            self.gps_reader = None
 
-🌍 GLOBAL COMPATIBILITY:
-• Works in any country worldwide
-• Supports any city name for GPS assistance
-• Automatic timezone and coordinate system handling
-• Multi-constellation support (GPS, GLONASS, Galileo)
-"""
+        # Stop web server and close the listening socket
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
         
-        functions_text.insert("1.0", functions_content)
-        functions_text.config(state="disabled")
-        functions_text.pack(side="left", fill="both", expand=True)
-        functions_scroll.pack(side="right", fill="y")
+        self.is_running = False
         
-        # Tab 3: Technical Details
-        technical_frame = ttk.Frame(notebook)
-        notebook.add(technical_frame, text="🔬 Technical Details")
+        # Update button states
+        self.start_btn.config(state="normal")
+        self.stop_btn.config(state="disabled")
+        self.open_map_btn.config(state="disabled")
         
-        technical_text = tk.Text(technical_frame, wrap=tk.WORD, font=('Arial', 10))
-        technical_scroll = ttk.Scrollbar(technical_frame, orient="vertical", command=technical_text.yview)
-        technical_text.configure(yscrollcommand=technical_scroll.set)
+        self.log("GPS and web server stopped.")
+    
+    def force_stop_all(self):
+        """Force stop all GPS processes and reset state"""
+        self.log("🛑 Force stopping all GPS processes...")
         
-        technical_content = """🔬 TECHNICAL DETAILS & GPS SCIENCE
-
-🛰️ GPS TECHNOLOGY OVERVIEW:
-
-📡 How GPS Works:
-   • 24+ satellites orbiting Earth at 20,200 km altitude
-   • Each satellite broadcasts time and position signals
-   • GPS receiver calculates position using 4+ satellite signals
-   • Triangulation determines exact latitude, longitude, altitude
-
-⏱️ GPS Acquisition Process:
-   COLD START: 15+ minutes (no assistance data)
-   WARM START: 2-5 minutes (some satellite data cached)
-   HOT START: 30-60 seconds (recent satellite data available)
-   A-GPS: 30-60 seconds (assisted with location hints)
-
-🔧 WAVESHARE L76X HAT SPECIFICATIONS:
-
-📊 Technical Specs:
-   • Chip: Quectel L76X GPS module
-   • Constellations: GPS, GLONASS, Galileo
-   • Channels: 33 tracking, 99 acquisition
-   • Sensitivity: -165 dBm (tracking), -148 dBm (acquisition)
-   • Accuracy: 2.5m CEP (Circular Error Probable)
-   • Update Rate: 1Hz (configurable up to 10Hz)
-   • Communication: UART at 9600 baud (default)
-
-🔌 Hardware Interface:
-   • Device: /dev/ttyAMA0 (Raspberry Pi UART)
-   • Protocol: NMEA 0183 standard
-   ��� Power: 3.3V from GPIO pins
-   • Antenna: External active antenna required
-
-📋 NMEA SENTENCE FORMATS:
-
-$GPRMC (Recommended Minimum):
-   • Position, speed, course, date/time
-   • Status: A=Active (valid), V=Void (invalid)
-   • Most important sentence for basic positioning
-
-$GPGGA (Global Positioning System Fix Data):
-   • Position, altitude, satellite count, HDOP
-   • Fix quality indicator (0=invalid, 1=GPS, 2=DGPS)
-   • Essential for 3D positioning
-
-$GPGSV (Satellites in View):
-   • Satellite count, signal strength (SNR)
-   • Satellite identification numbers
-   • Useful for signal quality assessment
-
-🌐 COORDINATE SYSTEMS:
-
-📍 WGS84 Datum:
-   • World Geodetic System 1984
-   • Global standard for GPS coordinates
-   • Latitude: -90° to +90° (South to North)
-   • Longitude: -180° to +180° (West to East)
-
-🎯 Accuracy Factors:
-   HDOP (Horizontal Dilution of Precision): <2 = Excellent, 2-5 = Good, >5 = Poor
-   Satellite Count: 4+ required for 2D fix, 5+ for 3D fix with altitude
-   Signal Strength: >35 dBHz = Strong, 25-35 = Moderate, <25 = Weak
-
-⚡ A-GPS TECHNOLOGY:
-
-🚀 Assisted GPS Benefits:
-   • Downloads satellite orbital data (ephemeris) from internet
-   • Provides approximate location for faster satellite search
-   • Reduces Time To First Fix (TTFF) by 95%
-   • Works better in challenging environments (urban canyons)
-
-🔄 Implementation:
-   • City geocoding via OpenStreetMap Nominatim API
-   • IP geolocation fallback via ipapi.co
-   • PMTK commands sent to L76X module:
-     - $PMTK351: Set approximate position
-     - $PMTK353: Enable multi-constellation
-     - $PMTK220: Set update rate
-     - $PMTK101: Hot restart with assistance
-
-🌍 GLOBAL COMPATIBILITY:
-
-🗺️ Worldwide Operation:
-   • Works in all countries and territories
-   • Automatic coordinate system handling
-   • Multi-language city name support
-   • Timezone-independent operation
-
-🛰️ Satellite Constellations:
-   GPS (USA): 31 satellites, global coverage
-   GLONASS (Russia): 24 satellites, enhanced polar coverage
-   Galileo (EU): 22+ satellites, improved accuracy
-   Combined: Better coverage, faster acquisition, higher accuracy
-
-🔧 TROUBLESHOOTING TECHNICAL ISSUES:
-
-⚠️ Common Problems:
-   • Indoor use: GPS signals cannot penetrate buildings
-   • Antenna issues: Poor connection or damaged antenna
-   • Serial conflicts: Bluetooth using same UART port
-   • Permissions: User not in dialout group
-   • UART disabled: enable_uart=1 not set in config.txt
-
-🔍 Diagnostic Commands:
-   • lsof /dev/ttyAMA0: Check port usage
-   • dmesg | grep uart: Check UART initialization
-   • stty -F /dev/ttyAMA0: Configure serial port
-   • systemctl status bluetooth: Check conflicting services
-
-📚 EDUCATIONAL VALUE:
+        try:
+            # Kill any python processes running Main.py
+            subprocess.run(['pkill', '-f', 'python3.*Main.py'], capture_output=True)
+            self.log("✅ Killed any running Main.py processes")
+            
+            # Kill processes using port 5000
+            subprocess.run(['sudo', 'fuser', '-k', '5000/tcp'], capture_output=True)
+            self.log("✅ Freed port 5000")
+            
+            # Stop our internal processes
+            if self.gps_reader:
+                self.gps_reader.stop()
+                self.gps_reader.join(timeout=3.0)  # wait for serial port release
+                self.gps_reader = None
+                self.log("✅ Stopped GPS reader thread")
 
-🎓 Learning Outcomes:
-   • Understand GPS satellite technology
-   • Learn NMEA protocol and data parsing
-   • Experience real-time data processing
-   • Explore coordinate systems and mapping
-   • Practice hardware interfacing and troubleshooting
-   • Gain experience with serial communication
-   • Understand the importance of location services in modern technology
-"""
+            if self.server:
+                try:
+                    self.server.shutdown()
+                    self.server.server_close()
+                except Exception:
+                    pass
+                self.server = None
+                self.log("✅ Stopped web server")
+            
+            # Reset state
+            self.is_running = False
+            
+            # Update button states
+            self.start_btn.config(state="normal")
+            self.stop_btn.config(state="disabled")
+            self.open_map_btn.config(state="disabled")
+            
+            self.log("✅ Force stop completed - all processes terminated")
+            
+            if GUI_AVAILABLE:
+                messagebox.showinfo("Force Stop", "All GPS processes have been forcefully stopped.\nYou can now start fresh.")
+                
+        except Exception as e:
+            self.log(f"❌ Error during force stop: {e}")
+            # Even if there's an error, reset the GUI state
+            self.is_running = False
+            self.start_btn.config(state="normal")
+            self.stop_btn.config(state="disabled")
+            self.open_map_btn.config(state="disabled")
+    
+    def open_map(self):
+        """Open the live map in web browser"""
+        if self.is_running:
+            url = f"http://{self.host}:{self.port}"
+            self.log(f"Opening live map: {url}")
+            webbrowser.open(url)
+        else:
+            if GUI_AVAILABLE:
+                messagebox.showwarning("Warning", "GPS server is not running. Start it first.")
+    
+    def run_diagnostics(self):
+        """Run system diagnostics"""
+        self.log("Running system diagnostics...")
+        
+        # Check pyserial
+        if serial is None:
+            self.log("❌ PySerial: NOT INSTALLED (pip3 install pyserial)")
+        else:
+            self.log("✅ PySerial: Available")
+        
+        # Check device file
+        if os.path.exists(self.device_var.get()):
+            self.log(f"✅ Device file: {self.device_var.get()} exists")
+            
+            # Check permissions
+            if os.access(self.device_var.get(), os.R_OK | os.W_OK):
+                self.log("✅ Device permissions: Read/Write access OK")
+            else:
+                self.log("❌ Device permissions: No read/write access")
+        else:
+            self.log(f"❌ Device file: {self.device_var.get()} not found")
+        
+        # Check if on Raspberry Pi (Pi 5 uses /boot/firmware/config.txt; Pi 4 uses /boot/config.txt)
+        config_paths = ['/boot/firmware/config.txt', '/boot/config.txt']
+        config_path = next((p for p in config_paths if os.path.exists(p)), None)
+        if config_path:
+            self.log(f"✅ Raspberry Pi: Detected (config: {config_path})")
+            try:
+                uart_enabled, bt_disabled = _boot_config_flags(config_path)
+                if uart_enabled:
+                    self.log("✅ UART: Enabled in config")
+                else:
+                    self.log(f"⚠️ UART: Not explicitly enabled — add 'dtparam=uart0=on' to {config_path}")
+                if bt_disabled:
+                    self.log("✅ Bluetooth: Disabled (good for GPS on ttyAMA0)")
+                else:
+                    self.log(f"⚠️ Bluetooth: Not disabled — add 'dtoverlay=disable-bt' to {config_path} to avoid UART conflict")
+            except Exception:
+                self.log(f"❌ UART: Cannot read {config_path}")
+        else:
+            self.log("ℹ️ Raspberry Pi: Not detected (may be running on other system)")
+        
+        # Check for conflicting services
+        try:
+            result = subprocess.run(['pgrep', 'gpsd'], capture_output=True)
+            if result.returncode == 0:
+                self.log("⚠️ GPSD: Running (may conflict with GPS access)")
+            else:
+                self.log("✅ GPSD: Not running")
+        except:
+            self.log("ℹ️ GPSD: Cannot check status")
+        
+        self.log("Diagnostics complete.")
+    
+    def restart_gps_service(self):
+        """Restart GPS-related services"""
+        if GUI_AVAILABLE and messagebox.askyesno("Confirm", "Restart GPS services? This requires sudo privileges."):
+            self.log("Restarting GPS services...")
+            try:
+                # Stop gpsd
+                subprocess.run(['sudo', 'systemctl', 'stop', 'gpsd'], capture_output=True)
+                subprocess.run(['sudo', 'killall', 'gpsd'], capture_output=True)
+                self.log("✅ Stopped GPSD service")
+                
+                # Reset serial device
+                if os.path.exists(self.device_var.get()):
+                    subprocess.run(['sudo', 'stty', '-F', self.device_var.get(), 'raw', '9600'], 
+                                 capture_output=True)
+                    self.log("✅ Reset serial device")
+                
+                if GUI_AVAILABLE:
+                    messagebox.showinfo("Success", "GPS services restarted successfully!")
+                
+            except Exception as e:
+                self.log(f"❌ Error restarting services: {e}")
+                if GUI_AVAILABLE:
+                    messagebox.showerror("Error", f"Failed to restart GPS services:\n{e}")
+    
+    def get_location_from_ip(self):
+        """Get approximate location from IP geolocation"""
+        if not REQUESTS_AVAILABLE:
+            return None, None, None
+        try:
+            response = _http_session().get('http://ipapi.co/json/', timeout=5)
+            data = response.json()
+            return data.get('latitude'), data.get('longitude'), data.get('city')
+        except:
+            return None, None, None
+    
+    def get_location_from_city(self, city_name):
+        """Get coordinates from city name using OpenStreetMap Nominatim API (cached)"""
+        if not city_name.strip():
+            return None, None, None
+        res = geocode_city(city_name.strip())
+        if not res:
+            return None, None, None
+        return res['lat'], res['lon'], res['display']
+    
+    def gps_assist(self):
+        """Send GPS assistance data to help with faster fix"""
+        if self.simulate_var.get():
+            self.log("GPS Assist not needed in simulation mode")
+            return
         
-        technical_text.insert("1.0", technical_content)
-        technical_text.config(state="disabled")
-        technical_text.pack(side="left", fill="both", expand=True)
-        technical_scroll.pack(side="right", fill="y")
+        if not serial:
+            self.log("❌ PySerial not available for GPS assistance")
+            return
         
-        # Tab 4: Troubleshooting
-        troubleshooting_frame = ttk.Frame(notebook)
-        notebook.add(troubleshooting_frame, text="🔧 Troubleshooting")
+        self.log("🛰️ Starting GPS Assistance (A-GPS)...")
         
-        troubleshooting_text = tk.Text(troubleshooting_frame, wrap=tk.WORD, font=('Arial', 10))
-        troubleshooting_scroll = ttk.Scrollbar(troubleshooting_frame, orient="vertical", command=troubleshooting_text.yview)
-        troubleshooting_text.configure(yscrollcommand=troubleshooting_scroll.set)
+        # Get location assistance - try city field first, then IP, then fallback
+        city_name = self.city_var.get().strip()
+        assist_lat, assist_lon, location_source = None, None, None
         
-        troubleshooting_content = """🔧 TROUBLESHOOTING GUIDE
-
-❌ PROBLEM: "No GPS Fix" or coordinates not appearing
-
-🔍 DIAGNOSIS STEPS:
-1. Check "GPS Status" panel - is it showing "No Fix" (red)?
-2. Look at System Log for error messages
-3. Verify you're OUTDOORS with clear sky view
-4. Check if GPS antenna is properly connected
-
-✅ SOLUTIONS:
-• Go outdoors - GPS CANNOT work indoors reliably
-• Wait 2-15 minutes for satellite acquisition
-• Use "GPS Assist (A-GPS)" with your city name
-• Click "Check GPS Status" to see satellite count
-• Try "Show Raw GPS Data" to verify GPS communication
-• Use "Run Diagnostics" to check hardware
-
-❌ PROBLEM: Cannot start GPS server
-
-🔍 DIAGNOSIS STEPS:
-1. Check System Log for specific error messages
-2. Look for "Permission denied" or "Device busy" errors
-3. Check if another process is using the GPS
-
-✅ SOLUTIONS:
-• Click "Force Stop All" to clear any stuck processes
-• Use "Run Diagnostics" to check for conflicts
-• Try "Restart GPS Service" to reset system services
-• Ensure user is in dialout group: sudo usermod -a -G dialout $USER
-• Reboot Raspberry Pi if problems persist
-
-❌ PROBLEM: GPS very slow to get first fix
-
-🔍 DIAGNOSIS STEPS:
-1. Check if you entered city in "City for GPS Assist"
-2. Verify you're outdoors with clear sky view
-3. Look at satellite count in "Check GPS Status"
-
-✅ SOLUTIONS:
-• Enter your city name (e.g., "Tokyo, Japan") for A-GPS
-• Click "GPS Assist (A-GPS)" to send location hints
-• Wait in open area away from buildings and trees
-• Check antenna connection is secure
-• Try different outdoor location with better sky view
-
-❌ PROBLEM: "Show Raw GPS Data" shows no data
-
-🔍 DIAGNOSIS STEPS:
-1. Check if GPS HAT is properly seated on GPIO pins
-2. Verify antenna is connected to GPS HAT
-3. Look for hardware detection in diagnostics
-
-✅ SOLUTIONS:
-• Power off Pi, reseat GPS HAT firmly on all GPIO pins
-• Check antenna connection to GPS HAT
-• Use "Run Diagnostics" to verify hardware detection
-• Try different antenna if available
-• Check for loose connections
-
-❌ PROBLEM: Live map not opening or showing location
-
-🔍 DIAGNOSIS STEPS:
-1. Check if GPS server is running (green status)
-2. Verify GPS has valid fix (coordinates showing)
-3. Check web browser and internet connection
-
-✅ SOLUTIONS:
-• Ensure "Start GPS & Server" was clicked first
-• Wait for GPS fix before opening map
-• Try different web browser
-• Check firewall settings (port 5000)
-• Manually navigate to http://localhost:5000
-
-❌ PROBLEM: Bluetooth conflicts with GPS
+        if city_name:
+            self.log(f"🔍 Looking up coordinates for: {city_name}")
+            city_lat, city_lon, display_name = self.get_location_from_city(city_name)
+            if city_lat and city_lon:
+                assist_lat, assist_lon = city_lat, city_lon
+                location_source = f"City lookup: {display_name}"
+                self.log(f"📍 {location_source} ({assist_lat:.4f}, {assist_lon:.4f})")
+        
+        if not assist_lat:
+            self.log("🌐 Trying IP-based location...")
+            ip_lat, ip_lon, ip_city = self.get_location_from_ip()
+            if ip_lat and ip_lon:
+                assist_lat, assist_lon = ip_lat, ip_lon
+                location_source = f"IP-based: {ip_city}"
+                self.log(f"📍 {location_source} ({assist_lat:.4f}, {assist_lon:.4f})")
+        
+        if not assist_lat:
+            assist_lat, assist_lon = 45.5017, -73.5673
+            location_source = "Fallback: Montreal, Canada"
+            self.log(f"📍 {location_source} ({assist_lat:.4f}, {assist_lon:.4f})")
+        
+        # Send assistance commands
+        commands = [
+            # Set approximate position
+            f"$PMTK351,1,{assist_lat:.6f},{assist_lon:.6f},0",
+            # Enable GPS+GLONASS+Galileo
+            "$PMTK353,1,1,1,0,0",
+            # Set 1Hz update rate
+            "$PMTK220,1000",
+            # Hot restart with assistance
+            "$PMTK101"
+        ]
 
-🔍 DIAGNOSIS STEPS:
-1. Check "Run Diagnostics" for Bluetooth service status
-2. Look for "Device busy" errors in System Log
-3. Check if /dev/serial0 is being used by Bluetooth
+        try:
+            reader = self.gps_reader
+            if reader is not None and not reader.simulate and reader.is_alive():
+                # The map server's reader already has the port open; hand it the commands
+                self.log(f"🔗 Sending through the running GPS reader on {reader.device}")
+                for cmd in commands:
+                    reader.send_nmea(nmea_command(cmd))
+                    time.sleep(0.1)
+                    self.log(f"📡 Sent: {cmd}")
+            else:
+                with serial.Serial(self.device_var.get(), int(self.baud_var.get()), timeout=1) as ser:
+                    self.log(f"🔗 Connected to {self.device_var.get()}")
+                    for cmd in commands:
+                        ser.write(nmea_command(cmd))
+                        time.sleep(0.1)
+                        self.log(f"📡 Sent: {cmd}")
+            
+            self.log("✅ GPS assistance data sent!")
+            self.log("⏳ GPS should acquire fix faster now. Wait 30-60 seconds...")
+            
+            if GUI_AVAILABLE:
+                messagebox.showinfo("GPS Assist", 
+                                  "GPS assistance data sent!\n\n"
+                                  "The GPS should now:\n"
+                                  "• Acquire satellites faster\n"
+                                  "• Get first fix in 30-60 seconds\n"
+                                  "• Work better in challenging conditions\n\n"
+                                  "Make sure you're outdoors with clear sky view!")
+                
+        except Exception as e:
+            self.log(f"❌ GPS Assist error: {e}")
+            if GUI_AVAILABLE:
+                messagebox.showerror("GPS Assist Error", f"Failed to send assistance data:\n{e}")
+    
+    def check_gps_status(self):
+        """Check current GPS status and satellite information"""
+        if self.simulate_var.get():
+            self.log("📊 GPS Status: Simulation mode - showing fake Montreal location")
+            return
+        
+        if not serial:
+            self.log("❌ PySerial not available for GPS status check")
+            return
+        
+        self.log("📊 Checking GPS status...")
+        
+        try:
+            with serial.Serial(self.device_var.get(), int(self.baud_var.get()), timeout=1) as ser:
+                start_time = time.time()
+                has_data = False
+                satellites = 0
+                fix_status = _FIX_NONE
+                
+                buf = bytearray()
+                while (time.time() - start_time) < 10:
+                    # Take everything the UART has buffered and handle each complete sentence in it
+                    chunk = ser.read(max(1, ser.in_waiting))
+                    if not chunk:
+                        continue
+                    buf += chunk
+                    lines = bytes(buf).split(b'\n')
+                    buf = bytearray(lines.pop())  # Trailing partial sentence
+                    for line in lines:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        has_data = True
+                        start = line.find(b'$')
+                        if start < 0:
+                            continue
+                        entry = _STATUS_DISPATCH.get(line[start:start + 6])
+                        if entry is None:
+                            continue
+                        kind, splits = entry
+                        parts = line[start:].split(b',', splits)
+
+                        if kind == 'rmc':
+                            if len(parts) > 2:
+                                if parts[2] == b'A':
+                                    fix_status = _FIX_OK
+                                    if len(parts) > 6:
+                                        lat_raw, lat_dir, lon_raw, lon_dir = (p.decode('ascii', errors='ignore') for p in parts[3:7])
+                                        self.log(f"📍 Position: {lat_raw} {lat_dir}, {lon_raw} {lon_dir}")
+                                else:
+                                    fix_status = _FIX_SEARCHING
 
-✅ SOLUTIONS:
-• Disable Bluetooth: sudo systemctl disable bluetooth
-• Stop Bluetooth service: sudo systemctl stop bluetooth
-• Add to /boot/firmware/config.txt: dtoverlay=disable-bt
-• Reboot after making changes
-• Use "Restart GPS Service" to reset serial port
+                        elif kind == 'gga':
+                            if len(parts) > 7 and parts[7]:
+                                satellites = int(parts[7])
+                                self.log(f"🛰️ Satellites in use: {satellites}")
 
-❌ PROBLEM: Permission denied errors
+                        else:
+                            if len(parts) > 3 and parts[3]:
+                                # Small vocabulary ("08", "12", ...): share one string per count
+                                total_sats = parts[3].decode('ascii', errors='ignore')
+                                self.log(f"👁️ Satellites in view: {total_sats}")
 
-🔍 DIAGNOSIS STEPS:
-1. Check user permissions in diagnostics
-2. Look for "Permission denied" in System Log
-3. Verify user is in dialout group
+                if not has_data:
+                    self.log("❌ No GPS data received - check hardware connection")
+                    status_msg = "No GPS communication detected.\nCheck hardware connection."
+                else:
+                    if satellites == 0:
+                        tip = _TIPS_NO_SATS
+                    elif satellites < 4:
+                        tip = _TIPS_FEW_SATS
+                    else:
+                        tip = _TIPS_GOOD
+                    status_msg = f"GPS Status: {fix_status}\nSatellites in use: {satellites}\n{tip}"
+                
+                if GUI_AVAILABLE:
+                    messagebox.showinfo("GPS Status", status_msg)
+                
+        except Exception as e:
+            self.log(f"❌ GPS Status check error: {e}")
+            if GUI_AVAILABLE:
+                messagebox.showerror("GPS Status Error", f"Failed to check GPS status:\n{e}")
+    
+    def show_raw_gps_data(self):
+        """Show raw NMEA data in a popup window"""
+        if self.simulate_var.get():
+            self.log("📡 Raw GPS Data: Not available in simulation mode")
+            return
+        
+        if not serial:
+            self.log("❌ PySerial not available for raw data display")
+            return
+        
+        # Create popup window for raw data
+        raw_window = tk.Toplevel(self.root)
+        raw_window.title("Raw GPS Data (NMEA)")
+        raw_window.geometry("800x400")
+        
+        # Text area for raw data
+        raw_text = tk.Text(raw_window, wrap=tk.WORD, font=('Courier', 9))
+        scrollbar = ttk.Scrollbar(raw_window, orient="vertical", command=raw_text.yview)
+        raw_text.configure(yscrollcommand=scrollbar.set)
+        
+        raw_text.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        # Control frame
+        control_frame = ttk.Frame(raw_window)
+        control_frame.pack(side="bottom", fill="x", padx=5, pady=5)
+        
+        stop = threading.Event()
+        
+        def stop_raw_data():
+            stop.set()
+            raw_window.destroy()
+        
+        ttk.Button(control_frame, text="Stop", command=stop_raw_data).pack(side="left")
+        raw_window.protocol("WM_DELETE_WINDOW", stop_raw_data)
+        # Also covers the main window closing with the dialog still open
+        raw_window.bind('<Destroy>', lambda e: stop.set() if e.widget is raw_window else None)
+        ttk.Label(control_frame, text="Showing live NMEA data from GPS...").pack(side="left", padx=10)
+        
+        # The reader thread only appends here; Tk is touched from flush_raw_data on the main loop
+        pending = deque(maxlen=200)
+        
+        def read_shared_raw_data(reader):
+            # The map server's reader already owns the port; tap its sentence stream instead
+            raw_q = reader.subscribe_raw()
+            started = time.monotonic()
+            try:
+                while not stop.is_set():
+                    try:
+                        raw = raw_q.get(timeout=1)
+                    except queue.Empty:
+                        if started and time.monotonic() - started > 10:
+                            pending.append("No GPS data received.\nCheck hardware connection.\n")
+                            started = None
+                        continue
+                    started = None
+                    line = raw.decode('ascii', errors='ignore')
+                    if line:
+                        pending.append(f"[{_timestamps()[0][11:]}] {line}\n")
+            finally:
+                reader.unsubscribe_raw(raw_q)
+        
+        def read_raw_data():
+            try:
+                with serial.Serial(self.device_var.get(), int(self.baud_var.get()), timeout=1) as ser:
+                    line_count = 0
+                    started = time.monotonic()
+                    buf = b''
+                    # Runs until the window is closed; the widget itself is trimmed to RAW_MAX_LINES
+                    while not stop.is_set():
+                        try:
+                            # Drain everything buffered in one read, then split the sentences locally
+                            chunk = ser.read(max(1, ser.in_waiting))
+                        except serial.SerialException as e:
+                            pending.append(f"Error reading GPS data: {e}\n")
+                            break
+                        if chunk:
+                            buf += chunk
+                            *lines, buf = buf.split(b'\n')
+                            timestamp = _timestamps()[0][11:]
+                            for raw in lines:
+                                line = raw.decode('ascii', errors='ignore').strip()
+                                if line:
+                                    pending.append(f"[{timestamp}] {line}\n")
+                                    line_count += 1
+                        elif line_count == 0 and started and time.monotonic() - started > 10:
+                            pending.append("No GPS data received.\nCheck hardware connection.\n")
+                            started = None
+                        
+            except Exception as e:
+                pending.append(f"Error reading GPS data: {e}\n")
+        
+        def flush_raw_data():
+            if stop.is_set() or not raw_window.winfo_exists():
+                stop.set()
+                return
+            if pending:
+                lines = []
+                while pending:
+                    lines.append(pending.popleft())
+                raw_text.insert(tk.END, ''.join(lines))
+                # Drop only the oldest lines past the cap
+                excess = int(raw_text.index('end-1c').split('.')[0]) - self.RAW_MAX_LINES
+                if excess > 0:
+                    raw_text.delete('1.0', f'{excess + 1}.0')
+                raw_text.see(tk.END)
+            raw_window.after(100, flush_raw_data)
+        
+        # Start reading in a separate thread
+        reader = self.gps_reader
+        if reader is not None and not reader.simulate and reader.is_alive():
+            threading.Thread(target=read_shared_raw_data, args=(reader,), daemon=self.RAW_READER_DAEMON).start()
+        else:
+            threading.Thread(target=read_raw_data, daemon=self.RAW_READER_DAEMON).start()
+        raw_window.after(100, flush_raw_data)
+        
+        self.log("📡 Opened raw GPS data window")
+    
+    def open_saved_map_dialog_listbox(self):
+        """Open a dialog to choose a saved area and open the offline map centered on it (Listbox version)."""
+        try:
+            areas = _load_areas()
+            win = tk.Toplevel(self.root)
+            win.title("Load Saved Map")
+            win.geometry("560x360")
+            win.transient(self.root)
+            win.grab_set()
 
-✅ SOLUTIONS:
-• Add user to dialout group: sudo usermod -a -G dialout $USER
-• Log out and log back in (or reboot)
-• Check device permissions: ls -la /dev/ttyAMA0
-• Try running with sudo (temporary test only)
+            frame = ttk.Frame(win, padding=6)
+            frame.pack(fill="both", expand=True)
 
-❌ PROBLEM: GPS works but coordinates are wrong
+            # The listbox shows rows_var; its items are set in one call
+            names = list(areas)
+            rows_var = tk.Variable(value=_area_rows(names))
+            listbox = tk.Listbox(frame, height=12, exportselection=False, listvariable=rows_var)
+            listbox.pack(side="left", fill="both", expand=True)
+            sb = ttk.Scrollbar(frame, orient="vertical", command=listbox.yview)
+            sb.pack(side="right", fill="y")
+            listbox.configure(yscrollcommand=sb.set)
 
-🔍 DIAGNOSIS STEPS:
-1. Check if using simulation mode
-2. Verify GPS has valid satellite fix
-3. Compare with known location or other GPS device
+            def show_empty():
+                rows_var.set(["(no saved areas found – use Offline Import to Save one)"])
+                listbox.config(state="disabled")
 
-✅ SOLUTIONS:
-• Disable "Simulation Mode" checkbox
-• Wait for more satellites (4+ needed for accuracy)
-• Check HDOP value in raw GPS data (<5 is good)
-• Verify antenna has clear sky view
-• Wait longer for GPS to stabilize
+            if not names:
+                show_empty()
 
-🆘 EMERGENCY RECOVERY PROCEDURES:
+            def ensure_running():
+                if not self.is_running:
+                    try:
+                        self.start_gps_server()
+                    except Exception:
+                        pass
 
-🔄 Complete Reset:
-1. Click "Force Stop All"
-2. Close application
-3. Reboot Raspberry Pi
-4. Restart application
-5. Try again with fresh start
+            def open_selected():
+                if not names:
+                    return
+                idxs = listbox.curselection()
+                if not idxs:
+                    messagebox.showinfo("Load Saved Map", "Select an area first.")
+                    return
+                sel = names[idxs[0]]
+                bbox = sel.get('bbox')
+                if not bbox or not isinstance(bbox, list) or len(bbox) != 4:
+                    messagebox.showerror("Load Saved Map", "Selected entry has no valid bbox.")
+                    return
+                try:
+                    url = _offline_map_url(self.host, self.port, bbox)
+                except (TypeError, ValueError):
+                    messagebox.showerror("Load Saved Map", "Selected entry has no valid bbox.")
+                    return
+                ensure_running()
+                self.log(f"Opening offline map for saved area '{sel.get('name','')}' -> {url}")
+                webbrowser.open(url)
+                win.destroy()
 
-🔧 Hardware Reset:
-1. Power off Raspberry Pi
-2. Remove GPS HAT
-3. Check all GPIO pin connections
-4. Reseat HAT firmly
-5. Reconnect antenna
-6. Power on and test
+            def delete_selected():
+                if not names:
+                    return
+                idxs = listbox.curselection()
+                if not idxs:
+                    messagebox.showinfo("Delete Saved", "Select an entry to delete.")
+                    return
+                sel = names[idxs[0]]
+                if messagebox.askyesno("Delete Saved", f"Delete saved area '{sel.get('name','')}'? This cannot be undone."):
+                    remain = [a for i, a in enumerate(names) if i != idxs[0]]
+                    if _save_areas(remain):
+                        self.log("Deleted selected saved area.")
+                        # Drop the row in place; the list is already in sync with what was saved
+                        del names[idxs[0]]
+                        listbox.delete(idxs[0])
+                        if not names:
+                            show_empty()
+                    else:
+                        messagebox.showerror("Delete Saved", "Failed to save changes.")
 
-📞 GETTING HELP:
+            def _dbl_open(e=None):
+                open_selected()
+                return "break"
+            listbox.bind("<Double-Button-1>", _dbl_open)
+            listbox.bind("<Return>", _dbl_open)
 
-🔍 Information to Collect:
-• System Log contents (copy/paste)
-• Output from "Run Diagnostics"
-• Raspberry Pi model and OS version
-• GPS HAT model and antenna type
-• Specific error messages
-• Steps that led to the problem
+            btns = ttk.Frame(win)
+            btns.pack(fill="x", pady=(8,0))
+            ttk.Button(btns, text="Open Offline Map", command=open_selected).pack(side="left")
+            ttk.Button(btns, text="Delete Selected", command=delete_selected).pack(side="right")
 
-📧 Support Resources:
-• Waveshare GPS HAT documentation
-• Raspberry Pi GPS troubleshooting guides
-• NMEA protocol specifications
-• GPS technology educational resources
+        except Exception as e:
+            self.log(f"Load Saved Map error: {e}")
+            if GUI_AVAILABLE:
+                messagebox.showerror("Load Saved Map", f"An error occurred:\n{e}")
 
-Remember: GPS requires patience! First fix can take 15+ minutes outdoors without assistance. Use A-GPS for much faster results!
-"""
+    def show_instructions_old(self):
+        """Show comprehensive instructions and function benefits"""
+        # Create instructions window
+        instructions_window = tk.Toplevel(self.root)
+        instructions_window.title("📖 GPS Application Instructions & Function Benefits")
+        instructions_window.geometry("900x700")
+        instructions_window.resizable(True, True)
+        
+        # Create notebook for tabs
+        notebook = ttk.Notebook(instructions_window)
+        notebook.pack(fill="both", expand=True, padx=10, pady=10)
         
-        troubleshooting_text.insert("1.0", troubleshooting_content)
-        troubleshooting_text.config(state="disabled")
-        troubleshooting_text.pack(side="left", fill="both", expand=True)
-        troubleshooting_scroll.pack(side="right", fill="y")
+        # Text is inserted when a tab is first shown, so opening only fills the first one
+        pending = {}
+        for title, content in (
+            ("🚀 Quick Start", _HELP_QUICK_START),
+            ("🔧 Function Benefits", _HELP_FUNCTIONS),
+            ("🔬 Technical Details", _HELP_TECHNICAL),
+            ("🔧 Troubleshooting", _HELP_TROUBLESHOOTING),
+        ):
+            text = self._make_help_tab(notebook, title)
+            pending[str(text.master)] = (text, content)
+        
+        def on_tab_changed(event=None):
+            entry = pending.pop(str(notebook.select()), None)
+            if entry is not None:
+                text, content = entry
+                # Unmapped while filling so Tk lays the text out once, not during the insert
+                info = text.pack_info()
+                text.pack_forget()
+                text.insert("1.0", content)
+                text.config(state="disabled")
+                text.pack(**info)
+        
+        notebook.bind('<<NotebookTabChanged>>', on_tab_changed)
+        on_tab_changed()
         
         # Close button
         close_frame = ttk.Frame(instructions_window)
@@ -2105,6 +3323,17 @@ Remember: GPS requires patience! First fix can take 15+ minutes outdoors without
         
         self.log("📖 Opened comprehensive instructions window")
     
+    def _make_help_tab(self, notebook, title):
+        """Add a tab holding a scrollable read-only Text to notebook and return the Text"""
+        frame = ttk.Frame(notebook)
+        notebook.add(frame, text=title)
+        text = tk.Text(frame, wrap=tk.WORD, font=('Arial', 10))
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=text.yview)
+        text.configure(yscrollcommand=scroll.set)
+        text.pack(side="left", fill="both", expand=True)
+        scroll.pack(side="right", fill="y")
+        return text
+    
     def show_instructions(self):
         """Show concise, updated instructions for the current features and workflow"""
         win = tk.Toplevel(self.root)
@@ -2118,81 +3347,14 @@ Remember: GPS requires patience! First fix can take 15+ minutes outdoors without
         text = tk.Text(frame, wrap=tk.WORD, font=('Arial', 10))
         scroll = ttk.Scrollbar(frame, orient="vertical", command=text.yview)
         text.configure(yscrollcommand=scroll.set)
-        text.pack(side="left", fill="both", expand=True)
-        scroll.pack(side="right", fill="y")
-
-        content = """
-UPDATED USER GUIDE — Waveshare L76X HAT GPS GUI
-
-Quick start (online or offline-ready)
-1) Hardware: Seat the L76X HAT firmly and attach the GPS antenna. Go outdoors for best signal.
-2) Start: Click “Start GPS & Server”. When running, the Server Status shows active and the Open Live Map button enables.
-3) Faster fix (optional but recommended): Enter your city in “City for GPS Assist”, then click “GPS Assist (A‑GPS)”. This hints the receiver for quicker TTFF.
-4) Live view (online tiles): Click “Open Live Map” to see real‑time position and speed.
-
-Offline workflow (plan at home → use in the field)
-A) Plan & download tiles (requires internet):
-   • Click “Offline Import” → the Area Selector opens in your browser.
-   • Find your destination (City lookup), draw a rectangle (toolbar or right‑click‑drag), choose zooms (z12–z16), and click “Download this area”.
-   • Optional: Give the area a name and click Save. Your tiles are written under ./tiles and metadata in tiles/saved_areas.json.
-B) Use in the field (no internet needed):
-   • Start the app and click “Load Saved Map”. Choose the saved area → Open Offline Map.
-   • The offline map centers to your saved bbox and serves tiles locally from ./tiles while showing live GPS location.
-
-Main controls and benefits
-• Start GPS & Server
-  - Starts the serial reader (e.g., /dev/ttyAMA0 @ 9600) and launches the local web server for map pages
-  - Enables Live Map and offline map endpoints
-
-• Stop GPS & Server
-  - Cleanly shuts down serial reading and the embedded web server to free resources/ports
-
-• Open Live Map
-  - Opens an interactive online map using OSM tiles; shows live location with a pulsing marker and speed
-
-• Offline Import (Area Selector)
-  - Visual tool to define exact coverage rectangles, choose zoom levels, and download tiles for offline use
-  - Right‑click and drag to draw quickly, or use the rectangle tool; saved areas are persisted in tiles/saved_areas.json
-
-• Load Saved Map
-  - Lists your saved areas; selecting one opens the offline map centered to that bbox
-  - Uses only local tiles from ./tiles — works fully without internet
-
-• GPS Assist (A‑GPS)
-  - Uses your city (or IP fallback) to send assistance commands (PMTK) for faster satellite acquisition
-  - Benefit: Dramatically reduces Time To First Fix (often 30–60s outdoors)
-
-• Check GPS Status
-  - Reads live NMEA and reports Fix status and satellites in use/view
-  - Benefit: Quick diagnosis of reception and fix progress
-
-• Show Raw GPS Data
-  - Displays raw NMEA sentences for inspection and debugging ($GPRMC, $GPGGA, $GPGSV)
-
-• Run Diagnostics
-  - Verifies pyserial, device existence and permissions, UART config, and gpsd conflicts
-  - Benefit: One‑click health check for common setup issues
-
-• Restart GPS Service
-  - Stops gpsd and resets serial parameters (requires sudo); useful if the serial port gets stuck or busy
-
-• Force Stop All
-  - Kills lingering Main.py and frees port 5000, stops internal threads; last‑resort recovery
-
-Tips
-• Outdoor usage: GPS generally needs clear sky; first fix can take minutes without assistance.
-• Device: Default set to /dev/ttyAMA0 at 9600; adjust in Configuration if needed.
-• Permissions: Ensure your user is in the dialout group if you see permission errors.
-• Offline completeness: If blank areas appear, download additional tiles/zooms for that bbox.
 
-Endpoints (for reference)
-• Live map:     http://localhost:{port}
-• Offline map:  http://localhost:{port}/offline (supports ?bbox=minLon,minLat,maxLon,maxLat)
-• Area selector: http://localhost:{port}/select
-""".format(port=self.port)
+        content = _HELP_OVERVIEW.format(port=self.port)
 
+        # Fill before mapping the widget so it is laid out once
         text.insert("1.0", content)
         text.config(state="disabled")
+        text.pack(side="left", fill="both", expand=True)
+        scroll.pack(side="right", fill="y")
 
         btnbar = ttk.Frame(win)
         btnbar.pack(fill="x", padx=10, pady=6)
@@ -2213,16 +3375,26 @@ Endpoints (for reference)
             if GUI_AVAILABLE:
                 messagebox.showwarning("Missing Area", "Enter an area name (e.g., Banff National Park)")
             return
-        # Determine radius from coverage selection (A = pi r^2)
+        # Determine radius from coverage selection
         size = self.offgrid_size_var.get()
-        area_km2 = 50.0 if '50' in size else 100.0
-        radius_km = max(1.0, (area_km2 / 3.14159) ** 0.5)
+        radius_km = _OFFGRID_RADIUS_50 if '50' in size else _OFFGRID_RADIUS_100
+        if self._tile_cancel is not None:
+            self.log("⏳ An offline import is already running")
+            return
+        # Geocoding and the download run on a worker; progress comes back through _ui_q
+        cancel = self._tile_cancel = threading.Event()
+        threading.Thread(target=self._offgrid_import_worker, args=(area, radius_km, cancel),
+                         daemon=True).start()
+        self.root.after(100, self._poll_offgrid_import)
+
+    def _offgrid_import_worker(self, area, radius_km, cancel):
+        """Runs off the Tk thread: only log() and _ui_q may be used here."""
+        post = self._ui_q.put
         self.log(f"🔍 Geocoding area: {area} (radius ~ {radius_km:.1f} km)")
         lat, lon, display_name = self.get_location_from_city(area)
         if not lat or not lon:
             self.log("❌ Could not find the specified area")
-            if GUI_AVAILABLE:
-                messagebox.showerror("Geocoding Failed", "Could not geocode the specified area.")
+            post((self._offgrid_import_done, ("Geocoding Failed", "Could not geocode the specified area.", False)))
             return
         self.log(f"📍 Found: {display_name} ({lat:.5f}, {lon:.5f})")
         # Ensure Leaflet assets are local
@@ -2230,23 +3402,43 @@ Endpoints (for reference)
         # Download tiles
         try:
             zoom_levels = [12, 13, 14, 15, 16]
-            total, downloaded = self._download_tiles(lat, lon, radius_km, zoom_levels)
+            total, downloaded = self._download_tiles(lat, lon, radius_km, zoom_levels, cancel)
+            if cancel.is_set():
+                msg = f"⏹️ Offline import cancelled. Downloaded {downloaded} of {total} tiles."
+                self.log(msg)
+                post((self._offgrid_import_done, ("Off Grid Import Cancelled", msg, True)))
+                return
             # Record and report
             self._record_offgrid_import(display_name or area, lat, lon, radius_km, zoom_levels)
             msg = f"✅ Offline tiles ready. Total tiles: {total}, downloaded now: {downloaded}.\nOpen Offline Map from the button."
             self.log(msg)
-            if GUI_AVAILABLE:
-                messagebox.showinfo("Off Grid Import Complete", msg)
+            post((self._offgrid_import_done, ("Off Grid Import Complete", msg, True)))
+        except Exception as e:
+            self.log(f"❌ Tile download failed: {e}")
+            post((self._offgrid_import_done, ("Download Error", f"Failed to download tiles:\n{e}", False)))
+
+    def _poll_offgrid_import(self):
+        self._drain_ui_queue()
+        if self._tile_cancel is not None:
+            self.root.after(100, self._poll_offgrid_import)
+
+    def _offgrid_import_done(self, title, msg, ok):
+        self._tile_cancel = None
+        if GUI_AVAILABLE:
+            (messagebox.showinfo if ok else messagebox.showerror)(title, msg)
+        if ok:
             # Refresh UI info
             try:
                 self.refresh_offgrid_stats()
                 self._load_offgrid_log()
             except Exception:
                 pass
-        except Exception as e:
-            self.log(f"❌ Tile download failed: {e}")
-            if GUI_AVAILABLE:
-                messagebox.showerror("Download Error", f"Failed to download tiles:\n{e}")
+
+    def cancel_offgrid_import(self):
+        """Stop the running offline import after the tiles already in flight"""
+        if self._tile_cancel is not None and not self._tile_cancel.is_set():
+            self._tile_cancel.set()
+            self.log("⏹️ Cancelling offline import…")
 
     def open_offline_map(self):
         """Open the offline map page"""
@@ -2282,62 +3474,47 @@ Endpoints (for reference)
 
             ttk.Label(frame, text="Saved Areas (tick to choose):").pack(anchor="w")
 
-            # Scrollable checklist container
-            canvas = tk.Canvas(frame, borderwidth=0, highlightthickness=0)
-            scroll = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-            list_holder = ttk.Frame(canvas)
-            list_holder.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-            canvas.create_window((0, 0), window=list_holder, anchor="nw")
-            canvas.configure(yscrollcommand=scroll.set)
-            canvas.pack(side="left", fill="both", expand=True)
+            # One Treeview row per area (Tk stores the rows); the tick is a text prefix toggled on click
+            tree = ttk.Treeview(frame, columns=('bbox', 'zooms'), show='tree headings', selectmode='none')
+            tree.heading('#0', text='Area')
+            tree.heading('bbox', text='BBox')
+            tree.heading('zooms', text='Zooms')
+            tree.column('#0', width=200)
+            tree.column('bbox', width=280)
+            tree.column('zooms', width=90)
+            scroll = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scroll.set)
+            tree.pack(side="left", fill="both", expand=True)
             scroll.pack(side="right", fill="y")
 
-            checks = []  # [(var, area_dict, cb_widget)]
+            unchecked_mark, checked_mark = "☐ ", "☑ "
+            by_iid = {}  # row id -> area dict
+            checked = set()
+
+            def show_empty():
+                tree.insert('', 'end', text="(no saved areas found – use Offline Import to Save one)")
 
             if not areas:
-                row = ttk.Frame(list_holder)
-                ttk.Label(row, text="(no saved areas found – use Offline Import to Save one)", foreground="#666").pack(anchor="w")
-                row.pack(fill="x", pady=2)
+                show_empty()
             else:
-                for idx, a in enumerate(areas):
-                    var = tk.BooleanVar(value=False)
-                    row = ttk.Frame(list_holder)
-                    cb = tk.Checkbutton(row, variable=var, onvalue=True, offvalue=False, indicatoron=True)
-                    cb.pack(side="left")
-                    # Only bind right/middle clicks to toggle; let default left-click behavior handle itself
-                    def _invoke(e=None, w=cb):
-                        try:
-                            w.invoke()
-                        finally:
-                            return "break"
-                    cb.bind("<Button-2>", _invoke)
-                    cb.bind("<Button-3>", _invoke)
-                    name = a.get('name', '(unnamed)')
-                    bbox = a.get('bbox')
-                    zooms = a.get('zooms')
-                    text_main = f"{name}"
-                    text_sub = f"bbox: {bbox}  |  zooms: {zooms}"
-                    left = ttk.Frame(row)
-                    ttk.Label(left, text=text_main).pack(anchor="w")
-                    ttk.Label(left, text=text_sub, foreground="#555").pack(anchor="w")
-                    left.pack(side="left", padx=(6,0))
-                    # Clicking the label toggles the checkbox (invoke)
-                    def make_invoke(w=cb):
-                        def handler(e=None):
-                            try:
-                                w.invoke()
-                            finally:
-                                return "break"
-                        return handler
-                    left.bind("<Button-1>", make_invoke(cb))
-                    left.bind("<Button-3>", make_invoke(cb))
-                    left.bind("<Button-2>", make_invoke(cb))
-                    for child in left.winfo_children():
-                        child.bind("<Button-1>", make_invoke(cb))
-                        child.bind("<Button-3>", make_invoke(cb))
-                        child.bind("<Button-2>", make_invoke(cb))
-                    row.pack(fill="x", pady=2)
-                    checks.append((var, a, cb))
+                for a in areas:
+                    iid = tree.insert('', 'end', text=unchecked_mark + str(a.get('name', '(unnamed)')),
+                                      values=(str(a.get('bbox')), str(a.get('zooms'))))
+                    by_iid[iid] = a
+
+            def set_checked(iid, on):
+                (checked.add if on else checked.discard)(iid)
+                name = str(by_iid[iid].get('name', '(unnamed)'))
+                tree.item(iid, text=(checked_mark if on else unchecked_mark) + name)
+
+            def toggle(e):
+                iid = tree.identify_row(e.y)
+                if iid not in by_iid:
+                    return None  # Headings and empty space keep their default behaviour
+                set_checked(iid, iid not in checked)
+                return "break"
+            for seq in ("<Button-1>", "<Button-2>", "<Button-3>"):
+                tree.bind(seq, toggle)
 
             info_var = tk.StringVar(value="Tick one option and click Open")
             ttk.Label(frame, textvariable=info_var, wraplength=580, justify='left').pack(anchor="w", pady=(8,6))
@@ -2346,31 +3523,31 @@ Endpoints (for reference)
             btns.pack(fill="x", pady=(4,0))
 
             def get_first_checked():
-                for v, a, _ in checks:
-                    if v.get():
-                        return a
+                for iid in tree.get_children():
+                    if iid in checked:
+                        return by_iid[iid]
                 return None
 
             def clear_all():
-                for v, _, _ in checks:
-                    v.set(False)
+                for iid in list(checked):
+                    set_checked(iid, False)
 
             def delete_checked():
-                to_keep = []
-                any_checked = False
-                for v, a, _ in checks:
-                    if v.get():
-                        any_checked = True
-                    else:
-                        to_keep.append(a)
-                if not any_checked:
+                if not checked:
                     return
                 if GUI_AVAILABLE and not messagebox.askyesno("Confirm", "Delete all checked saved areas?"):
                     return
+                to_keep = [by_iid[iid] for iid in tree.get_children() if iid in by_iid and iid not in checked]
                 try:
-                    _save_areas(to_keep)
-                    win.destroy()
-                    self.open_saved_map_dialog()
+                    if not _save_areas(to_keep):
+                        raise OSError("could not write saved areas")
+                    # Drop the rows in place instead of rebuilding the dialog
+                    tree.delete(*checked)
+                    for iid in checked:
+                        del by_iid[iid]
+                    checked.clear()
+                    if not by_iid:
+                        show_empty()
                 except Exception as e:
                     self.log(f"Delete saved areas failed: {e}")
                     if GUI_AVAILABLE:
@@ -2398,8 +3575,7 @@ Endpoints (for reference)
                         self.start_gps_server()
                     except Exception as e:
                         self.log(f"Auto-start server failed: {e}")
-                bbox_str = ','.join(str(x) for x in parts)
-                url = f"http://{self.host}:{self.port}/offline?bbox={bbox_str}"
+                url = _offline_map_url(self.host, self.port, parts)
                 self.log(f"Opening offline map for saved area '{a.get('name')}' → {url}")
                 webbrowser.open(url)
                 try:
@@ -2434,17 +3610,15 @@ Endpoints (for reference)
             return
         tiles_dir = os.path.join(os.getcwd(), 'tiles')
         try:
+            manifest_close()  # Release the handle so the file can be removed on every platform
             if os.path.isdir(tiles_dir):
-                shutil.rmtree(tiles_dir)
+                # Rename aside (O(1) on the same filesystem) and unlink the files in the background
+                trash = f"{tiles_dir}.trash.{int(time.time())}"
+                os.rename(tiles_dir, trash)
+                threading.Thread(target=shutil.rmtree, args=(trash,),
+                                 kwargs={'ignore_errors': True}, daemon=True).start()
                 self.log("🗑️ Deleted offline tiles cache (./tiles)")
             os.makedirs(tiles_dir, exist_ok=True)
-            # Also clear manifest/log
-            man = os.path.join(tiles_dir, 'manifest.log')
-            if os.path.exists(man):
-                try:
-                    os.remove(man)
-                except Exception:
-                    pass
         except Exception as e:
             self.log(f"❌ Failed to delete tiles: {e}")
             if GUI_AVAILABLE:
@@ -2458,24 +3632,21 @@ Endpoints (for reference)
 
     def _get_tiles_stats(self):
         """Return dict with size (bytes), count (.png files), and zoom levels present."""
+        try:
+            return tile_index_stats()
+        except (sqlite3.Error, OSError):
+            pass
+        # Index unusable: scan the tree directly
         tiles_root = os.path.join(os.getcwd(), 'tiles')
         size = 0
         count = 0
         zooms = set()
         try:
             if os.path.isdir(tiles_root):
-                # Collect zooms from first-level dirs
-                for entry in os.listdir(tiles_root):
-                    if entry.isdigit():
-                        zooms.add(int(entry))
-                for root, _dirs, files in os.walk(tiles_root):
-                    for fn in files:
-                        if fn.endswith('.png'):
-                            count += 1
-                            try:
-                                size += os.path.getsize(os.path.join(root, fn))
-                            except Exception:
-                                pass
+                for z, _x, _y, tile_size in _scan_tiles(tiles_root):
+                    count += 1
+                    size += tile_size
+                    zooms.add(z)
         except Exception:
             pass
         return {'size': size, 'count': count, 'zooms': zooms}
@@ -2490,35 +3661,23 @@ Endpoints (for reference)
     def _record_offgrid_import(self, name: str, lat: float, lon: float, radius_km: float, zoom_levels):
         """Append a record of the import to tiles/manifest.log (for user visibility)."""
         try:
-            tiles_dir = os.path.join(os.getcwd(), 'tiles')
-            os.makedirs(tiles_dir, exist_ok=True)
-            log_path = os.path.join(tiles_dir, 'manifest.log')
-            rec = {
-                'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            manifest_append({
+                'time': _timestamps()[0],
                 'name': name,
                 'lat': round(lat, 6),
                 'lon': round(lon, 6),
                 'radius_km': round(radius_km, 2),
                 'zooms': zoom_levels,
-            }
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(rec) + "\n")
+            })
         except Exception as e:
             self.log(f"⚠️ Could not write import log: {e}")
 
     def _load_offgrid_log(self):
         """Load last few import records into the offline panel text box."""
         try:
-            tiles_dir = os.path.join(os.getcwd(), 'tiles')
-            log_path = os.path.join(tiles_dir, 'manifest.log')
-            lines = []
-            if os.path.exists(log_path):
-                with open(log_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()[-5:]
             display = []
-            for ln in lines:
+            for rec in manifest_tail(5):
                 try:
-                    rec = json.loads(ln.strip())
                     display.append(f"{rec['time']} - {rec['name']} ({rec['radius_km']} km radius) z:{','.join(map(str, rec['zooms']))}")
                 except Exception:
                     continue
@@ -2529,8 +3688,10 @@ Endpoints (for reference)
         except Exception as e:
             self.log(f"⚠️ Could not load import log: {e}")
 
-    def _ensure_local_leaflet_assets(self):
-        """Download Leaflet JS/CSS to local static directory if missing."""
+    def _ensure_local_leaflet_assets(self, refresh=False):
+        """Download Leaflet JS/CSS to local static directory if missing (refresh: re-check if changed)."""
+        if self._leaflet_ready and not refresh:
+            return
         try:
             static_dir = os.path.join(os.getcwd(), 'static', 'leaflet')
             os.makedirs(static_dir, exist_ok=True)
@@ -2540,105 +3701,86 @@ Endpoints (for reference)
             }
             for fname, url in files.items():
                 fpath = os.path.join(static_dir, fname)
-                if not os.path.exists(fpath):
+                headers = None
+                if os.path.exists(fpath):
+                    if not refresh:
+                        continue
+                    headers = {'If-Modified-Since': email.utils.formatdate(os.path.getmtime(fpath), usegmt=True)}
+                else:
                     self.log(f"⬇️ Downloading {fname}...")
-                    r = requests.get(url, timeout=20)
-                    r.raise_for_status()
-                    with open(fpath, 'wb') as f:
-                        f.write(r.content)
+                r = _http_session().get(url, headers=headers, timeout=20)
+                if r.status_code == 304:
+                    continue
+                r.raise_for_status()
+                tmp = fpath + '.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(r.content)
+                os.replace(tmp, fpath)
+            self._leaflet_ready = True
         except Exception as e:
             self.log(f"⚠️ Could not ensure local Leaflet assets: {e}")
 
-    def _download_tiles(self, lat, lon, radius_km, zoom_levels):
+    def _download_tiles(self, lat, lon, radius_km, zoom_levels, cancel=None):
         """Download OSM tiles to local tiles/ directory for given center/radius."""
-        import math, time as _time
-        def deg2num(lat_deg, lon_deg, zoom):
-            lat_rad = math.radians(lat_deg)
-            n = 2.0 ** zoom
-            xtile = int((lon_deg + 180.0) / 360.0 * n)
-            ytile = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
-            return (xtile, ytile)
-        tiles_root = os.path.join(os.getcwd(), 'tiles')
-        os.makedirs(tiles_root, exist_ok=True)
         lat_offset = radius_km / 111.0
         lon_offset = radius_km / (111.0 * math.cos(math.radians(lat)))
-        north = lat + lat_offset
-        south = lat - lat_offset
-        east = lon + lon_offset
-        west = lon - lon_offset
-        headers = {'User-Agent': 'L76X-Offgrid-Importer/1.0'}
-        total = 0
-        downloaded = 0
-        for z in zoom_levels:
-            x_min, y_max = deg2num(north, west, z)
-            x_max, y_min = deg2num(south, east, z)
-            for x in range(min(x_min, x_max), max(x_min, x_max) + 1):
-                for y in range(min(y_min, y_max), max(y_min, y_max) + 1):
-                    total += 1
-                    out_dir = os.path.join(tiles_root, str(z), str(x))
-                    os.makedirs(out_dir, exist_ok=True)
-                    out_path = os.path.join(out_dir, f"{y}.png")
-                    if os.path.exists(out_path):
-                        continue
-                    url = f"https://tile.openstreetmap.org/{z}/{x}/{y}.png"
-                    try:
-                        r = requests.get(url, headers=headers, timeout=15)
-                        if r.status_code == 200:
-                            with open(out_path, 'wb') as f:
-                                f.write(r.content)
-                            downloaded += 1
-                            if downloaded % 25 == 0:
-                                self.log(f"Downloaded {downloaded} tiles…")
-                        else:
-                            # create small placeholder to avoid re-fetch loops
-                            with open(out_path, 'wb') as f:
-                                f.write(b'')
-                    except Exception:
-                        # backoff and continue
-                        _time.sleep(0.2)
-                        continue
-                    _time.sleep(0.1)
-        return total, downloaded
+        bbox = [lon - lon_offset, lat - lat_offset, lon + lon_offset, lat + lat_offset]
+        return download_tiles_bbox(bbox, zoom_levels,
+                                   progress=lambda n: self.log(f"Downloaded {n} tiles…"),
+                                   cancel=cancel, confirm=self._confirm_large_download)
+
+    def _confirm_large_download(self, count, est_bytes):
+        """Called on the import worker: ask on the Tk thread and wait for the answer"""
+        budget = self._format_bytes(TILE_BUDGET_BYTES)
+        self.log(f"⚠️ {count} tiles (~{self._format_bytes(est_bytes)}) exceed the {budget} download budget")
+        if not GUI_AVAILABLE:
+            return False
+        answer = []
+        done = threading.Event()
+
+        def ask():
+            answer.append(messagebox.askyesno(
+                "Large Download",
+                f"About {count} tiles (~{self._format_bytes(est_bytes)}) will be downloaded, "
+                f"more than the {budget} budget.\n\nContinue?"))
+            done.set()
+        self._ui_q.put((ask, ()))
+        done.wait()
+        return answer[0]
 
     def update_status(self):
         """Update status display"""
+        shown = {}  # key -> (text, foreground)
         # Server status
-        if self.is_running:
-            self.status_labels['server_status'].config(text="Running", foreground="green")
-        else:
-            self.status_labels['server_status'].config(text="Stopped", foreground="red")
+        shown['server_status'] = ("Running", "green") if self.is_running else ("Stopped", "red")
         
         # GPS status and data
         if self.gps_reader and self.is_running:
-            self.status_labels['gps_status'].config(text="Active", foreground="green")
+            shown['gps_status'] = ("Active", "green")
             
             fix = self.gps_reader.get_fix()
             
             # GPS fix status
-            if fix.get('valid'):
-                self.status_labels['gps_fix'].config(text="Valid", foreground="green")
-            else:
-                self.status_labels['gps_fix'].config(text="No Fix", foreground="red")
+            shown['gps_fix'] = ("Valid", "green") if fix.get('valid') else ("No Fix", "red")
             
             # Coordinates
             lat = fix.get('lat')
             lon = fix.get('lon')
             if lat is not None and lon is not None:
-                self.status_labels['latitude'].config(text=f"{lat:.6f}°", foreground="black")
-                self.status_labels['longitude'].config(text=f"{lon:.6f}°", foreground="black")
+                shown['latitude'] = (f"{lat:.6f}°", "black")
+                shown['longitude'] = (f"{lon:.6f}°", "black")
             else:
-                self.status_labels['latitude'].config(text="N/A", foreground="gray")
-                self.status_labels['longitude'].config(text="N/A", foreground="gray")
+                shown['latitude'] = shown['longitude'] = ("N/A", "gray")
             
             # Speed
             speed_knots = fix.get('speed_knots', 0)
             speed_kmh = speed_knots * 1.852
-            self.status_labels['speed'].config(text=f"{speed_kmh:.1f}", foreground="black")
+            shown['speed'] = (f"{speed_kmh:.1f}", "black")
             
             # Last update
             updated_at = fix.get('updated_at', 0)
             if updated_at > 0:
-                last_update = time.strftime("%H:%M:%S", time.localtime(updated_at))
+                last_update = _hms(int(updated_at))
                 age = time.time() - updated_at
                 if age < 5:
                     color = "green"
@@ -2646,20 +3788,33 @@ Endpoints (for reference)
                     color = "orange"
                 else:
                     color = "red"
-                self.status_labels['last_update'].config(text=f"{last_update} ({age:.0f}s ago)", 
-                                                        foreground=color)
+                shown['last_update'] = (f"{last_update} ({age:.0f}s ago)", color)
             else:
-                self.status_labels['last_update'].config(text="Never", foreground="gray")
+                shown['last_update'] = ("Never", "gray")
         else:
-            self.status_labels['gps_status'].config(text="Inactive", foreground="gray")
-            self.status_labels['gps_fix'].config(text="N/A", foreground="gray")
-            self.status_labels['latitude'].config(text="N/A", foreground="gray")
-            self.status_labels['longitude'].config(text="N/A", foreground="gray")
-            self.status_labels['speed'].config(text="N/A", foreground="gray")
-            self.status_labels['last_update'].config(text="N/A", foreground="gray")
+            shown['gps_status'] = ("Inactive", "gray")
+            for key in ('gps_fix', 'latitude', 'longitude', 'speed', 'last_update'):
+                shown[key] = ("N/A", "gray")
+        
+        # Only labels whose text or colour changed since the last tick are reconfigured
+        last = self._status_shown
+        for key, value in shown.items():
+            if last.get(key) != value:
+                self.status_labels[key].config(text=value[0], foreground=value[1])
+                last[key] = value
     
+    def _drain_ui_queue(self):
+        """Run the calls worker threads posted to _ui_q"""
+        while True:
+            try:
+                fn, args = self._ui_q.get_nowait()
+            except queue.Empty:
+                return
+            fn(*args)
+
     def start_status_updates(self):
         """Start periodic status updates"""
+        self._drain_ui_queue()
         self.update_status()
         self.root.after(1000, self.start_status_updates)
     
@@ -2698,7 +3853,7 @@ def main():
         
         gps_reader = GPSReader(device=args.device, baud=args.baud, simulate=args.simulate)
         gps_reader.start()
-        server = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+        server = MapHTTPServer((args.host, args.port), RequestHandler)
         setattr(server, 'gps_reader', gps_reader)
         print(f"Serving GPS map on http://{args.host}:{args.port} ...")
         if not args.simulate and serial is None:
@@ -6,6 +6,37 @@ import serial
 import time
 import sys
 
+
+def _on_gga(parts, timestamp):
+    # Parse satellite count from GGA
+    if len(parts) > 7 and parts[7]:
+        print(f"[{timestamp}] GGA - Satellites: {parts[7]}")
+
+
+def _on_rmc(parts, timestamp):
+    if len(parts) > 2:
+        status = parts[2]
+        if status == 'A':
+            print(f"[{timestamp}] RMC - GPS FIX ACTIVE!")
+        else:
+            print(f"[{timestamp}] RMC - No fix (status: {status})")
+
+
+def _on_gsv(parts, timestamp):
+    # Satellites in view
+    if len(parts) > 3:
+        total_sats = parts[3] if parts[3] else "0"
+        print(f"[{timestamp}] GSV - Satellites in view: {total_sats}")
+
+
+# Sentence prefix -> (kind, maxsplit covering the fields the handler reads, handler)
+_HANDLERS = {
+    '$GPGGA': ('gga', 8, _on_gga), '$GNGGA': ('gga', 8, _on_gga),
+    '$GPRMC': ('rmc', 3, _on_rmc), '$GNRMC': ('rmc', 3, _on_rmc),
+    '$GPGSV': ('gsv', 4, _on_gsv), '$GNGSV': ('gsv', 4, _on_gsv),
+}
+
+
 def debug_gps(device='/dev/serial0', baud=9600, duration=30):
     print(f"GPS Debug Tool - Monitoring {device} at {baud} baud")
     print(f"Will monitor for {duration} seconds...")
@@ -15,9 +46,7 @@ def debug_gps(device='/dev/serial0', baud=9600, duration=30):
         with serial.Serial(device, baud, timeout=1) as ser:
             start_time = time.time()
             line_count = 0
-            gga_count = 0
-            rmc_count = 0
-            satellites_seen = set()
+            counts = {'gga': 0, 'rmc': 0, 'gsv': 0}
             
             while (time.time() - start_time) < duration:
                 try:
@@ -26,31 +55,12 @@ def debug_gps(device='/dev/serial0', baud=9600, duration=30):
                         line_count += 1
                         timestamp = time.strftime("%H:%M:%S")
                         
-                        # Count different sentence types
-                        if line.startswith('$GPGGA') or line.startswith('$GNGGA'):
-                            gga_count += 1
-                            # Parse satellite count from GGA
-                            parts = line.split(',')
-                            if len(parts) > 7 and parts[7]:
-                                sat_count = parts[7]
-                                print(f"[{timestamp}] GGA - Satellites: {sat_count}")
-                        
-                        elif line.startswith('$GPRMC') or line.startswith('$GNRMC'):
-                            rmc_count += 1
-                            parts = line.split(',')
-                            if len(parts) > 2:
-                                status = parts[2]
-                                if status == 'A':
-                                    print(f"[{timestamp}] RMC - GPS FIX ACTIVE!")
-                                else:
-                                    print(f"[{timestamp}] RMC - No fix (status: {status})")
-                        
-                        elif line.startswith('$GPGSV') or line.startswith('$GNGSV'):
-                            # Satellites in view
-                            parts = line.split(',')
-                            if len(parts) > 3:
-                                total_sats = parts[3] if parts[3] else "0"
-                                print(f"[{timestamp}] GSV - Satellites in view: {total_sats}")
+                        # Count different sentence types; only known ones are split
+                        entry = _HANDLERS.get(line[:6])
+                        if entry is not None:
+                            kind, maxsplit, handler = entry
+                            counts[kind] += 1
+                            handler(line.split(',', maxsplit), timestamp)
                         
                         # Show all raw data for first 10 seconds
                         if (time.time() - start_time) < 10:
@@ -63,12 +73,12 @@ def debug_gps(device='/dev/serial0', baud=9600, duration=30):
             print("=" * 60)
             print(f"Summary after {duration} seconds:")
             print(f"Total NMEA sentences: {line_count}")
-            print(f"GGA sentences (position): {gga_count}")
-            print(f"RMC sentences (recommended minimum): {rmc_count}")
+            print(f"GGA sentences (position): {counts['gga']}")
+            print(f"RMC sentences (recommended minimum): {counts['rmc']}")
             
             if line_count == 0:
                 print("❌ NO GPS DATA RECEIVED - Check hardware connection!")
-            elif gga_count == 0 and rmc_count == 0:
+            elif counts['gga'] == 0 and counts['rmc'] == 0:
                 print("⚠️  GPS data received but no position sentences")
             else:
                 print("✅ GPS is communicating")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Numba-compiled NMEA parsing for the GPS GUI
+Used by GPSManager only when EXPLORER_JIT_PARSER=1; the pure-Python parsers are the default
+"""
+from typing import Optional, Dict
+
+import numpy as np
+from numba import njit
+
+_MAX_FIELDS = 20
+
+
+@njit(cache=True)
+def _atof(buf, start, end):
+    """Parse an ASCII decimal number in buf[start:end]; returns NaN if malformed"""
+    if start >= end:
+        return np.nan
+    sign = 1.0
+    i = start
+    if buf[i] == 45:  # '-'
+        sign = -1.0
+        i += 1
+    value = 0.0
+    scale = 0.0
+    seen_digit = False
+    while i < end:
+        c = buf[i]
+        if c == 46:  # '.'
+            if scale != 0.0:
+                return np.nan
+            scale = 1.0
+        elif 48 <= c <= 57:
+            seen_digit = True
+            if scale == 0.0:
+                value = value * 10.0 + (c - 48)
+            else:
+                scale *= 0.1
+                value += (c - 48) * scale
+        else:
+            return np.nan
+        i += 1
+    if not seen_digit:
+        return np.nan
+    return sign * value
+
+
+@njit(cache=True)
+def _atoi(buf, start, end):
+    """Parse an unsigned ASCII integer in buf[start:end]; returns -1 if malformed"""
+    if start >= end:
+        return -1
+    value = 0
+    for i in range(start, end):
+        d = buf[i] - 48
+        if d < 0 or d > 9:
+            return -1
+        value = value * 10 + d
+    return value
+
+
+@njit(cache=True)
+def nmea_to_decimal_jit(buf, start, end, dir_char):
+    """Convert a DDMM.MMMM / DDDMM.MMMM field in buf[start:end] to decimal degrees (NaN if invalid)"""
+    dot = -1
+    for i in range(start, end):
+        if buf[i] == 46:
+            dot = i
+            break
+    if dot - start < 3:
+        return np.nan
+    deg = _atoi(buf, start, dot - 2)
+    minutes = _atof(buf, dot - 2, end)
+    if deg < 0 or np.isnan(minutes):
+        return np.nan
+    decimal = deg + minutes / 60.0
+    if dir_char == 83 or dir_char == 87:  # 'S' / 'W'
+        return -decimal
+    return decimal
+
+
+@njit(cache=True)
+def parse_gga_jit(buf, start, end):
+    """Parse the GGA fields (after the sentence type) in buf[start:end].
+
+    Returns (lat, lon, quality, satellites, hdop, ok); lat/lon are NaN when
+    absent and ok is False for a malformed sentence.
+    """
+    offs = np.empty(_MAX_FIELDS + 1, dtype=np.int32)
+    offs[0] = start - 1
+    n = 1
+    stop = end
+    for i in range(start, end):
+        c = buf[i]
+        if c == 42:  # '*' - checksum follows
+            stop = i
+            break
+        if c == 44 and n < _MAX_FIELDS:  # ','
+            offs[n] = i
+            n += 1
+    offs[n] = stop
+    if n < 14:
+        return np.nan, np.nan, 0, 0, 0.0, False
+
+    lat = np.nan
+    if offs[2] - offs[1] > 1 and offs[3] - offs[2] > 1:
+        lat = nmea_to_decimal_jit(buf, offs[1] + 1, offs[2], buf[offs[2] + 1])
+    lon = np.nan
+    if offs[4] - offs[3] > 1 and offs[5] - offs[4] > 1:
+        lon = nmea_to_decimal_jit(buf, offs[3] + 1, offs[4], buf[offs[4] + 1])
+
+    quality = 0
+    if offs[6] - offs[5] > 1:
+        quality = _atoi(buf, offs[5] + 1, offs[6])
+    satellites = 0
+    if offs[7] - offs[6] > 1:
+        satellites = _atoi(buf, offs[6] + 1, offs[7])
+    hdop = 0.0
+    if offs[8] - offs[7] > 1:
+        hdop = _atof(buf, offs[7] + 1, offs[8])
+    if quality < 0 or satellites < 0 or np.isnan(hdop):
+        return np.nan, np.nan, 0, 0, 0.0, False
+    return lat, lon, quality, satellites, hdop, True
+
+
+def parse_gga_fields(fields: bytes) -> Optional[Dict]:
+    """Drop-in replacement for GPSManager._parse_gga_fields"""
+    buf = np.frombuffer(fields, dtype=np.uint8)
+    lat, lon, quality, satellites, hdop, ok = parse_gga_jit(buf, 0, len(buf))
+    if not ok:
+        return None
+    lat = None if np.isnan(lat) else float(lat)
+    lon = None if np.isnan(lon) else float(lon)
+    return {
+        'lat': lat,
+        'lon': lon,
+        'quality': int(quality),
+        'satellites': int(satellites),
+        'hdop': float(hdop),
+        'valid': quality > 0 and lat is not None and lon is not None
+    }
+
+
+def warm_up():
+    """Compile (or load from cache) the jitted functions before live data arrives"""
+    parse_gga_fields(b'123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,')
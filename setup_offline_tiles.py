@@ -3,22 +3,286 @@
 Offline Map Tile Downloader for GPS Application
 Downloads OpenStreetMap tiles for offline use
 """
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
 import os
 import requests
 import math
+import random
+import sqlite3
+import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
 
-def deg2num(lat_deg, lon_deg, zoom):
-    """Convert lat/lon to tile numbers"""
+try:
+    import httpx
+    # http2=True needs the h2 package (pip install 'httpx[http2]')
+    HTTPX_AVAILABLE = importlib.util.find_spec('h2') is not None
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+# Servers that shard across hosts take a "{s}" in TILE_URL (e.g. "https://{s}.tile.example.org/...");
+# it rotates through these by tile so neighbours spread over every host. OSM itself now asks
+# clients to use the single tile.openstreetmap.org host, so the default URL doesn't shard.
+TILE_SUBDOMAINS = ('a', 'b', 'c')
+# OSM's tile usage policy requires an identifying User-Agent
+USER_AGENT = 'Explorer-OfflineTiles/1.0'
+# Requests in flight at once; OSM's policy asks bulk downloaders to keep this at 2
+CONCURRENCY = 2
+# Attempts per tile; throttling (429) and server errors back off exponentially between them
+RETRIES = 5
+_RETRY_STATUS = frozenset((429, 500, 502, 503, 504))
+BACKOFF_MAX = 60.0
+# Threads writing tiles so a slow disk (SD card) doesn't stall the event loop
+IO_WORKERS = 4
+# Transport errors that are retried like a 5xx on the async path
+_CLIENT_ERRORS = (asyncio.TimeoutError,)
+if HTTPX_AVAILABLE:
+    _CLIENT_ERRORS += (httpx.TransportError, httpx.StreamError)
+if AIOHTTP_AVAILABLE:
+    _CLIENT_ERRORS += (aiohttp.ClientError,)
+# Tile bodies are streamed to disk in chunks of this size rather than buffered whole
+CHUNK_SIZE = 65536
+# Bodies smaller than this are OSM's blank "no data" tiles (~100 bytes); they aren't stored,
+# only listed in tiles/empty_tiles.json so later runs don't request them again
+EMPTY_TILE_BYTES = 500
+EMPTY_TILES_FILE = 'empty_tiles.json'
+# Areas covering more tiles than this need explicit confirmation; OSM blocks bulk scrapers
+MAX_TILES = 100_000
+# Default zoom pyramid: every ZOOM_STEP-th level from ZOOM_MIN up to ZOOM_MAX, i.e. 12/15/18.
+# Each level costs ~4x the one below it, so caching only the levels that get rendered fetches
+# a fraction of the tiles that every level 10..18 would
+ZOOM_MIN = 12
+ZOOM_MAX = 18
+ZOOM_STEP = 3
+# Single-file alternative to tiles/z/x/y.png; Main.py's /tiles/ route falls back to it
+MBTILES_FILE = 'tiles.mbtiles'
+_MBTILES_COMMIT_EVERY = 256
+# Main.py's index of tiles/ (for its tile stats); new tiles are added to it when it exists.
+# Only a matching schema version is written, otherwise Main rebuilds the index from a scan
+TILE_INDEX_FILE = 'index.sqlite'
+TILE_INDEX_VERSION = 2
+
+
+class TooManyTiles(RuntimeError):
+    """The requested area covers more than max_tiles tiles and wasn't confirmed"""
+
+
+def zoom_pyramid(zoom_min=ZOOM_MIN, zoom_max=ZOOM_MAX, step=ZOOM_STEP):
+    """Every step-th zoom level from zoom_min, always ending with the most detailed zoom_max"""
+    levels = list(range(zoom_min, zoom_max + 1, max(1, step)))
+    if levels and levels[-1] != zoom_max:
+        levels.append(zoom_max)
+    return levels
+
+def deg2num(lat_deg, lon_deg, zoom, n=None):
+    """Convert lat/lon to tile numbers; n is the tiles per side (1 << zoom) if already known"""
     lat_rad = math.radians(lat_deg)
-    n = 2.0 ** zoom
+    if n is None:
+        n = 1 << zoom
     xtile = int((lon_deg + 180.0) / 360.0 * n)
     ytile = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
     return (xtile, ytile)
 
-def download_tiles(lat, lon, zoom_levels, radius_km=5):
-    """Download tiles for a specific area"""
+def deg2num_vec(lat_deg, lon_deg, zoom):
+    """deg2num over arrays of coordinates and/or zoom levels; returns int arrays"""
+    lat_rad = np.radians(lat_deg)
+    n = np.left_shift(1, np.asarray(zoom, dtype=np.int64))
+    xtile = ((np.asarray(lon_deg) + 180.0) / 360.0 * n).astype(np.int64)
+    ytile = ((1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n).astype(np.int64)
+    return xtile, ytile
+
+def _tile_bounds(north, south, east, west, zoom_levels):
+    """[(zoom, x_min, x_max, y_min, y_max)] for the box; tile rows count down from the north"""
+    zooms = list(zoom_levels)
+    if NUMPY_AVAILABLE:
+        # Both corners for every zoom level in one call each
+        x_min, y_min = deg2num_vec(north, west, zooms)
+        x_max, y_max = deg2num_vec(south, east, zooms)
+        return list(zip(zooms, x_min.tolist(), x_max.tolist(), y_min.tolist(), y_max.tolist()))
+    bounds = []
+    sides = {zoom: 1 << zoom for zoom in zooms}
+    for zoom in zooms:
+        x_min, y_min = deg2num(north, west, zoom, sides[zoom])
+        x_max, y_max = deg2num(south, east, zoom, sides[zoom])
+        bounds.append((zoom, x_min, x_max, y_min, y_max))
+    return bounds
+
+def _existing_tiles(tiles_dir, zooms):
+    """{zoom: [(x, y), ...]} already downloaded, from one scandir pass over tiles/<zoom>/.
+
+    Leftover .png.tmp files from an interrupted run are deleted on the way.
+    """
+    have = {zoom: [] for zoom in zooms}
+    for zoom, tiles in have.items():
+        try:
+            with os.scandir(tiles_dir / str(zoom)) as xs:
+                for xe in xs:
+                    if not (xe.name.isdigit() and xe.is_dir()):
+                        continue
+                    x = int(xe.name)
+                    with os.scandir(xe.path) as ys:
+                        for e in ys:
+                            if e.name.endswith('.png') and e.name[:-4].isdigit():
+                                tiles.append((x, int(e.name[:-4])))
+                            elif e.name.endswith('.png.tmp'):
+                                os.remove(e.path)
+        except FileNotFoundError:
+            pass
+    return have
+
+def _spread_bits(v):
+    """Move bit i of v (< 2**31) to bit 2i; works on ints and NumPy int64 arrays alike"""
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    v = (v | (v << 1)) & 0x5555555555555555
+    return v
+
+def _morton(x, y):
+    """Z-order key: interleaves the bits of x and y so tiles close on the map get close keys"""
+    return _spread_bits(x) | (_spread_bits(y) << 1)
+
+def _missing_tiles(x_min, x_max, y_min, y_max, have):
+    """(x, y) pairs of the x_min..x_max, y_min..y_max block that are not in `have`.
+
+    They come back in Z-order so consecutive requests hit neighbouring tiles (and the same
+    server-side metatiles) instead of sweeping whole columns.
+    """
+    if NUMPY_AVAILABLE:
+        xs, ys = np.meshgrid(np.arange(x_min, x_max + 1, dtype=np.int64),
+                             np.arange(y_min, y_max + 1, dtype=np.int64), indexing='ij')
+        grid = np.stack([xs.ravel(), ys.ravel()], axis=1)
+        if have:
+            keys = np.asarray([(x << 32) | y for x, y in have], dtype=np.int64)
+            grid = grid[~np.isin((grid[:, 0] << 32) | grid[:, 1], keys)]
+        return grid[np.argsort(_morton(grid[:, 0], grid[:, 1]), kind='stable')].tolist()
+    have = set(have)
+    missing = [(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)
+               if (x, y) not in have]
+    missing.sort(key=lambda t: _morton(*t))
+    return missing
+
+def _load_empty_tiles(tiles_dir):
+    """(zoom, x, y) of blank tiles found by earlier runs"""
+    try:
+        with open(tiles_dir / EMPTY_TILES_FILE) as f:
+            return [tuple(key) for key in json.load(f)]
+    except (OSError, ValueError):
+        return []
+
+def _save_empty_tiles(tiles_dir, empty):
+    path = tiles_dir / EMPTY_TILES_FILE
+    tmp = path.with_suffix('.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(sorted(set(empty)), f)
+    os.replace(tmp, path)
+
+class _MBTiles:
+    """Tiles kept as rows of an MBTiles (SQLite) file instead of one PNG file each.
+
+    MBTiles numbers rows from the south (TMS), so tile_row is flipped from the XYZ y.
+    """
+
+    def __init__(self, path):
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()  # Writes arrive from the I/O threads
+        self._pending = 0
+        self._con.executescript(
+            'CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);'
+            'CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER, '
+            'tile_row INTEGER, tile_data BLOB, PRIMARY KEY (zoom_level, tile_column, tile_row));')
+        self._con.executemany('INSERT OR IGNORE INTO metadata VALUES (?, ?)',
+                              (('name', 'Explorer offline tiles'), ('format', 'png')))
+        self._con.commit()
+
+    def existing(self, zooms):
+        """{zoom: [(x, y), ...]} already stored, like _existing_tiles"""
+        have = {}
+        for zoom in zooms:
+            top = (1 << zoom) - 1
+            have[zoom] = [(x, top - row) for x, row in self._con.execute(
+                'SELECT tile_column, tile_row FROM tiles WHERE zoom_level = ?', (zoom,))]
+        return have
+
+    def put(self, zoom, x, y, data):
+        with self._lock:
+            self._con.execute('INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)',
+                              (zoom, x, (1 << zoom) - 1 - y, data))
+            # Batched commits: one fsync per few hundred tiles instead of per tile
+            self._pending += 1
+            if self._pending >= _MBTILES_COMMIT_EVERY:
+                self._con.commit()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._con.commit()
+            self._con.close()
+
+class _DownloadResults:
+    """Outcome of one download pass"""
+
+    def __init__(self, empty, postprocess=None, mbtiles=None):
+        self.empty = empty  # (zoom, x, y) blank tiles, including those found by earlier runs
+        self.postprocess = postprocess
+        self.mbtiles = mbtiles  # _MBTiles the tiles go to, or None for tiles/z/x/y.png
+        self.written = []  # (zoom, x, y, path) of PNG files stored by this pass
+        self._pool = None
+        self._pending = []
+
+    def stored(self, job):
+        """Note a newly stored tile and queue it for postprocess; the process pool starts on first use"""
+        if self.mbtiles is not None:
+            return
+        self.written.append(job)
+        if self.postprocess is None:
+            return
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        self._pending.append(self._pool.submit(self.postprocess, str(job[3])))
+
+    def finish(self):
+        """Wait for outstanding post-processing and stop the pool"""
+        if self._pool is None:
+            return
+        for fut in self._pending:
+            try:
+                fut.result()
+            except Exception as e:
+                print(f"Post-processing failed: {e}")
+        self._pool.shutdown()
+
+def download_tiles(lat, lon, zoom_levels, radius_km=5, postprocess=None, max_tiles=MAX_TILES,
+                   confirm=None, mbtiles=None, concurrency=CONCURRENCY):
+    """Download tiles for a specific area.
+
+    Tiles go to tiles/z/x/y.png, or into the MBTiles file at `mbtiles` when it is given.
+    postprocess(path), if given, runs on every newly stored PNG file in a process pool sized to the
+    CPU count while downloads continue; it must be a picklable module-level function.
+    Above max_tiles, confirm(total) must return True to go ahead; without `confirm` such an
+    area raises TooManyTiles before any network I/O.
+    """
     
     # Create tiles directory
     tiles_dir = Path("tiles")
@@ -33,57 +297,287 @@ def download_tiles(lat, lon, zoom_levels, radius_km=5):
     east = lon + lon_offset
     west = lon - lon_offset
     
-    total_tiles = 0
-    downloaded = 0
+    bounds = _tile_bounds(north, south, east, west, zoom_levels)
+    total_tiles = sum((x_max - x_min + 1) * (y_max - y_min + 1) for _z, x_min, x_max, y_min, y_max in bounds)
+    print(f"Area covers {total_tiles:,} tiles")
+    if total_tiles > max_tiles:
+        if confirm is None:
+            raise TooManyTiles(f"{total_tiles:,} tiles exceed the {max_tiles:,} tile limit")
+        if not confirm(total_tiles):
+            print("Download cancelled")
+            return
     
-    for zoom in zoom_levels:
-        print(f"Downloading zoom level {zoom}...")
-        
-        # Get tile bounds
-        x_min, y_max = deg2num(north, west, zoom)
-        x_max, y_min = deg2num(south, east, zoom)
-        
+    # What's on disk comes from one scan up front instead of an exists() per tile
+    jobs = []
+    store = _MBTiles(mbtiles) if mbtiles else None
+    zooms = [b[0] for b in bounds]
+    have = store.existing(zooms) if store is not None else _existing_tiles(tiles_dir, zooms)
+    empty = _load_empty_tiles(tiles_dir)
+    for zoom, x, y in empty:
+        if zoom in have:
+            have[zoom].append((x, y))
+    for zoom, x_min, x_max, y_min, y_max in bounds:
+        print(f"Listing zoom level {zoom}...")
         zoom_dir = tiles_dir / str(zoom)
-        zoom_dir.mkdir(exist_ok=True)
-        
-        for x in range(x_min, x_max + 1):
-            x_dir = zoom_dir / str(x)
-            x_dir.mkdir(exist_ok=True)
-            
-            for y in range(y_min, y_max + 1):
-                tile_path = x_dir / f"{y}.png"
-                total_tiles += 1
-                
-                if tile_path.exists():
-                    continue  # Skip if already downloaded
-                
-                # Download tile
-                url = f"https://tile.openstreetmap.org/{zoom}/{x}/{y}.png"
-                
-                try:
-                    response = requests.get(url, timeout=10)
-                    if response.status_code == 200:
-                        with open(tile_path, 'wb') as f:
-                            f.write(response.content)
-                        downloaded += 1
-                        print(f"Downloaded: {zoom}/{x}/{y}.png")
-                    else:
-                        print(f"Failed: {zoom}/{x}/{y}.png (HTTP {response.status_code})")
-                except Exception as e:
-                    print(f"Error downloading {zoom}/{x}/{y}.png: {e}")
-                
-                # Be nice to the tile server
-                time.sleep(0.1)
+        for x, y in _missing_tiles(x_min, x_max, y_min, y_max, have[zoom]):
+            jobs.append((zoom, x, y, zoom_dir / str(x) / f"{y}.png"))
+    
+    # Each column directory is created once here, never by the fetchers
+    if store is None:
+        for x_dir in {job[3].parent for job in jobs}:
+            x_dir.mkdir(parents=True, exist_ok=True)
+    
+    print(f"Downloading {len(jobs):,} of {total_tiles:,} tiles...")
+    known_empty = len(empty)
+    results = _DownloadResults(empty, postprocess, store)
+    try:
+        if HTTPX_AVAILABLE or AIOHTTP_AVAILABLE:
+            downloaded = asyncio.run(_download_all(jobs, results, concurrency))
+        else:
+            downloaded = _download_sync(jobs, results)
+        results.finish()
+    finally:
+        if store is not None:
+            store.close()
+        _record_tile_index(tiles_dir, results.written)
+        if len(empty) > known_empty:
+            _save_empty_tiles(tiles_dir, empty)
     
     print(f"\nDownload complete!")
     print(f"Total tiles: {total_tiles}")
     print(f"Downloaded: {downloaded}")
-    print(f"Tiles stored in: {tiles_dir.absolute()}")
+    print(f"Empty (not stored): {len(empty) - known_empty}")
+    print(f"Tiles stored in: {Path(mbtiles).absolute() if mbtiles else tiles_dir.absolute()}")
 
-def create_offline_map_html():
-    """Create HTML page that uses local tiles"""
-    
-    html_content = '''<!doctype html>
+def _tile_url(zoom, x, y):
+    return TILE_URL.format(s=TILE_SUBDOMAINS[(x + y) % len(TILE_SUBDOMAINS)], z=zoom, x=x, y=y)
+
+def _tmp_path(tile_path):
+    # Tiles are written here and renamed into place, so a killed run never leaves a partial .png
+    return tile_path.with_suffix('.png.tmp')
+
+def _record_tile_index(tiles_dir, written):
+    """Add newly written (zoom, x, y, path) tiles to Main.py's tile index, if there is one"""
+    index = tiles_dir / TILE_INDEX_FILE
+    if not written or not index.exists():
+        return  # Main builds it from a scan of tiles/ on first use
+    rows = []
+    for zoom, x, y, tile_path in written:
+        try:
+            rows.append((zoom, x, y, tile_path.stat().st_size))
+        except OSError:
+            pass
+    try:
+        con = sqlite3.connect(index, timeout=10)
+        try:
+            if con.execute('PRAGMA user_version').fetchone()[0] == TILE_INDEX_VERSION:
+                with con:
+                    con.executemany('INSERT OR REPLACE INTO tiles (z, x, y, size, checked_at) '
+                                    'VALUES (?, ?, ?, ?, ?)', [(*row, time.time()) for row in rows])
+                    con.executemany('DELETE FROM failed WHERE z = ? AND x = ? AND y = ?',
+                                    [row[:3] for row in rows])
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        print(f"Could not update {index}: {e}")
+
+def _commit_tile(tmp, tile_path, size):
+    """Move a complete temp file into place; returns False (and drops it) for a blank tile"""
+    if size < EMPTY_TILE_BYTES:
+        os.remove(tmp)
+        return False
+    os.replace(tmp, tile_path)
+    return True
+
+def _put_tile(mbtiles, job, data):
+    """Store a whole tile body in the MBTiles file; returns False for a blank tile"""
+    if len(data) < EMPTY_TILE_BYTES:
+        return False
+    mbtiles.put(job[0], job[1], job[2], data)
+    return True
+
+def _save_tile(job, chunks, mbtiles=None):
+    if mbtiles is not None:
+        return _put_tile(mbtiles, job, b''.join(chunks))
+    tile_path = job[3]
+    tmp = _tmp_path(tile_path)
+    try:
+        size = 0
+        with open(tmp, 'wb') as f:
+            for chunk in chunks:
+                size += f.write(chunk)
+        return _commit_tile(tmp, tile_path, size)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+async def _stream_tile(chunks, job, io_exec, mbtiles=None):
+    """Copy an async iterator of body chunks to the tile file (or MBTiles row), writing on io_exec"""
+    loop = asyncio.get_running_loop()
+    if mbtiles is not None:
+        data = b''.join([chunk async for chunk in chunks])
+        return await loop.run_in_executor(io_exec, _put_tile, mbtiles, job, data)
+    tile_path = job[3]
+    tmp = _tmp_path(tile_path)
+    f = await loop.run_in_executor(io_exec, open, tmp, 'wb')
+    try:
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += await loop.run_in_executor(io_exec, f.write, chunk)
+        finally:
+            await loop.run_in_executor(io_exec, f.close)
+        return await loop.run_in_executor(io_exec, _commit_tile, tmp, tile_path, size)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def _retry_delay(attempt, retry_after=''):
+    """Seconds to wait after failed attempt `attempt`: exponential with jitter, or Retry-After if longer"""
+    delay = min(2 ** attempt, BACKOFF_MAX) + random.random()
+    if retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return delay
+
+def _download_sync(jobs, results):
+    """Fetch (zoom, x, y, path) jobs one at a time; used when neither httpx nor aiohttp is installed.
+
+    Blank tiles are added to results.empty instead of being stored.
+    """
+    downloaded = 0
+    # One keep-alive session so the TLS handshake is paid once, not per tile
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    session.mount('https://', HTTPAdapter(pool_connections=len(TILE_SUBDOMAINS), pool_maxsize=32,
+                                          max_retries=0))
+    try:
+        for job in jobs:
+            zoom, x, y, _tile_path = job
+            for attempt in range(RETRIES):
+                retry_after = ''
+                try:
+                    # Error bodies are never read; closing the response drops them
+                    with session.get(_tile_url(zoom, x, y), stream=True, timeout=10) as response:
+                        status = response.status_code
+                        retry_after = response.headers.get('Retry-After', '')
+                        if status == 200:
+                            stored = _save_tile(job, response.iter_content(CHUNK_SIZE), results.mbtiles)
+                except Exception as e:
+                    status, reason = None, str(e)
+                if status == 200:
+                    if stored:
+                        print(f"Downloaded: {zoom}/{x}/{y}.png")
+                        results.stored(job)
+                        downloaded += 1
+                    else:
+                        print(f"Empty: {zoom}/{x}/{y}.png (not stored)")
+                        results.empty.append((zoom, x, y))
+                    break
+                if status is not None:
+                    reason = f"HTTP {status}"
+                    if status not in _RETRY_STATUS:
+                        print(f"Failed: {zoom}/{x}/{y}.png ({reason})")
+                        break
+                if attempt + 1 < RETRIES:
+                    time.sleep(_retry_delay(attempt, retry_after))
+            else:
+                print(f"Error downloading {zoom}/{x}/{y}.png: {reason}")
+    finally:
+        session.close()
+    return downloaded
+
+async def _pause(resume, delay):
+    """Hold every request (not just this one) until a 429 backoff has elapsed"""
+    if resume.is_set():
+        resume.clear()
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            resume.set()
+    else:
+        await resume.wait()
+
+@contextlib.asynccontextmanager
+async def _get_tile(client, url):
+    """Yield (status, headers, async body chunks) from an httpx or aiohttp client"""
+    if HTTPX_AVAILABLE:
+        async with client.stream('GET', url) as r:
+            yield r.status_code, r.headers, r.aiter_bytes(CHUNK_SIZE)
+    else:
+        async with client.get(url) as r:
+            yield r.status, r.headers, r.content.iter_chunked(CHUNK_SIZE)
+
+async def _fetch(resume, client, io_exec, results, job):
+    zoom, x, y, _tile_path = job
+    for attempt in range(RETRIES):
+        status = None
+        retry_after = ''
+        await resume.wait()
+        try:
+            async with _get_tile(client, _tile_url(zoom, x, y)) as (status, headers, chunks):
+                retry_after = headers.get('Retry-After', '')
+                if status == 200:
+                    # Each worker streams one body at a time, so at most `concurrency` are in flight
+                    stored = await _stream_tile(chunks, job, io_exec, results.mbtiles)
+        except _CLIENT_ERRORS as e:
+            status, reason = None, str(e) or type(e).__name__
+        if status == 200:
+            if not stored:
+                print(f"Empty: {zoom}/{x}/{y}.png (not stored)")
+                results.empty.append((zoom, x, y))
+                return False
+            print(f"Downloaded: {zoom}/{x}/{y}.png")
+            results.stored(job)
+            return True
+        if status is not None:
+            reason = f"HTTP {status}"
+            if status not in _RETRY_STATUS:
+                print(f"Failed: {zoom}/{x}/{y}.png ({reason})")
+                return False
+        if attempt + 1 < RETRIES:
+            delay = _retry_delay(attempt, retry_after)
+            if status == 429:
+                await _pause(resume, delay)
+            else:
+                await asyncio.sleep(delay)
+    print(f"Error downloading {zoom}/{x}/{y}.png: {reason}")
+    return False
+
+async def _worker(jobs, resume, client, io_exec, results):
+    """Fetch jobs one at a time from an iterator shared with the other workers"""
+    downloaded = 0
+    for job in jobs:
+        downloaded += await _fetch(resume, client, io_exec, results, job)
+    return downloaded
+
+async def _download_all(jobs, results, concurrency=CONCURRENCY):
+    """Fetch (zoom, x, y, path) jobs with `concurrency` workers; that cap, not a sleep, keeps it polite.
+
+    With httpx the requests are multiplexed as HTTP/2 streams over one connection; aiohttp
+    opens up to `concurrency` HTTP/1.1 connections instead.
+    Blank tiles are added to results.empty instead of being stored.
+    """
+    resume = asyncio.Event()
+    resume.set()
+    headers = {'User-Agent': USER_AGENT}
+    if HTTPX_AVAILABLE:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        client = httpx.AsyncClient(http2=True, limits=limits, headers=headers, timeout=10.0)
+    else:
+        connector = aiohttp.TCPConnector(limit_per_host=concurrency, ttl_dns_cache=300)
+        client = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10),
+                                       headers=headers)
+    async with client:
+        with ThreadPoolExecutor(max_workers=IO_WORKERS) as io_exec:
+            # A fixed set of tasks, not one coroutine per tile up front
+            workers = min(concurrency, len(jobs))
+            jobs = iter(jobs)
+            fetched = await asyncio.gather(*[_worker(jobs, resume, client, io_exec, results)
+                                             for _ in range(workers)])
+    return sum(fetched)
+
+# Page for the local tile server; encoded once here instead of on every write
+_OFFLINE_MAP_HTML = '''<!doctype html>
 <html lang="en">
 <head>
   <meta charset="utf-8">
@@ -156,36 +650,65 @@ def create_offline_map_html():
     fetchLocation();
   </script>
 </body>
-</html>'''
-    
-    with open('offline_map_tiles.html', 'w') as f:
-        f.write(html_content)
-    
+</html>'''.encode('utf-8')
+
+def create_offline_map_html():
+    """Create HTML page that uses local tiles"""
+    Path('offline_map_tiles.html').write_bytes(_OFFLINE_MAP_HTML)
     print("Created offline_map_tiles.html")
 
+def _confirm_large_area(total):
+    answer = input(f"This area needs {total:,} tiles (limit {MAX_TILES:,}). Proceed? [y/N]: ")
+    return answer.strip().lower() in ('y', 'yes')
+
 def main():
+    # No prompts, so several regions can be fetched side by side, e.g. from xargs -P or cron
+    parser = argparse.ArgumentParser(description="Download OpenStreetMap tiles for offline use")
+    parser.add_argument('--lat', type=float, required=True, help="Centre latitude, e.g. 45.5017")
+    parser.add_argument('--lon', type=float, required=True, help="Centre longitude, e.g. -73.5673")
+    parser.add_argument('--radius-km', type=float, default=5.0, help="Radius around the centre (default 5)")
+    parser.add_argument('--zoom-min', type=int, default=ZOOM_MIN, help=f"Least detailed zoom level (default {ZOOM_MIN})")
+    parser.add_argument('--zoom-max', type=int, default=ZOOM_MAX, help=f"Most detailed zoom level (default {ZOOM_MAX})")
+    parser.add_argument('--zoom-step', type=int, default=ZOOM_STEP,
+                        help=f"Cache every Nth zoom level from --zoom-min to --zoom-max (default {ZOOM_STEP}; 1 = all)")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                        help=f"Requests in flight at once (default {CONCURRENCY}, the OSM tile policy limit)")
+    parser.add_argument('--mbtiles', nargs='?', const=MBTILES_FILE, default=None,
+                        help=f"Store tiles in an MBTiles file (default {MBTILES_FILE}) instead of tiles/z/x/y.png")
+    parser.add_argument('--yes', action='store_true', help=f"Download areas above {MAX_TILES:,} tiles without asking")
+    args = parser.parse_args()
+    if not -85.0511 <= args.lat <= 85.0511 or not -180.0 <= args.lon <= 180.0:
+        parser.error("--lat/--lon out of range for web map tiles")
+    if not 0 <= args.zoom_min <= args.zoom_max <= 19:
+        parser.error("need 0 <= --zoom-min <= --zoom-max <= 19")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
     print("🗺️ Offline Map Tile Downloader")
     print("=" * 40)
     
-    # Get location from user
-    try:
-        lat = float(input("Enter latitude (e.g., 45.5017): "))
-        lon = float(input("Enter longitude (e.g., -73.5673): "))
-        radius = float(input("Enter radius in km (e.g., 5): ") or "5")
-    except ValueError:
-        print("Invalid input. Using Montreal, Canada as default.")
-        lat, lon, radius = 45.5017, -73.5673, 5
-    
-    # Download tiles for zoom levels 10-18
-    zoom_levels = list(range(10, 19))
+    lat, lon, radius = args.lat, args.lon, args.radius_km
+    zoom_levels = zoom_pyramid(args.zoom_min, args.zoom_max, args.zoom_step)
     
     print(f"\nDownloading tiles for:")
     print(f"Location: {lat}, {lon}")
     print(f"Radius: {radius} km")
     print(f"Zoom levels: {zoom_levels}")
+    if len(zoom_levels) < args.zoom_max - args.zoom_min + 1:
+        print("Only these levels are cached: each one needs ~4x the tiles of the one below, and")
+        print("a map is usually viewed at a few of them. Use --zoom-step 1 to cache every level.")
     print("\nThis may take several minutes...")
     
-    download_tiles(lat, lon, zoom_levels, radius)
+    # Unattended runs (cron, xargs) can't answer the prompt; they fail on a large area instead
+    if args.yes:
+        confirm = (lambda total: True)
+    else:
+        confirm = _confirm_large_area if sys.stdin.isatty() else None
+    try:
+        download_tiles(lat, lon, zoom_levels, radius, confirm=confirm, mbtiles=args.mbtiles,
+                       concurrency=args.concurrency)
+    except TooManyTiles as e:
+        sys.exit(str(e))
     create_offline_map_html()
     
     print("\n✅ Setup complete!")
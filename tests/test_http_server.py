@@ -0,0 +1,107 @@
+import os
+import re
+import socket
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main
+
+# Well above what a few browser tabs keep open (~6 connections each)
+IDLE_CONNECTIONS = 40
+# Seconds between the map pages' /location polls
+POLL_INTERVAL = int(re.search(r'setInterval\(fetchLocation, (\d+)\)', Main.HTML_PAGE).group(1)) / 1000
+
+
+def _get(sock, path='/missing'):
+    """Send a keep-alive GET on sock and read the whole response"""
+    sock.sendall(f'GET {path} HTTP/1.1\r\nHost: test\r\n\r\n'.encode('ascii'))
+    data = b''
+    while b'\r\n\r\n' not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionError('server closed the connection')
+        data += chunk
+    head, _, body = data.partition(b'\r\n\r\n')
+    length = int(head.lower().split(b'content-length: ')[1].split(b'\r\n')[0])
+    while len(body) < length:
+        body += sock.recv(4096)
+    return head
+
+
+class ServerTestCase(unittest.TestCase):
+    """Runs a MapHTTPServer on a free local port for each test"""
+
+    def setUp(self):
+        patcher = mock.patch.object(Main.RequestHandler, 'log_message')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = Main.MapHTTPServer(('127.0.0.1', 0), Main.RequestHandler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.sockets = []
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _connect(self):
+        sock = socket.create_connection(('127.0.0.1', self.port), timeout=10)
+        self.sockets.append(sock)
+        return sock
+
+
+class KeepAliveTest(ServerTestCase):
+    def test_idle_connections_do_not_block_new_ones(self):
+        for _ in range(IDLE_CONNECTIONS):
+            _get(self._connect())
+        start = time.monotonic()
+        head = _get(self._connect())
+        self.assertTrue(head.startswith(b'HTTP/1.1 404'))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_polled_connection_is_reused(self):
+        sock = self._connect()
+        for _ in range(3):
+            self.assertTrue(_get(sock).startswith(b'HTTP/1.1 404'))
+            # Browser timers drift, so a poll can land a little after the nominal interval
+            time.sleep(POLL_INTERVAL + 0.5)
+        # Still open: the next poll is answered on the same connection
+        self.assertTrue(_get(sock).startswith(b'HTTP/1.1 404'))
+
+    def test_idle_connection_is_closed_after_timeout(self):
+        sock = self._connect()
+        _get(sock)
+        start = time.monotonic()
+        self.assertEqual(sock.recv(1), b'')
+        self.assertLess(time.monotonic() - start, Main.RequestHandler.timeout + 1.0)
+
+
+class ConnectionHeaderTest(ServerTestCase):
+    def _headers(self, request):
+        sock = self._connect()
+        sock.sendall(request)
+        data = b''
+        while b'\r\n\r\n' not in data:
+            data += sock.recv(4096)
+        return data.partition(b'\r\n\r\n')[0].lower()
+
+    def test_keep_alive(self):
+        self.assertIn(b'connection: keep-alive', self._headers(b'GET /missing HTTP/1.1\r\nHost: test\r\n\r\n'))
+
+    def test_close_requested(self):
+        head = self._headers(b'GET /missing HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n')
+        self.assertIn(b'connection: close', head)
+
+    def test_http_1_0(self):
+        self.assertIn(b'connection: close', self._headers(b'GET /missing HTTP/1.0\r\n\r\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
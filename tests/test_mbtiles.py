@@ -0,0 +1,67 @@
+import os
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main
+
+TILE = b'\x89PNG' + b'x' * 1000
+
+
+class MBTilesFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'tiles.mbtiles')
+        con = sqlite3.connect(path)
+        con.execute('CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, '
+                    'tile_row INTEGER, tile_data BLOB)')
+        # XYZ 12/1210/1465 is TMS row 4095 - 1465
+        con.execute('INSERT INTO tiles VALUES (12, 1210, 2630, ?)', (TILE,))
+        con.commit()
+        con.close()
+        self._saved_file = Main.MBTILES_FILE
+        Main.MBTILES_FILE = path
+        Main._mbtiles_local.con = None
+
+    def tearDown(self):
+        if Main._mbtiles_local.con is not None:
+            Main._mbtiles_local.con.close()
+            Main._mbtiles_local.con = None
+        Main.MBTILES_FILE = self._saved_file
+        self.tmp.cleanup()
+
+    def test_stored_tile(self):
+        self.assertEqual(Main._mbtiles_tile('/tiles/12/1210/1465.png'), TILE)
+        self.assertIsNone(Main._mbtiles_tile('/tiles/12/1210/1466.png'))
+
+    def test_out_of_range_paths(self):
+        for path in ('/tiles/70/0/0.png', '/tiles/1/99999999999999999999/0.png',
+                     '/tiles/1/0/99999999999999999999.png', '/tiles/12/4096/0.png'):
+            self.assertIsNone(Main._mbtiles_tile(path), path)
+
+    def test_out_of_range_request_gets_404(self):
+        patcher = mock.patch.object(Main.RequestHandler, 'log_message')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        server = Main.MapHTTPServer(('127.0.0.1', 0), Main.RequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            with socket.create_connection(server.server_address, timeout=10) as sock:
+                sock.sendall(b'GET /tiles/70/0/0.png HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n')
+                data = b''
+                while chunk := sock.recv(4096):
+                    data += chunk
+            self.assertTrue(data.startswith(b'HTTP/1.1 404'), data[:40])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Main
+import setup_offline_tiles
+
+
+def _write_tile(tiles_dir, z, x, y, size=1000):
+    path = tiles_dir / str(z) / str(x) / f'{y}.png'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    return path
+
+
+class SetupTileIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tiles_dir = Path(self.tmp.name) / 'tiles'
+        self.tiles_dir.mkdir()
+        self._saved_file = Main.TILE_INDEX_FILE
+        Main.TILE_INDEX_FILE = str(self.tiles_dir / 'index.sqlite')
+
+    def tearDown(self):
+        Main.TILE_INDEX_FILE = self._saved_file
+        self.tmp.cleanup()
+
+    def test_setup_tiles_show_in_stats(self):
+        _write_tile(self.tiles_dir, 10, 1, 1)
+        self.assertEqual(Main.tile_index_stats()['count'], 1)  # Builds the index from a scan
+
+        written = [(12, 5, y, _write_tile(self.tiles_dir, 12, 5, y, 700)) for y in (6, 7)]
+        setup_offline_tiles._record_tile_index(self.tiles_dir, written)
+
+        stats = Main.tile_index_stats()
+        self.assertEqual(stats['count'], 3)
+        self.assertEqual(stats['size'], 2400)
+        self.assertEqual(stats['zooms'], {10, 12})
+
+    def test_no_index_is_left_for_main_to_build(self):
+        path = _write_tile(self.tiles_dir, 12, 5, 6)
+        setup_offline_tiles._record_tile_index(self.tiles_dir, [(12, 5, 6, path)])
+        self.assertFalse((self.tiles_dir / 'index.sqlite').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()